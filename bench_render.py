@@ -0,0 +1,350 @@
+"""
+Benchmarks for the render pipeline.
+
+    python bench_render.py render
+    python bench_render.py faces --folder PASTA_COM_IMAGENS
+    python bench_render.py frames
+    python bench_render.py gif
+    python bench_render.py encode
+"""
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from src.config.settings import (
+    ANIMATION_EXPORT_FORMATS,
+    BORDA_HEIGHT,
+    BORDA_WIDTH,
+    BORDER_THICKNESS,
+    ENCODER_PRESETS,
+    SUPPORTED_EXTENSIONS,
+)
+from src.core import frame_engine
+from src.core.anim_export import ENCODER_OPTIONS, animation_extension, save_animation
+from src.core.animation_processor import AnimationProcessor
+from src.core.frame_cache import shared_frame_cache
+from src.core.gif_writer import save_delta_gif
+from src.core.image_processor import ImageProcessor
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _peak_rss_kb():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _synthetic_source(width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, (height // 8 + 1, width // 8 + 1, 4), dtype=np.uint8)
+    base[..., 3] = 255
+    # Upsampled noise behaves more like artwork than per-pixel noise.
+    return Image.fromarray(base, "RGBA").resize((width, height), Image.BILINEAR)
+
+
+def _render_case(mode, source_size, zoom, repeat, queue):
+    source = _synthetic_source(*source_size)
+    fit = ImageProcessor.calculate_auto_fit_pos(source, (0, 0))
+    new_w, new_h = int(fit[0] * zoom), int(fit[1] * zoom)
+    pos = ((BORDA_WIDTH - new_w) // 2, (BORDA_HEIGHT - new_h) // 3)
+    baseline = _peak_rss_kb()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        ImageProcessor.render_image_to_borda(source, pos, (new_w, new_h), (0, 0), mode=mode).close()
+    elapsed = (time.perf_counter() - started) / repeat
+    peak = _peak_rss_kb()
+    queue.put((elapsed, None if peak is None else peak - baseline))
+
+
+def _run_isolated(target, *args):
+    # A fresh process per case keeps ru_maxrss meaningful.
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=args + (queue,))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def bench_render(args):
+    source_size = (args.width, args.height)
+    print(f"render_image_to_borda, fonte {source_size[0]}x{source_size[1]}, media de {args.repeat} execucao(oes)")
+    print(
+        f"{'zoom':>6} {'full ms':>9} {'region ms':>10} {'auto ms':>9} {'ganho':>7}"
+        f" {'full RSS MB':>12} {'region RSS MB':>14} {'auto RSS MB':>12}"
+    )
+    rss = lambda kb: "n/a" if kb is None else f"{kb / 1024:.1f}"
+    for zoom in args.zooms:
+        full_s, full_rss = _run_isolated(_render_case, "full", source_size, zoom, args.repeat)
+        region_s, region_rss = _run_isolated(_render_case, "region", source_size, zoom, args.repeat)
+        auto_s, auto_rss = _run_isolated(_render_case, "auto", source_size, zoom, args.repeat)
+        print(
+            f"{zoom:>6.1f} {full_s * 1000:>9.1f} {region_s * 1000:>10.1f} {auto_s * 1000:>9.1f}"
+            f" {full_s / max(auto_s, 1e-9):>6.1f}x {rss(full_rss):>12} {rss(region_rss):>14} {rss(auto_rss):>12}"
+        )
+
+
+def _iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def _timed_detect(image, cascade, **kwargs):
+    started = time.perf_counter()
+    face = ImageProcessor.detect_anime_face(image, cascade, **kwargs)
+    return face, time.perf_counter() - started
+
+
+def bench_faces(args):
+    cascade = ImageProcessor.load_face_cascade()
+    if cascade is None:
+        raise SystemExit("lbpcascade_animeface.xml nao encontrado.")
+
+    if args.folder:
+        names = sorted(n for n in os.listdir(args.folder) if n.lower().endswith(SUPPORTED_EXTENSIONS))
+        sources = [os.path.join(args.folder, n) for n in names][: args.limit]
+    else:
+        print("Sem --folder: usando imagens sinteticas (so tempo, sem rostos para comparar).")
+        sources = [None] * 5
+
+    modes = [("full", {"working_size": None}), ("working", {"working_size": args.working_size})]
+    modes.append(("working+refine", {"working_size": args.working_size, "refine": True}))
+    totals = {name: 0.0 for name, _ in modes}
+    agree = {name: 0 for name, _ in modes[1:]}
+    ious = {name: [] for name, _ in modes[1:]}
+
+    for index, source in enumerate(sources):
+        if source is None:
+            image = _synthetic_source(2800, 4000, seed=index)
+        else:
+            with Image.open(source) as opened:
+                image = opened.convert("RGBA")
+        results = {}
+        for name, kwargs in modes:
+            results[name], elapsed = _timed_detect(image, cascade, **kwargs)
+            totals[name] += elapsed
+        image.close()
+
+        reference = results["full"]
+        for name, _ in modes[1:]:
+            candidate = results[name]
+            if reference is None or candidate is None:
+                agree[name] += int(reference is None and candidate is None)
+                continue
+            iou = _iou(reference, candidate)
+            ious[name].append(iou)
+            agree[name] += int(iou >= 0.5)
+
+    count = len(sources)
+    print(f"detect_anime_face em {count} imagem(ns), working_size={args.working_size}")
+    print(f"{'modo':>16} {'ms/imagem':>10} {'ganho':>7} {'concorda':>9} {'IoU medio':>10}")
+    for name, _ in modes:
+        per_image = totals[name] / max(count, 1)
+        speedup = totals["full"] / max(totals[name], 1e-9)
+        if name == "full":
+            print(f"{name:>16} {per_image * 1000:>10.1f} {'1.0x':>7} {'-':>9} {'-':>10}")
+            continue
+        mean_iou = sum(ious[name]) / len(ious[name]) if ious[name] else float("nan")
+        print(f"{name:>16} {per_image * 1000:>10.1f} {speedup:>6.1f}x {agree[name]:>4}/{count:<4} {mean_iou:>10.2f}")
+
+
+# (anim_type, color, total_frames) exactly as batch_worker exports them.
+FRAME_EFFECTS = [
+    ("Rainbow", "#FFFFFF", 40),
+    ("Neon Pulsante", "#ff66cc", 40),
+    ("Strobe (Pisca)", "#FFFFFF", 10),
+    ("Glitch", "#FFFFFF", 20),
+    ("Spin", "#ff66cc", 30),
+    ("Flow", "#ff66cc", 30),
+]
+
+
+def _legacy_solid_frames(colors, content, border_width, overlay_only):
+    # The per-frame Image.new + paste / mask loop the engine replaced.
+    frames = []
+    for color in colors:
+        frame = Image.new("RGBA", (BORDA_WIDTH, BORDA_HEIGHT), color)
+        if overlay_only:
+            AnimationProcessor._clear_center(frame, border_width)
+        else:
+            frame.paste(content, (border_width, border_width), content)
+        frames.append(frame)
+    return frames
+
+
+def _fps(fn, frame_count, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for frame in fn():
+            frame.close()
+    return frame_count * repeat / max(time.perf_counter() - started, 1e-9)
+
+
+def bench_frames(args):
+    cropped = _synthetic_source(BORDA_WIDTH, BORDA_HEIGHT)
+    _size, content = AnimationProcessor._prepare(cropped, BORDER_THICKNESS, False)
+    print(f"Geracao de frames {BORDA_WIDTH}x{BORDA_HEIGHT}, borda {BORDER_THICKNESS}px, media de {args.repeat} execucao(oes)")
+    print(
+        f"{'efeito':>16} {'frames':>7} {'export fps':>11} {'preview fps':>12} {'preview cache':>14}"
+        f" {'legado export':>14} {'legado preview':>15}"
+    )
+    cache = shared_frame_cache()
+
+    def render(anim_type, base, color, total, overlay_only, cold):
+        if cold:
+            cache.clear()
+        frames, _duration = AnimationProcessor.render_frames_array(
+            anim_type, base, color, total, BORDER_THICKNESS, overlay_only=overlay_only
+        )
+        return frame_engine.to_images(frames)
+
+    overlay_size = (BORDA_WIDTH, BORDA_HEIGHT)
+    for anim_type, color, total in FRAME_EFFECTS:
+        export = _fps(lambda: render(anim_type, cropped, color, total, False, True), total, args.repeat)
+        preview = _fps(lambda: render(anim_type, overlay_size, color, total, True, True), total, args.repeat)
+        cached = _fps(lambda: render(anim_type, overlay_size, color, total, True, False), total, args.repeat)
+        legacy_export = legacy_preview = "-"
+        if anim_type in ("Rainbow", "Neon Pulsante", "Strobe (Pisca)"):
+            colors = {
+                "Rainbow": lambda: frame_engine.rainbow_colors(total),
+                "Neon Pulsante": lambda: frame_engine.neon_colors(color, total),
+                "Strobe (Pisca)": lambda: frame_engine.strobe_colors(total),
+            }[anim_type]
+            legacy_export = f"{_fps(lambda: _legacy_solid_frames(colors(), content, BORDER_THICKNESS, False), total, args.repeat):.0f}"
+            legacy_preview = f"{_fps(lambda: _legacy_solid_frames(colors(), None, BORDER_THICKNESS, True), total, args.repeat):.0f}"
+        print(
+            f"{anim_type:>16} {total:>7} {export:>11.0f} {preview:>12.0f} {cached:>14.0f}"
+            f" {legacy_export:>14} {legacy_preview:>15}"
+        )
+    content.close()
+    cropped.close()
+
+
+def _legacy_save_gif(frames, output_path, duration):
+    # Full adaptive quantization per frame, disposal 2: the writer save_delta_gif replaced.
+    gif_frames = [frame.convert("P", palette=Image.ADAPTIVE) for frame in frames]
+    gif_frames[0].save(
+        output_path,
+        format="GIF",
+        save_all=True,
+        append_images=gif_frames[1:],
+        loop=0,
+        duration=duration,
+        disposal=2,
+    )
+    for frame in gif_frames:
+        frame.close()
+
+
+def _timed_save(save, frames, output_path, duration, repeat, **kwargs):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        save(frames, output_path, duration, **kwargs)
+    return (time.perf_counter() - started) / repeat, os.path.getsize(output_path)
+
+
+def bench_gif(args):
+    cropped = _synthetic_source(BORDA_WIDTH, BORDA_HEIGHT)
+    print(f"GIF animado {BORDA_WIDTH}x{BORDA_HEIGHT}, media de {args.repeat} execucao(oes)")
+    print("delta ms monta a paleta global do zero; cache ms reaproveita a paleta do conteudo")
+    print(
+        f"{'efeito':>16} {'legado KB':>10} {'delta KB':>9} {'reducao':>8}"
+        f" {'legado ms':>10} {'delta ms':>9} {'cache ms':>9} {'ganho':>7}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.gif")
+        delta_path = os.path.join(tmp, "delta.gif")
+        for anim_type, color, total in FRAME_EFFECTS:
+            stack, duration = AnimationProcessor.render_frames_array(anim_type, cropped, color, total, BORDER_THICKNESS)
+            frames = frame_engine.to_images(stack)
+            legacy_s, legacy_size = _timed_save(_legacy_save_gif, frames, legacy_path, duration, args.repeat)
+            delta_s, delta_size = _timed_save(save_delta_gif, frames, delta_path, duration, args.repeat)
+            # The same image under every effect: only the first one builds the content palette.
+            cached_s, _size = _timed_save(
+                save_delta_gif, frames, delta_path, duration, args.repeat, palette_key="bench"
+            )
+            print(
+                f"{anim_type:>16} {legacy_size / 1024:>10.0f} {delta_size / 1024:>9.0f} {legacy_size / max(delta_size, 1):>7.1f}x"
+                f" {legacy_s * 1000:>10.0f} {delta_s * 1000:>9.0f} {cached_s * 1000:>9.0f} {legacy_s / max(cached_s, 1e-9):>6.1f}x"
+            )
+            for frame in frames:
+                frame.close()
+    cropped.close()
+
+
+def bench_encode(args):
+    cropped = _synthetic_source(BORDA_WIDTH, BORDA_HEIGHT)
+    formats = args.formats or ANIMATION_EXPORT_FORMATS
+    print(f"Encode de animacao {BORDA_WIDTH}x{BORDA_HEIGHT} por formato e preset, media de {args.repeat} execucao(oes)")
+    print(f"{'efeito':>16} {'formato':>14} {'preset':>12} {'KB':>7} {'ms':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for anim_type, color, total in FRAME_EFFECTS:
+            stack, duration = AnimationProcessor.render_frames_array(anim_type, cropped, color, total, BORDER_THICKNESS)
+            for export_format in formats:
+                tunable = any(ENCODER_OPTIONS[export_format].values())
+                presets = ENCODER_PRESETS if tunable else ENCODER_PRESETS[:1]
+                for preset in presets:
+                    path = os.path.join(tmp, "out" + animation_extension(export_format))
+                    started = time.perf_counter()
+                    for _ in range(args.repeat):
+                        save_animation(stack, path, duration, export_format, preset)
+                    elapsed = (time.perf_counter() - started) / args.repeat
+                    label = preset if tunable else "-"
+                    print(
+                        f"{anim_type:>16} {export_format:>14} {label:>12}"
+                        f" {os.path.getsize(path) / 1024:>7.0f} {elapsed * 1000:>7.0f}"
+                    )
+    cropped.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    render = sub.add_parser("render", help="full resize vs region-first render")
+    render.add_argument("--width", type=int, default=2800)
+    render.add_argument("--height", type=int, default=4000)
+    render.add_argument("--repeat", type=int, default=3)
+    render.add_argument("--zooms", type=float, nargs="+", default=[1.0, 4.0, 12.0, 24.0, 36.0])
+    render.set_defaults(func=bench_render)
+
+    faces = sub.add_parser("faces", help="deteccao em resolucao cheia vs imagem de trabalho reduzida")
+    faces.add_argument("--folder", help="pasta com imagens para comparar a precisao")
+    faces.add_argument("--limit", type=int, default=50)
+    faces.add_argument("--working-size", type=int, default=800)
+    faces.set_defaults(func=bench_faces)
+
+    frames = sub.add_parser("frames", help="frames por segundo de cada efeito (export e preview)")
+    frames.add_argument("--repeat", type=int, default=5)
+    frames.set_defaults(func=bench_frames)
+
+    gif = sub.add_parser("gif", help="tamanho e tempo do GIF: escritor legado vs frames delta")
+    gif.add_argument("--repeat", type=int, default=3)
+    gif.set_defaults(func=bench_gif)
+
+    encode = sub.add_parser("encode", help="tamanho e tempo de encode por formato de saida e preset")
+    encode.add_argument("--repeat", type=int, default=2)
+    encode.add_argument("--formats", nargs="+", choices=ANIMATION_EXPORT_FORMATS)
+    encode.set_defaults(func=bench_encode)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -121,6 +121,38 @@ BORDA_WIDTH = 225
 BORDA_HEIGHT = 350
 BORDER_THICKNESS = 5
 
+# Lado maior minimo da imagem usada na deteccao de rostos
+FACE_DETECTION_WORKING_SIZE = 800
+
+# Indice persistente de resultados da deteccao de rostos
+FACE_INDEX_FILE = os.path.join(".cache", "face_index", "faces.sqlite3")
+
+# Cache em disco dos arquivos exportados, reaproveitados quando nada mudou
+RENDER_CACHE_DIR = os.path.join(".cache", "renders")
+RENDER_CACHE_MAX_MB = 512
+
+# Limite por processo do cache de frames de borda das animacoes
+FRAME_CACHE_MAX_MB = 96
+
+# Paleta global dos GIFs: entradas reservadas para as cores da borda e
+# quantas paletas de conteudo ficam em cache por processo
+PALETTE_BORDER_COLORS = 64
+PALETTE_CACHE_ENTRIES = 64
+# Maximo de pixels que o median cut analisa; acima disso usa uma amostra
+# uniforme (fontes animadas mudam quase todos os pixels em todo frame)
+PALETTE_SAMPLE_PIXELS = 1 << 20
+
+# Formatos de saida das animacoes e presets de velocidade/tamanho do encoder
+ANIMATION_EXPORT_FORMATS = ("gif", "webp", "webp_lossless", "apng")
+ENCODER_PRESETS = ("rapido", "equilibrado", "compacto")
+
+# Ajuste automatico ao limite de tamanho: quadros depois do primeiro
+# codificados na amostra que estima o arquivo, e o minimo de quadros por loop
+SIZE_TUNER_SAMPLE_FRAMES = 4
+SIZE_TUNER_MIN_FRAMES = 4
+# Maior limite aceito em "export_max_kb" (0 desliga o ajuste)
+EXPORT_MAX_KB_LIMIT = 100 * 1024
+
 # Configuracoes de upload
 UPLOAD_BATCH_SIZE = 10
 
@@ -1,15 +1,18 @@
 import concurrent.futures
 import logging
 import os
-import secrets
-import shutil
 import tempfile
-import zipfile
 from typing import List
 
-from PIL import Image
-
+from src.core.anim_export import animation_extension, resolve_animation_format, resolve_encoder_preset
 from src.core.batch_worker import process_image_task
+from src.core.image_probe import probe_image
+from src.core.image_processor import ImageProcessor
+from src.core.render_cache import RenderCache, image_digest
+from src.core.render_pool import RenderPool
+from src.core.shared_images import SharedImages
+from src.core.upload_pipeline import UploadPipeline
+from src.core.zip_stream import ZipStreamWriter
 
 
 logger = logging.getLogger(__name__)
@@ -38,6 +41,8 @@ class BatchController:
         borda_hex=None,
         borda_pos=None,
         edited_source_images=None,
+        render_pool=None,
+        render_cache=None,
     ):
         self.app = app_context
         self.editor_state = editor_state
@@ -48,9 +53,39 @@ class BatchController:
         if edited_source_images is None:
             edited_source_images = getattr(app_context, "edited_source_images", {})
         self._edited_source_images = edited_source_images
+        # Started with the first batch and kept warm until shutdown().
+        self._render_pool = render_pool or RenderPool()
+        self._render_cache = render_cache or RenderCache()
+
+    def shutdown(self):
+        """Stops the render workers; call when the app closes."""
+        self._render_pool.shutdown()
+
+    def _default_state(self, path):
+        """Auto-fit placement for images that were never opened in the editor."""
+        reference = self._edited_source_images.get(path)
+        if reference is None:
+            try:
+                reference = probe_image(path)
+            except (OSError, ValueError) as exc:
+                logger.warning("Ignorando %s: %s", path, exc)
+                return None
+        fit = ImageProcessor.calculate_auto_fit_pos(reference, self._resolve_borda_pos())
+        if not fit:
+            return None
+        new_w, new_h, pos_x, pos_y = fit
+        return {"pos": (pos_x, pos_y), "size": (new_w, new_h)}
 
-    def _get_task_data(self, path, output_path=None, source_dir=None):
-        state = self._image_states().get(path)
+    def _get_task_data(
+        self,
+        path,
+        output_path=None,
+        shared_images=None,
+        export_format=None,
+        export_preset=None,
+        export_max_kb=None,
+    ):
+        state = self._image_states().get(path) or self._default_state(path)
         if not state:
             return None
 
@@ -68,24 +103,22 @@ class BatchController:
             "anim_type": anim_type,
             "border_color": b_hex,
             "output_path": output_path,
+            "export_format": self._export_format(export_format),
+            "export_preset": self._export_preset(export_preset),
+            "max_bytes": self._export_max_bytes(export_max_kb),
+            # Full-resolution decode, bit-identical to the editor render (see RENDER_REDUCING_GAP).
+            "exact_source": bool(self._config_get("exact_render", False)),
         }
         source_image = self._edited_source_images.get(path)
+        if output_path:
+            source_digest = image_digest(source_image) if source_image is not None else None
+            data["cache_key"] = self._render_cache.key(data, source_digest)
         if source_image is not None:
-            data["source_path"] = self._save_source_override(path, source_image, source_dir)
+            if shared_images is None:
+                raise ValueError("shared_images is required when exporting edited source images.")
+            data["source_image"] = shared_images.share(source_image)
         return data
 
-    @staticmethod
-    def _save_source_override(path, image, source_dir):
-        if source_dir is None:
-            raise ValueError("source_dir is required when exporting edited source images.")
-        if not isinstance(image, Image.Image):
-            raise TypeError("Edited source image must be a PIL image.")
-        os.makedirs(source_dir, exist_ok=True)
-        stem = os.path.splitext(os.path.basename(path))[0]
-        source_path = os.path.join(source_dir, f"{stem}_{secrets.token_hex(4)}.png")
-        image.save(source_path, format="PNG")
-        return source_path
-
     def _config_get(self, key, default=None):
         if not self.app_config:
             return default
@@ -126,6 +159,26 @@ class BatchController:
     def _animation_type(self):
         return _resolve_value(self._state_attr("animation_type", "Nenhuma"), "Nenhuma")
 
+    def _export_format(self, override=None):
+        return resolve_animation_format(override or self._config_get("export_format"))
+
+    def _export_preset(self, override=None):
+        return resolve_encoder_preset(override or self._config_get("export_preset"))
+
+    def _export_max_bytes(self, override=None):
+        """Byte budget for animated exports, or None when no limit is set."""
+        value = override if override is not None else self._config_get("export_max_kb")
+        try:
+            max_kb = int(value or 0)
+        except (TypeError, ValueError):
+            return None
+        return max_kb * 1024 if max_kb > 0 else None
+
+    def _output_extension(self, export_format=None):
+        if self._animation_type() == "Nenhuma":
+            return ".png"
+        return animation_extension(self._export_format(export_format))
+
     def _resolve_borda_pos(self):
         if self._borda_pos is not None:
             return self._borda_pos
@@ -145,25 +198,46 @@ class BatchController:
         except (TypeError, ValueError):
             return cpu_default
 
-    def _run_batch(self, tasks, on_progress=None, cancel_event=None):
+    @staticmethod
+    def _plan_parallelism(task_count, max_workers):
+        """
+        (processes, frame_threads) for a batch. Large batches run one image
+        per process; when there are fewer images than workers, each image gets
+        the spare workers as threads that render its frames in parallel.
+        """
+        if task_count >= max_workers:
+            return max_workers, 1
+        processes = max(1, task_count)
+        return processes, max(1, max_workers // processes)
+
+    def _run_batch(self, tasks, on_progress=None, cancel_event=None, on_result=None):
+        """
+        Runs process_image_task over tasks on the render pool. on_result, when
+        given, is called with each result as it completes, in completion order.
+        """
         total = len(tasks)
         completed = 0
         results: List[dict] = []
         if total == 0:
             return {"results": results, "cancelled": False}
 
-        max_workers = self._resolve_max_workers()
-        logger.info("Iniciando processamento em lote com %s task(s), workers=%s", total, max_workers)
-        executor = concurrent.futures.ProcessPoolExecutor(max_workers=max_workers)
+        pool_workers = self._resolve_max_workers()
+        max_workers, frame_threads = self._plan_parallelism(total, pool_workers)
+        for task in tasks:
+            task.setdefault("frame_threads", frame_threads)
+        logger.info(
+            "Iniciando processamento em lote com %s task(s), workers=%s, threads por imagem=%s",
+            total,
+            max_workers,
+            frame_threads,
+        )
+        # The pool keeps every allowed worker warm; small batches use the
+        # spare ones through frame_threads.
+        futures = {self._render_pool.submit(pool_workers, process_image_task, task): task for task in tasks}
+        pending = set(futures.keys())
         try:
-            futures = {executor.submit(process_image_task, task): task for task in tasks}
-            pending = set(futures.keys())
-
             while pending:
                 if cancel_event and cancel_event.is_set():
-                    for future in pending:
-                        future.cancel()
-                    executor.shutdown(wait=False, cancel_futures=True)
                     return {"results": results, "cancelled": True}
 
                 done, pending = concurrent.futures.wait(
@@ -174,34 +248,115 @@ class BatchController:
                 for future in done:
                     try:
                         res = future.result()
-                        results.append(res)
                     except Exception as exc:
                         logger.exception("Erro no batch worker: %s", exc)
                         src_task = futures[future]
-                        results.append({"status": "error", "path": src_task.get("path"), "error": str(exc)})
+                        res = {"status": "error", "path": src_task.get("path"), "error": str(exc)}
+                    results.append(res)
+                    if on_result:
+                        on_result(res)
 
                     completed += 1
                     if on_progress:
                         on_progress(completed, total, f"Processando {completed}/{total}")
         finally:
-            executor.shutdown(wait=False, cancel_futures=True)
+            # Work not started yet is dropped; the pool itself stays up.
+            for future in pending:
+                future.cancel()
 
         return {"results": results, "cancelled": False}
 
-    def save_all_images(self, target_dir, progress_callback=None, cancel_event=None):
-        source_dir = tempfile.mkdtemp()
+    def _run_cached_batch(self, tasks, on_progress=None, cancel_event=None, on_result=None):
+        """
+        _run_batch for the tasks whose output is not in the render cache;
+        the others get the cached file at their output_path right away (or
+        as result["data"] for return_bytes tasks). New outputs are added to
+        the cache. on_result sees cached results first, then the rendered
+        ones as they complete. Adds cache_hits and cache_misses to the batch
+        result.
+        """
+        cached_results = []
+        misses = []
+        for task in tasks:
+            result = self._cached_result(task)
+            if result is None:
+                misses.append(task)
+            else:
+                cached_results.append(result)
+        if cached_results:
+            logger.info("Reutilizando %s render(s) do cache; %s para processar", len(cached_results), len(misses))
+
+        total = len(tasks)
+        hits = len(cached_results)
+        if on_result:
+            for result in cached_results:
+                on_result(result)
+        if on_progress and hits:
+            on_progress(hits, total, f"Processando {hits}/{total}")
+
+        def progress(completed, _count, _message):
+            done = hits + completed
+            on_progress(done, total, f"Processando {done}/{total}")
+
+        keys = {task["path"]: task.get("cache_key") for task in misses}
+
+        def store(result):
+            key = keys.get(result.get("path"))
+            if result.get("status") == "success" and key:
+                if "data" in result:
+                    self._render_cache.store_bytes(key, result["data"])
+                elif "saved_to" in result:
+                    self._render_cache.store(key, result["saved_to"])
+            if on_result:
+                on_result(result)
+
+        batch = self._run_batch(
+            misses,
+            on_progress=progress if on_progress else None,
+            cancel_event=cancel_event,
+            on_result=store,
+        )
+        return {
+            **batch,
+            "results": cached_results + batch["results"],
+            "cache_hits": hits,
+            "cache_misses": len(misses),
+        }
+
+    def _cached_result(self, task):
+        key = task.get("cache_key")
+        if not key:
+            return None
+        if task.get("return_bytes"):
+            data = self._render_cache.read(key)
+            if data is None:
+                return None
+            filename = os.path.basename(task["output_path"])
+            return {"status": "success", "path": task["path"], "data": data, "filename": filename, "cached": True}
+        if not self._render_cache.fetch(key, task["output_path"]):
+            return None
+        return {"status": "success", "path": task["path"], "saved_to": task["output_path"], "cached": True}
+
+    def save_all_images(
+        self,
+        target_dir,
+        progress_callback=None,
+        cancel_event=None,
+        export_format=None,
+        export_preset=None,
+        export_max_kb=None,
+    ):
         tasks = []
-        is_anim = self._animation_type() != "Nenhuma"
-        ext = "_custom.gif" if is_anim else "_custom.png"
+        ext = "_custom" + self._output_extension(export_format)
 
-        try:
+        with SharedImages() as shared_images:
             for path in self._image_list():
                 out = os.path.join(target_dir, os.path.splitext(os.path.basename(path))[0] + ext)
-                data = self._get_task_data(path, out, source_dir=source_dir)
+                data = self._get_task_data(path, out, shared_images, export_format, export_preset, export_max_kb)
                 if data:
                     tasks.append(data)
 
-            batch = self._run_batch(tasks, on_progress=progress_callback, cancel_event=cancel_event)
+            batch = self._run_cached_batch(tasks, on_progress=progress_callback, cancel_event=cancel_event)
             errors = [r for r in batch["results"] if r.get("status") != "success"]
             return {
                 "cancelled": batch["cancelled"],
@@ -209,28 +364,61 @@ class BatchController:
                 "errors": len(errors),
                 "target_dir": target_dir,
                 "total": len(tasks),
+                "cache_hits": batch["cache_hits"],
+                "cache_misses": batch["cache_misses"],
             }
-        finally:
-            shutil.rmtree(source_dir, ignore_errors=True)
 
-    def save_zip(self, target_file, progress_callback=None, cancel_event=None):
-        is_anim = self._animation_type() != "Nenhuma"
-        ext = ".gif" if is_anim else ".png"
-
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            source_dir = os.path.join(tmp_dir, "_sources")
+    def save_zip(
+        self,
+        target_file,
+        progress_callback=None,
+        cancel_event=None,
+        export_format=None,
+        export_preset=None,
+        export_max_kb=None,
+    ):
+        """
+        Writes every image's export into target_file. Workers send the encoded
+        files back and a writer thread appends them as they arrive, in image
+        list order, so compression overlaps rendering and nothing touches a
+        temp dir. A cancelled export leaves no archive behind.
+        """
+        ext = self._output_extension(export_format)
+
+        with SharedImages() as shared_images:
             tasks = []
 
             for path in self._image_list():
                 fname = os.path.splitext(os.path.basename(path))[0] + f"_custom{ext}"
-                out = os.path.join(tmp_dir, fname)
-                data = self._get_task_data(path, out, source_dir=source_dir)
+                data = self._get_task_data(path, fname, shared_images, export_format, export_preset, export_max_kb)
                 if data:
+                    data["return_bytes"] = True
                     tasks.append(data)
 
-            batch = self._run_batch(tasks, on_progress=progress_callback, cancel_event=cancel_event)
+            order = {task["path"]: index for index, task in enumerate(tasks)}
+            writer = ZipStreamWriter(target_file).start()
+
+            def write(result):
+                index = order.get(result.get("path"))
+                if index is None:
+                    return
+                # Handed to the writer, so finished files are not all held in memory.
+                data = result.pop("data", None)
+                if result.get("status") == "success" and data is not None:
+                    writer.put(index, result["filename"], data)
+                else:
+                    writer.skip(index)
+
+            try:
+                batch = self._run_cached_batch(
+                    tasks, on_progress=progress_callback, cancel_event=cancel_event, on_result=write
+                )
+            except Exception:
+                writer.abort()
+                raise
             errors = [r for r in batch["results"] if r.get("status") != "success"]
             if batch["cancelled"]:
+                writer.abort()
                 return {
                     "cancelled": True,
                     "zip_path": target_file,
@@ -238,14 +426,11 @@ class BatchController:
                     "processed": len(batch["results"]),
                     "errors": len(errors),
                     "total": len(tasks),
+                    "cache_hits": batch["cache_hits"],
+                    "cache_misses": batch["cache_misses"],
                 }
 
-            written = 0
-            with zipfile.ZipFile(target_file, "w") as z:
-                for result in batch["results"]:
-                    if result.get("status") == "success" and "saved_to" in result:
-                        z.write(result["saved_to"], os.path.basename(result["saved_to"]))
-                        written += 1
+            written = writer.close()
             return {
                 "cancelled": False,
                 "zip_path": target_file,
@@ -253,52 +438,79 @@ class BatchController:
                 "processed": len(batch["results"]),
                 "errors": len(errors),
                 "total": len(tasks),
+                "cache_hits": batch["cache_hits"],
+                "cache_misses": batch["cache_misses"],
             }
 
-    def upload_to_imgchest(self, title, progress_callback=None, cancel_event=None):
-        is_anim = self._animation_type() != "Nenhuma"
-        ext = ".gif" if is_anim else ".png"
-
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            source_dir = os.path.join(tmp_dir, "_sources")
+    def upload_to_imgchest(
+        self,
+        title,
+        progress_callback=None,
+        cancel_event=None,
+        export_format=None,
+        export_preset=None,
+        export_max_kb=None,
+    ):
+        """
+        Renders every image and uploads the results to ImgChest as one album.
+        Posts go up as soon as their files are rendered (see UploadPipeline),
+        so uploading overlaps the rest of the render; links keep image list
+        order.
+        """
+        if not self.uploader:
+            raise ValueError("Uploader não configurado.")
+        ext = self._output_extension(export_format)
+
+        with tempfile.TemporaryDirectory() as tmp_dir, SharedImages() as shared_images:
             tasks = []
 
             for path in self._image_list():
                 fname = os.path.splitext(os.path.basename(path))[0] + f"_custom{ext}"
                 out = os.path.join(tmp_dir, fname)
-                data = self._get_task_data(path, out, source_dir=source_dir)
+                data = self._get_task_data(path, out, shared_images, export_format, export_preset, export_max_kb)
                 if data:
                     tasks.append(data)
 
-            batch = self._run_batch(tasks, on_progress=progress_callback, cancel_event=cancel_event)
+            order = {task["path"]: index for index, task in enumerate(tasks)}
+            pipeline = UploadPipeline(
+                self.uploader,
+                title,
+                len(tasks),
+                progress_callback=progress_callback,
+                cancel_event=cancel_event,
+            ).start()
+
+            def send(result):
+                index = order.get(result.get("path"))
+                if index is None:
+                    return
+                if result.get("status") == "success" and "saved_to" in result:
+                    pipeline.put(index, result["saved_to"], os.path.basename(result["saved_to"]))
+                else:
+                    pipeline.skip(index)
+
+            try:
+                batch = self._run_cached_batch(
+                    tasks, on_progress=pipeline.render_progress, cancel_event=cancel_event, on_result=send
+                )
+            except Exception:
+                pipeline.abort()
+                raise
             process_errors = [r for r in batch["results"] if r.get("status") != "success"]
             if batch["cancelled"]:
+                links, _errors = pipeline.abort()
                 return {
                     "cancelled": True,
-                    "links": [],
+                    "links": links,
                     "errors": ["Operação cancelada pelo usuário."],
                     "processed": len(batch["results"]),
-                    "uploaded": 0,
+                    "uploaded": pipeline.uploaded,
                     "total": len(tasks),
+                    "cache_hits": batch["cache_hits"],
+                    "cache_misses": batch["cache_misses"],
                 }
 
-            files = []
-            for result in batch["results"]:
-                if result.get("status") == "success" and "saved_to" in result:
-                    file_path = result["saved_to"]
-                    files.append({"path": file_path, "filename": os.path.basename(file_path)})
-
-            if progress_callback:
-                progress_callback(0, len(files), "Enviando...")
-
-            if not self.uploader:
-                raise ValueError("Uploader não configurado.")
-            links, errors = self.uploader.upload_images(
-                files,
-                title,
-                progress_callback=progress_callback,
-                cancel_event=cancel_event,
-            )
+            links, errors = pipeline.close()
             all_errors = [r.get("error") or r.get("path") or "Erro ao processar imagem." for r in process_errors]
             all_errors.extend(errors)
             return {
@@ -306,6 +518,8 @@ class BatchController:
                 "links": links,
                 "errors": all_errors,
                 "processed": len(batch["results"]),
-                "uploaded": len(files),
+                "uploaded": pipeline.uploaded,
                 "total": len(tasks),
+                "cache_hits": batch["cache_hits"],
+                "cache_misses": batch["cache_misses"],
             }
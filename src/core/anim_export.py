@@ -0,0 +1,155 @@
+import numpy as np
+from PIL import Image, PngImagePlugin
+
+from src.config.settings import ANIMATION_EXPORT_FORMATS, ENCODER_PRESETS
+from src.core.frame_runs import FrameRuns
+from src.core.gif_writer import save_delta_gif
+from src.core.palette import PALETTE_MAX_COLORS
+
+
+DEFAULT_ANIMATION_FORMAT = "gif"
+DEFAULT_ENCODER_PRESET = "equilibrado"
+
+ANIMATION_FORMAT_LABELS = {
+    "gif": "GIF",
+    "webp": "WebP",
+    "webp_lossless": "WebP sem perdas",
+    "apng": "APNG",
+}
+
+ANIMATION_FORMAT_EXTENSIONS = {
+    "gif": ".gif",
+    "webp": ".webp",
+    "webp_lossless": ".webp",
+    "apng": ".png",
+}
+
+ENCODER_PRESET_LABELS = {
+    "rapido": "Rápido",
+    "equilibrado": "Equilibrado",
+    "compacto": "Compacto",
+}
+
+# The border loops are short, so one keyframe per file: libwebp's default
+# of a keyframe every few frames costs more bytes than anything else.
+_WEBP_KEYFRAMES = {"kmin": 1000, "kmax": 1001}
+
+# Pillow save() options per format and preset. For WebP, method is the
+# encoder effort (0-6); in lossless mode quality is effort too, not fidelity.
+ENCODER_OPTIONS = {
+    "gif": {preset: {} for preset in ENCODER_PRESETS},
+    "webp": {
+        "rapido": {"lossless": False, "quality": 80, "method": 0, **_WEBP_KEYFRAMES},
+        "equilibrado": {"lossless": False, "quality": 80, "method": 4, **_WEBP_KEYFRAMES},
+        "compacto": {"lossless": False, "quality": 75, "method": 4, "allow_mixed": True, **_WEBP_KEYFRAMES},
+    },
+    "webp_lossless": {
+        "rapido": {"lossless": True, "quality": 0, "method": 0, **_WEBP_KEYFRAMES},
+        "equilibrado": {"lossless": True, "quality": 50, "method": 3, **_WEBP_KEYFRAMES},
+        "compacto": {"lossless": True, "quality": 90, "method": 5, **_WEBP_KEYFRAMES},
+    },
+    # Pillow's APNG writer encodes every frame with default zlib settings
+    # whatever compress_level says, so there is nothing for a preset to tune.
+    "apng": {preset: {} for preset in ENCODER_PRESETS},
+}
+
+_PILLOW_FORMATS = {"webp": "WEBP", "webp_lossless": "WEBP", "apng": "PNG"}
+
+
+def resolve_animation_format(value):
+    return value if value in ANIMATION_EXPORT_FORMATS else DEFAULT_ANIMATION_FORMAT
+
+
+def resolve_encoder_preset(value):
+    return value if value in ENCODER_PRESETS else DEFAULT_ENCODER_PRESET
+
+
+def animation_extension(export_format):
+    return ANIMATION_FORMAT_EXTENSIONS[resolve_animation_format(export_format)]
+
+
+def _apng_delta_images(frames):
+    """
+    PIL frames for APNG and the blend op to draw them with. When every frame
+    is opaque, the first is kept in full and each later pixel equal to the
+    previous frame's is made fully transparent; drawn with blend OVER and no
+    disposal, only what changed since the previous frame (mostly the border
+    ring) is stored. Otherwise every frame is kept whole and drawn with blend
+    SOURCE, since OVER would leave the previous frame showing wherever a
+    frame is transparent.
+    """
+    arrays = []
+    for frame in frames:
+        if not isinstance(frame, np.ndarray):
+            frame = np.asarray(frame if frame.mode == "RGBA" else frame.convert("RGBA"))
+        arrays.append(np.ascontiguousarray(frame))
+    if not all((frame[..., 3] == 255).all() for frame in arrays):
+        return [Image.fromarray(frame) for frame in arrays], PngImagePlugin.Blend.OP_SOURCE
+
+    images = []
+    previous = None
+    for frame in arrays:
+        words = frame.view(np.uint32)[..., 0]
+        if previous is None:
+            images.append(Image.fromarray(frame))
+        else:
+            delta = frame.copy()
+            delta.view(np.uint32)[..., 0][words == previous] = 0
+            images.append(Image.fromarray(delta))
+        previous = words
+    return images, PngImagePlugin.Blend.OP_OVER
+
+
+def save_animation(
+    frames,
+    output_path,
+    duration,
+    export_format=DEFAULT_ANIMATION_FORMAT,
+    preset=DEFAULT_ENCODER_PRESET,
+    palette_key=None,
+    colors=PALETTE_MAX_COLORS,
+    quality=None,
+):
+    """
+    Encodes frames (RGBA images or (H, W, 4) uint8 arrays, any iterable) as
+    an animated GIF, WebP or APNG with the preset's encoder options. GIF
+    streams through save_delta_gif; Pillow's WebP and APNG writers need
+    every frame up front, so the frames are gathered first. Either way,
+    repeated frames and loop repeats are merged first (see FrameRuns).
+    duration is ms per frame, or a sequence with one entry per frame.
+
+    colors caps the GIF palette and quality overrides the preset's lossy
+    WebP quality; the other formats ignore them. output_path may be a
+    binary file object.
+    """
+    export_format = resolve_animation_format(export_format)
+    preset = resolve_encoder_preset(preset)
+    if export_format == "gif":
+        save_delta_gif(frames, output_path, duration, palette_key=palette_key, colors=colors)
+        return
+
+    options = dict(ENCODER_OPTIONS[export_format][preset])
+    if quality is not None and export_format == "webp":
+        options["quality"] = quality
+    runs = FrameRuns(frames, duration)
+    if export_format == "apng":
+        images, blend = _apng_delta_images(runs)
+        options.update(blend=blend, disposal=PngImagePlugin.Disposal.OP_NONE)
+    else:
+        images = [Image.fromarray(frame) if isinstance(frame, np.ndarray) else frame for frame in runs]
+    for image in images[len(runs.durations):]:
+        image.close()
+    images = images[: len(runs.durations)]
+    try:
+        images[0].save(
+            output_path,
+            format=_PILLOW_FORMATS[export_format],
+            save_all=True,
+            append_images=images[1:],
+            loop=0,
+            duration=runs.durations,
+            **options,
+        )
+    finally:
+        for image in images:
+            image.close()
@@ -0,0 +1,160 @@
+import bisect
+
+import numpy as np
+
+from src.config.settings import BORDA_HEIGHT, BORDA_WIDTH, BORDER_THICKNESS
+from src.core import frame_engine
+from src.core.animation_processor import AnimationProcessor
+from src.core.image_loader import MIN_FRAME_DURATION_MS, iter_frames_at_scale
+from src.core.image_processor import ImageProcessor
+
+
+# Output frame boundaries snap to the GIF delay unit.
+TIMELINE_STEP_MS = 10
+
+# Source frames are cropped through Pillow's full LANCZOS resize unless the
+# resized image is this many times the border window or more. Both paths give
+# the same pixels; the numpy region resampler only pays off once per still
+# image, not once per frame.
+REGION_CROP_MIN_AREA_RATIO = 8
+
+
+def _snap(time_ms):
+    return int(round(time_ms / TIMELINE_STEP_MS)) * TIMELINE_STEP_MS
+
+
+def border_loop(total_ms, frame_count, frame_duration):
+    """
+    (loops, frames_per_loop) for a border effect over a source lasting
+    total_ms: a whole number of border loops close to the effect's own loop
+    length, each with as many frames as keep the effect's frame duration.
+    """
+    loops = max(1, round(total_ms / (frame_count * frame_duration)))
+    frames_per_loop = max(1, round(total_ms / loops / frame_duration))
+    return loops, frames_per_loop
+
+
+def export_timeline(source_durations, border_frames, loops=1):
+    """
+    Output frames for an animated source under a looping border, as a list
+    of (source_index, border_index, duration_ms). The border runs loops times
+    over the length of the source with border_frames frames per loop, and a
+    new output frame starts wherever the source or the border changes, so
+    both keep their own timing. Boundaries snap to TIMELINE_STEP_MS.
+
+    No output frame is shorter than MIN_FRAME_DURATION_MS, which browsers
+    would stretch to 100 ms: a border change that lands closer than that to
+    another boundary is merged into it, and each output frame shows the
+    border frame current at its middle.
+    """
+    total = sum(source_durations)
+    source_starts = [0]
+    for duration in source_durations[:-1]:
+        source_starts.append(source_starts[-1] + duration)
+    source_starts = [_snap(start) for start in source_starts]
+    steps = border_frames * loops
+    border_starts = [_snap(total * index / steps) for index in range(steps)]
+
+    # Source frames already last MIN_FRAME_DURATION_MS or more (see
+    # image_loader), so their boundaries are all kept.
+    boundaries = sorted(set(source_starts) | {_snap(total)})
+    for start in border_starts:
+        position = bisect.bisect_left(boundaries, start)
+        if position < len(boundaries) and boundaries[position] == start:
+            continue
+        before = boundaries[position - 1] if position > 0 else None
+        after = boundaries[position] if position < len(boundaries) else None
+        if before is not None and start - before < MIN_FRAME_DURATION_MS:
+            continue
+        if after is not None and after - start < MIN_FRAME_DURATION_MS:
+            continue
+        boundaries.insert(position, start)
+
+    timeline = []
+    for start, end in zip(boundaries, boundaries[1:]):
+        source_index = bisect.bisect_right(source_starts, start) - 1
+        border_index = (bisect.bisect_right(border_starts, (start + end) / 2) - 1) % border_frames
+        timeline.append((source_index, border_index, end - start))
+    return timeline
+
+
+def _crop_mode(size):
+    width, height = size
+    if width * height >= REGION_CROP_MIN_AREA_RATIO * BORDA_WIDTH * BORDA_HEIGHT:
+        return "auto"
+    return "full"
+
+
+def _source_windows(path, state, borda_pos, reducing_gap, content=False):
+    """
+    The border window of every source frame, one (image, duration_ms) at a
+    time; with content=True, what the animated borders show inside the ring
+    (see ImageProcessor.render_content_window), which may be None.
+    """
+    frames = iter_frames_at_scale(path, min_size=state["size"], reducing_gap=reducing_gap)
+    mode = _crop_mode(state["size"])
+    try:
+        for frame, duration in frames:
+            try:
+                if content:
+                    window = ImageProcessor.render_content_window(
+                        frame, state["pos"], state["size"], borda_pos, BORDER_THICKNESS, mode
+                    )
+                else:
+                    window = ImageProcessor.render_image_to_borda(frame, state["pos"], state["size"], borda_pos, mode)
+            finally:
+                frame.close()
+            yield window, duration
+    finally:
+        frames.close()
+
+
+def stream_bordered_frames(path, state, borda_pos, border_color, reducing_gap=1.0):
+    """Frames of an animated source with a static border, as (H, W, 4) arrays, one per source frame."""
+    for cropped, _duration in _source_windows(path, state, borda_pos, reducing_gap):
+        final = ImageProcessor.add_borda_to_image(cropped, border_color)
+        cropped.close()
+        frame = np.asarray(final)
+        final.close()
+        yield frame
+
+
+def stream_animated_frames(
+    path,
+    state,
+    borda_pos,
+    anim_type,
+    border_color,
+    timeline,
+    border_frames,
+    seed=None,
+    reducing_gap=1.0,
+):
+    """
+    Export frames for an animated source following timeline (see
+    export_timeline), as (H, W, 4) arrays. Source frames are decoded and
+    resampled into the interior as the timeline reaches them, so only the
+    current one is in memory; the border frames come from the shared cache.
+    """
+    backgrounds, offsets = AnimationProcessor.border_frames(
+        anim_type, (BORDA_WIDTH, BORDA_HEIGHT), border_color, border_frames, BORDER_THICKNESS, seed
+    )
+    sources = _source_windows(path, state, borda_pos, reducing_gap, content=True)
+    content = None
+    current = -1
+    try:
+        for source_index, border_index, _duration in timeline:
+            while current < source_index:
+                content_image, _source_duration = next(sources)
+                content = None
+                if content_image is not None:
+                    content = np.asarray(content_image)
+                    content_image.close()
+                current += 1
+
+            frame = backgrounds[border_index].copy()
+            if content is not None:
+                frame_engine.composite_content(frame[None], content, offsets[border_index])
+            yield frame
+    finally:
+        sources.close()
@@ -1,8 +1,18 @@
-import math
-import random
+import numpy as np
+from PIL import Image, ImageDraw
 
-import colorsys
-from PIL import Image, ImageColor, ImageDraw
+from src.core import frame_engine
+from src.core.frame_cache import shared_frame_cache
+
+
+ANIMATION_DURATIONS = {
+    "Rainbow": 50,
+    "Neon Pulsante": 50,
+    "Strobe (Pisca)": 100,
+    "Glitch": 50,
+    "Spin": 50,
+    "Flow": 60,
+}
 
 
 class AnimationProcessor:
@@ -16,8 +26,8 @@ class AnimationProcessor:
         return image
 
     @staticmethod
-    def generate_rainbow_frames(base_image, total_frames=30, border_width=10, overlay_only=False):
-        frames = []
+    def _prepare(base_image, border_width, overlay_only):
+        """Returns ((width, height), content) where content is the image resized to the interior."""
         if isinstance(base_image, tuple):
             width, height = base_image
         else:
@@ -28,228 +38,234 @@ class AnimationProcessor:
 
         inner_width = width - (border_width * 2)
         inner_height = height - (border_width * 2)
-
         content_image = None
-        if not overlay_only and inner_width > 0 and inner_height > 0:
+        if not overlay_only and not isinstance(base_image, tuple) and inner_width > 0 and inner_height > 0:
             content_image = base_image.resize((inner_width, inner_height), Image.LANCZOS)
-
-        for i in range(total_frames):
-            hue = i / total_frames
-            rgb = colorsys.hsv_to_rgb(hue, 1.0, 1.0)
-            r, g, b = [int(x * 255) for x in rgb]
-
-            frame = Image.new('RGBA', (width, height), (r, g, b, 255))
-
-            if overlay_only:
-                AnimationProcessor._clear_center(frame, border_width)
-            elif content_image:
-                frame.paste(content_image, (border_width, border_width), content_image)
-
-            frames.append(frame)
-
-        return frames, 50
+        return (width, height), content_image
 
     @staticmethod
-    def generate_neon_frames(base_image, color_hex, total_frames=30, border_width=10, overlay_only=False):
-        frames = []
-        if isinstance(base_image, tuple):
-            width, height = base_image
-        else:
-            width, height = base_image.size
-        if not overlay_only and hasattr(base_image, 'mode') and base_image.mode != 'RGBA':
-            base_image = base_image.convert('RGBA')
-
-        inner_width = width - (border_width * 2)
-        inner_height = height - (border_width * 2)
-        content_image = None
-        if not overlay_only and inner_width > 0 and inner_height > 0:
-            content_image = base_image.resize((inner_width, inner_height), Image.LANCZOS)
-
-        r, g, b = ImageColor.getrgb(color_hex)[:3]
-
-        for i in range(total_frames):
-            intensity = 0.5 + 0.5 * math.sin(2 * math.pi * i / total_frames)
-            nr = int(r * intensity)
-            ng = int(g * intensity)
-            nb = int(b * intensity)
-
-            frame = Image.new('RGBA', (width, height), (nr, ng, nb, 255))
-            if overlay_only:
-                AnimationProcessor._clear_center(frame, border_width)
-            elif content_image:
-                frame.paste(content_image, (border_width, border_width), content_image)
-            frames.append(frame)
-
-        return frames, 50
+    def _glitch_seed(size, total_frames, border_width, seed):
+        """seed as given, or one derived from the effect parameters so the default Glitch is stable too."""
+        if seed is not None:
+            return seed
+        return frame_engine.glitch_seed("Glitch", tuple(size), total_frames, border_width)
 
     @staticmethod
-    def generate_marching_ants_frames(base_image, color1="#FFFFFF", color2="#000000", total_frames=20, border_width=10, dash_length=20):
-        return []
+    def _content_offsets(anim_type, size, total_frames, border_width, seed):
+        """Where the content goes on each frame: fixed, except for the Glitch jitter."""
+        if anim_type != "Glitch":
+            return [(border_width, border_width)] * total_frames
+        _rects, _colors, offsets = frame_engine.glitch_schedule(size, total_frames, seed)
+        return [(border_width + int(dx), border_width + int(dy)) for dx, dy in offsets]
 
     @staticmethod
-    def generate_strobe_frames(base_image, total_frames=10, border_width=10, overlay_only=False):
-        frames = []
-        if isinstance(base_image, tuple):
-            width, height = base_image
+    def _render_backgrounds(anim_type, size, color_hex, total_frames, border_width, overlay_only, seed=None):
+        if anim_type == "Rainbow":
+            frames = frame_engine.solid_backgrounds(frame_engine.rainbow_colors(total_frames), size)
+        elif anim_type == "Neon Pulsante":
+            frames = frame_engine.solid_backgrounds(frame_engine.neon_colors(color_hex, total_frames), size)
+        elif anim_type == "Strobe (Pisca)":
+            frames = frame_engine.solid_backgrounds(frame_engine.strobe_colors(total_frames), size)
+        elif anim_type == "Glitch":
+            rects, colors, _offsets = frame_engine.glitch_schedule(size, total_frames, seed)
+            frames = frame_engine.glitch_backgrounds(size, rects, colors)
+        elif anim_type == "Spin":
+            where = frame_engine.background_mask(size, border_width, overlay_only)
+            frames = frame_engine.spin_backgrounds(color_hex, size, total_frames, where)
         else:
-            width, height = base_image.size
-        if not overlay_only and hasattr(base_image, 'mode') and base_image.mode != 'RGBA':
-            base_image = base_image.convert('RGBA')
-
-        inner_width = width - (border_width * 2)
-        inner_height = height - (border_width * 2)
-        content_image = None
-        if not overlay_only and inner_width > 0 and inner_height > 0:
-            content_image = base_image.resize((inner_width, inner_height), Image.LANCZOS)
-
-        colors = [
-            (255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255),
-            (255, 255, 0, 255), (0, 255, 255, 255), (255, 0, 255, 255),
-            (255, 255, 255, 255), (0, 0, 0, 255),
-        ]
-
-        for i in range(total_frames):
-            frame = Image.new('RGBA', (width, height), colors[i % len(colors)])
-            if overlay_only:
-                AnimationProcessor._clear_center(frame, border_width)
-            elif content_image:
-                frame.paste(content_image, (border_width, border_width), content_image)
-            frames.append(frame)
-
-        return frames, 100
+            frames = frame_engine.flow_backgrounds(color_hex, size, total_frames)
+        return frame_engine.finish_frames(frames, None, border_width, overlay_only)
 
     @staticmethod
-    def generate_glitch_frames(base_image, total_frames=20, border_width=10, overlay_only=False):
-        frames = []
-        if isinstance(base_image, tuple):
-            width, height = base_image
+    def render_frames_array(
+        anim_type,
+        base_image,
+        color_hex="#FFFFFF",
+        total_frames=30,
+        border_width=10,
+        overlay_only=False,
+        seed=None,
+    ):
+        """
+        Renders a whole animation as one (N, H, W, 4) uint8 array.
+        Returns (frames, duration_ms). The border frames come from the shared
+        frame cache, so overlay_only results are read-only and shared; with
+        content they are a fresh copy with the content pasted in. seed only
+        matters for Glitch (see _glitch_seed).
+        """
+        if anim_type not in ANIMATION_DURATIONS:
+            raise ValueError(f"Animação desconhecida: {anim_type}")
+        size, content_image = AnimationProcessor._prepare(base_image, border_width, overlay_only)
+        if anim_type == "Glitch":
+            seed = AnimationProcessor._glitch_seed(size, total_frames, border_width, seed)
         else:
-            width, height = base_image.size
-        if not overlay_only and hasattr(base_image, 'mode') and base_image.mode != 'RGBA':
-            base_image = base_image.convert('RGBA')
-
-        inner_width = width - (border_width * 2)
-        inner_height = height - (border_width * 2)
-        content_image = None
-        if not overlay_only and inner_width > 0 and inner_height > 0:
-            content_image = base_image.resize((inner_width, inner_height), Image.LANCZOS)
-
-        glitch_colors = [
-            (255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255),
-            (255, 255, 0, 255), (0, 255, 255, 255), (255, 0, 255, 255),
-        ]
+            seed = None
+        uses_color = anim_type in ("Neon Pulsante", "Spin", "Flow")
+        key = (
+            anim_type,
+            str(color_hex).lower() if uses_color else None,
+            tuple(size),
+            border_width,
+            total_frames,
+            overlay_only,
+            seed,
+        )
+        frames = shared_frame_cache().get_or_create(
+            key,
+            lambda: AnimationProcessor._render_backgrounds(
+                anim_type, size, color_hex, total_frames, border_width, overlay_only, seed
+            ),
+        )
+        duration = ANIMATION_DURATIONS[anim_type]
+        if overlay_only or content_image is None:
+            return frames, duration
+        try:
+            if anim_type != "Glitch":
+                return frame_engine.composite_content(frames.copy(), content_image, (border_width, border_width)), duration
+            frames = frames.copy()
+            offsets = AnimationProcessor._content_offsets(anim_type, size, total_frames, border_width, seed)
+            for index, offset in enumerate(offsets):
+                frame_engine.composite_content(frames[index : index + 1], content_image, offset)
+            return frames, duration
+        finally:
+            content_image.close()
 
-        for _ in range(total_frames):
-            bg = Image.new('RGBA', (width, height), (20, 20, 20, 255))
-            draw = ImageDraw.Draw(bg)
-            for _ in range(10):
-                x = random.randint(0, width)
-                y = random.randint(0, height)
-                w = random.randint(5, 50)
-                h = random.randint(2, 10)
-                draw.rectangle([x, y, x + w, y + h], fill=random.choice(glitch_colors))
-
-            if overlay_only:
-                AnimationProcessor._clear_center(bg, border_width)
-            elif content_image:
-                off_x = random.randint(-2, 2)
-                off_y = random.randint(-2, 2)
-                bg.paste(content_image, (border_width + off_x, border_width + off_y), content_image)
+    @staticmethod
+    def _render_frames(anim_type, base_image, color_hex, total_frames, border_width, overlay_only, seed=None):
+        frames, duration = AnimationProcessor.render_frames_array(
+            anim_type, base_image, color_hex, total_frames, border_width, overlay_only, seed
+        )
+        return frame_engine.to_images(frames), duration
 
-            frames.append(bg)
+    @staticmethod
+    def _stream_frames(anim_type, base_image, color_hex, total_frames, border_width, seed):
+        size, content_image = AnimationProcessor._prepare(base_image, border_width, False)
+        try:
+            yield from AnimationProcessor.stream_prepared_frames(
+                anim_type, size, content_image, color_hex, total_frames, border_width, seed
+            )
+        finally:
+            if content_image is not None:
+                content_image.close()
 
-        return frames, 50
+    @staticmethod
+    def prepare_content(base_image, border_width=10):
+        """
+        ((width, height), content) for stream_prepared_frames: the image
+        resized to the interior once, for callers that render it several times.
+        The caller closes content.
+        """
+        return AnimationProcessor._prepare(base_image, border_width, False)
 
     @staticmethod
-    def generate_spin_frames(base_image, color_hex, total_frames=30, border_width=10, overlay_only=False):
-        frames = []
-        if isinstance(base_image, tuple):
-            width, height = base_image
-        else:
-            width, height = base_image.size
-        if not overlay_only and hasattr(base_image, 'mode') and base_image.mode != 'RGBA':
-            base_image = base_image.convert('RGBA')
+    def border_frames(anim_type, size, color_hex="#FFFFFF", total_frames=30, border_width=10, seed=None):
+        """
+        (backgrounds, offsets) of an animation without content: the cached,
+        read-only (N, H, W, 4) border stack and the (x, y) at which each frame
+        takes the content, for callers that composite their own.
+        """
+        if anim_type not in ANIMATION_DURATIONS:
+            raise ValueError(f"Animação desconhecida: {anim_type}")
+        size = tuple(size)
+        if anim_type == "Glitch":
+            seed = AnimationProcessor._glitch_seed(size, total_frames, border_width, seed)
+        backgrounds, _duration = AnimationProcessor.render_frames_array(
+            anim_type, size, color_hex, total_frames, border_width, overlay_only=False, seed=seed
+        )
+        offsets = AnimationProcessor._content_offsets(anim_type, size, total_frames, border_width, seed)
+        return backgrounds, offsets
 
-        inner_width = width - (border_width * 2)
-        inner_height = height - (border_width * 2)
-        content_image = None
-        if not overlay_only and inner_width > 0 and inner_height > 0:
-            content_image = base_image.resize((inner_width, inner_height), Image.LANCZOS)
+    @staticmethod
+    def prepared_frame_renderer(
+        anim_type,
+        size,
+        content_image,
+        color_hex="#FFFFFF",
+        total_frames=30,
+        border_width=10,
+        seed=None,
+    ):
+        """
+        (frame_count, render) for content already at the interior size (see
+        prepare_content and ImageProcessor.render_content_window), where
+        render(index) returns that frame as a fresh (H, W, 4) uint8 array.
+        The border frames come from the shared frame cache and the content is
+        read once, so render may be called from several threads at a time.
+        """
+        backgrounds, offsets = AnimationProcessor.border_frames(
+            anim_type, size, color_hex, total_frames, border_width, seed
+        )
+        content = None
+        if content_image is not None:
+            content = np.asarray(content_image if content_image.mode == "RGBA" else content_image.convert("RGBA"))
+
+        def render(index):
+            frame = backgrounds[index].copy()
+            if content is not None:
+                frame_engine.composite_content(frame[None], content, offsets[index])
+            return frame
+
+        return len(backgrounds), render
 
-        diag = int(math.sqrt(width ** 2 + height ** 2))
-        disk_size = diag + 20
-        disk = Image.new("RGBA", (disk_size, disk_size), (0, 0, 0, 0))
-        draw = ImageDraw.Draw(disk)
+    @staticmethod
+    def stream_prepared_frames(
+        anim_type,
+        size,
+        content_image,
+        color_hex="#FFFFFF",
+        total_frames=30,
+        border_width=10,
+        seed=None,
+    ):
+        """
+        Generator behind stream_frames for content already resized by
+        prepare_content, so another frame count or color does not resize the
+        image again. content_image may be None for a border-only animation.
+        """
+        count, render = AnimationProcessor.prepared_frame_renderer(
+            anim_type, size, content_image, color_hex, total_frames, border_width, seed
+        )
+        for index in range(count):
+            yield render(index)
 
-        center_x = disk_size // 2
-        center_y = disk_size // 2
-        r, g, b = ImageColor.getrgb(color_hex)[:3]
+    @staticmethod
+    def stream_frames(anim_type, base_image, color_hex="#FFFFFF", total_frames=30, border_width=10, seed=None):
+        """
+        Export frames one (H, W, 4) uint8 array at a time, so a consumer that
+        encodes as it goes holds a single frame of the animation. Returns
+        (frames, duration_ms) where frames is a generator. The border frames
+        come from the shared frame cache; only the current frame is a copy.
+        seed picks the Glitch pattern and is ignored by the other effects.
+        """
+        if anim_type not in ANIMATION_DURATIONS:
+            raise ValueError(f"Animação desconhecida: {anim_type}")
+        frames = AnimationProcessor._stream_frames(anim_type, base_image, color_hex, total_frames, border_width, seed)
+        return frames, ANIMATION_DURATIONS[anim_type]
 
-        steps = 360
-        for i in range(steps):
-            factor = i / steps
-            nr = int(r * factor)
-            ng = int(g * factor)
-            nb = int(b * factor)
-            draw.pieslice([0, 0, disk_size, disk_size], i, i + 1, fill=(nr, ng, nb, 255))
+    @staticmethod
+    def generate_rainbow_frames(base_image, total_frames=30, border_width=10, overlay_only=False):
+        return AnimationProcessor._render_frames("Rainbow", base_image, None, total_frames, border_width, overlay_only)
 
-        for i in range(total_frames):
-            angle = (360 / total_frames) * i
-            rotated_disk = disk.rotate(-angle)
+    @staticmethod
+    def generate_neon_frames(base_image, color_hex, total_frames=30, border_width=10, overlay_only=False):
+        return AnimationProcessor._render_frames("Neon Pulsante", base_image, color_hex, total_frames, border_width, overlay_only)
 
-            left = (disk_size - width) // 2
-            top = (disk_size - height) // 2
-            bg = rotated_disk.crop((left, top, left + width, top + height))
+    @staticmethod
+    def generate_marching_ants_frames(base_image, color1="#FFFFFF", color2="#000000", total_frames=20, border_width=10, dash_length=20):
+        return []
 
-            if overlay_only:
-                AnimationProcessor._clear_center(bg, border_width)
-            elif content_image:
-                bg.paste(content_image, (border_width, border_width), content_image)
+    @staticmethod
+    def generate_strobe_frames(base_image, total_frames=10, border_width=10, overlay_only=False):
+        return AnimationProcessor._render_frames("Strobe (Pisca)", base_image, None, total_frames, border_width, overlay_only)
 
-            frames.append(bg)
+    @staticmethod
+    def generate_glitch_frames(base_image, total_frames=20, border_width=10, overlay_only=False, seed=None):
+        return AnimationProcessor._render_frames("Glitch", base_image, None, total_frames, border_width, overlay_only, seed)
 
-        return frames, 50
+    @staticmethod
+    def generate_spin_frames(base_image, color_hex, total_frames=30, border_width=10, overlay_only=False):
+        return AnimationProcessor._render_frames("Spin", base_image, color_hex, total_frames, border_width, overlay_only)
 
     @staticmethod
     def generate_flow_frames(base_image, color_hex, total_frames=30, border_width=10, overlay_only=False):
-        frames = []
-        if isinstance(base_image, tuple):
-            width, height = base_image
-        else:
-            width, height = base_image.size
-        if not overlay_only and hasattr(base_image, 'mode') and base_image.mode != 'RGBA':
-            base_image = base_image.convert('RGBA')
-
-        inner_width = width - (border_width * 2)
-        inner_height = height - (border_width * 2)
-        content_image = None
-        if not overlay_only and inner_width > 0 and inner_height > 0:
-            content_image = base_image.resize((inner_width, inner_height), Image.LANCZOS)
-
-        grad_height = height * 2
-        gradient = Image.new("RGBA", (width, grad_height), (0, 0, 0, 255))
-        draw = ImageDraw.Draw(gradient)
-
-        r, g, b = ImageColor.getrgb(color_hex)[:3]
-
-        steps = 20
-        step_h = grad_height / steps
-        for i in range(steps):
-            val = 0.5 + 0.5 * math.sin(2 * math.pi * i / steps)
-            nr = int(r * val)
-            ng = int(g * val)
-            nb = int(b * val)
-            draw.rectangle([0, i * step_h, width, (i + 1) * step_h], fill=(nr, ng, nb, 255))
-
-        for i in range(total_frames):
-            offset = int((grad_height / 2) * (i / total_frames))
-            bg = gradient.crop((0, offset, width, offset + height))
-
-            if overlay_only:
-                AnimationProcessor._clear_center(bg, border_width)
-            elif content_image:
-                bg.paste(content_image, (border_width, border_width), content_image)
-
-            frames.append(bg)
-
-        return frames, 60
+        return AnimationProcessor._render_frames("Flow", base_image, color_hex, total_frames, border_width, overlay_only)
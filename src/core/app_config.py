@@ -4,6 +4,7 @@ import os
 from copy import deepcopy
 
 from src.config.settings import (
+    ANIMATION_EXPORT_FORMATS,
     CONFIG_FILE,
     DANBOORU_POOL_CONNECTIONS_DEFAULT,
     DANBOORU_POOL_MAXSIZE_DEFAULT,
@@ -12,6 +13,9 @@ from src.config.settings import (
     DANBOORU_TIMEOUT_DOWNLOAD_S_DEFAULT,
     DANBOORU_TIMEOUT_SEARCH_S_DEFAULT,
     DANBOORU_TIMEOUT_TAGS_S_DEFAULT,
+    ENCODER_PRESETS,
+    EXPORT_MAX_KB_LIMIT,
+    FACE_DETECTION_WORKING_SIZE,
     IMAGE_CACHE_MAX_MB_DEFAULT,
     THUMBNAIL_BATCH_INTERVAL_MS_DEFAULT,
     THUMBNAIL_BATCH_SIZE_DEFAULT,
@@ -56,6 +60,11 @@ DEFAULT_CONFIG = {
     "thumbnail_memory_cache_mb": THUMBNAIL_MEMORY_CACHE_MB_DEFAULT,
     "thumbnail_disk_cache_mb": THUMBNAIL_DISK_CACHE_MB_DEFAULT,
     "image_cache_max_mb": IMAGE_CACHE_MAX_MB_DEFAULT,
+    "face_detection_working_size": FACE_DETECTION_WORKING_SIZE,
+    "export_format": "gif",
+    "export_preset": "equilibrado",
+    "export_max_kb": 0,
+    "exact_render": False,
 }
 
 
@@ -85,6 +94,16 @@ def _coerce_float(value, default, minimum=None, maximum=None):
     return coerced
 
 
+def _coerce_bool(value, default):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in {"true", "false", "1", "0"}:
+        return value.strip().lower() in {"true", "1"}
+    return default
+
+
 class AppConfig:
     def __init__(self):
         self.config_data = deepcopy(DEFAULT_CONFIG)
@@ -206,6 +225,26 @@ class AppConfig:
             minimum=32,
             maximum=8192,
         )
+        migrated["face_detection_working_size"] = _coerce_int(
+            migrated.get("face_detection_working_size"),
+            DEFAULT_CONFIG["face_detection_working_size"],
+            minimum=200,
+            maximum=8192,
+        )
+
+        if migrated.get("export_format") not in ANIMATION_EXPORT_FORMATS:
+            migrated["export_format"] = DEFAULT_CONFIG["export_format"]
+
+        if migrated.get("export_preset") not in ENCODER_PRESETS:
+            migrated["export_preset"] = DEFAULT_CONFIG["export_preset"]
+
+        migrated["export_max_kb"] = _coerce_int(
+            migrated.get("export_max_kb"),
+            DEFAULT_CONFIG["export_max_kb"],
+            minimum=0,
+            maximum=EXPORT_MAX_KB_LIMIT,
+        )
+        migrated["exact_render"] = _coerce_bool(migrated.get("exact_render"), DEFAULT_CONFIG["exact_render"])
 
         return migrated
 
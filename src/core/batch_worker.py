@@ -1,13 +1,43 @@
+import io
 import os
 
 from PIL import Image
 
 from src.config.settings import BORDER_THICKNESS, BORDA_HEIGHT, BORDA_WIDTH
-from src.core.animation_processor import AnimationProcessor
+from src.core import frame_engine
+from src.core.animated_source import border_loop, export_timeline, stream_animated_frames, stream_bordered_frames
+from src.core.animation_processor import ANIMATION_DURATIONS, AnimationProcessor
+from src.core.anim_export import DEFAULT_ANIMATION_FORMAT, DEFAULT_ENCODER_PRESET, save_animation
+from src.core.image_loader import animation_durations, open_image_at_scale
 from src.core.image_processor import ImageProcessor
+from src.core.parallel import ordered_thread_map
+from src.core.shared_images import open_shared_image
+from src.core.size_tuner import save_within_budget
+
+
+# Keep at least twice the render size after draft/reduce so LANCZOS still has
+# real pixels to work with. The result is not bit-identical to resampling
+# the full-resolution source: on photos it stays within a few levels per
+# channel (tests/test_batch_worker.py pins the bound). Tasks with
+# "exact_source" decode the full image and match it exactly; the controller
+# sets it from the "exact_render" preference (custommaker_config.json).
+RENDER_REDUCING_GAP = 2.0
+
+# Frames per loop of each animation in exported files.
+EXPORT_FRAME_COUNTS = {
+    "Rainbow": 40,
+    "Neon Pulsante": 40,
+    "Strobe (Pisca)": 10,
+    "Glitch": 20,
+    "Spin": 30,
+    "Flow": 30,
+}
 
 
 def process_image_task(task_data):
+    if task_data.get("return_bytes"):
+        return _process_to_bytes(task_data)
+
     path = task_data["path"]
     source_path = task_data.get("source_path") or path
     state = task_data["state"]
@@ -15,98 +45,227 @@ def process_image_task(task_data):
     anim_type = task_data["anim_type"]
     border_color = task_data["border_color"]
     output_path = task_data.get("output_path")
+    export_format = task_data.get("export_format", DEFAULT_ANIMATION_FORMAT)
+    export_preset = task_data.get("export_preset", DEFAULT_ENCODER_PRESET)
+    max_bytes = task_data.get("max_bytes")
+    # The Glitch pattern follows the image, so re-exporting it gives the same file.
+    seed = task_data.get("seed")
+    if seed is None:
+        seed = frame_engine.glitch_seed(path)
+    frame_threads = task_data.get("frame_threads", 1)
+    reducing_gap = None if task_data.get("exact_source") else RENDER_REDUCING_GAP
 
     try:
-        with Image.open(source_path) as source:
-            orig = source.convert("RGBA")
+        source_image = task_data.get("source_image")
+        if source_image is not None:
+            # Edited in the app and handed over in shared memory; no file to key the palette on.
+            orig = open_shared_image(source_image, min_size=state["size"], reducing_gap=reducing_gap)
+            palette_key = None
+        else:
+            source_durations = animation_durations(source_path)
+            if source_durations:
+                return _process_animated_source(
+                    source_path,
+                    source_durations,
+                    state,
+                    borda_pos,
+                    anim_type,
+                    border_color,
+                    output_path,
+                    path,
+                    _palette_key(source_path, state, borda_pos),
+                    export_format,
+                    export_preset,
+                    seed,
+                    reducing_gap,
+                )
+            orig = open_image_at_scale(source_path, min_size=state["size"], reducing_gap=reducing_gap)
+            palette_key = _palette_key(source_path, state, borda_pos)
 
         try:
-            cropped = ImageProcessor.render_image_to_borda(orig, state["pos"], state["size"], borda_pos)
+            if anim_type == "Nenhuma":
+                cropped = ImageProcessor.render_image_to_borda(orig, state["pos"], state["size"], borda_pos)
+            else:
+                # Resampled once, straight into the interior the effects draw around.
+                content = ImageProcessor.render_content_window(
+                    orig, state["pos"], state["size"], borda_pos, BORDER_THICKNESS
+                )
         finally:
             orig.close()
 
+        if anim_type == "Nenhuma":
+            try:
+                return _process_static(cropped, border_color, output_path, path)
+            finally:
+                cropped.close()
+
         try:
-            return _process_cropped(cropped, anim_type, border_color, output_path, path)
+            return _process_content(
+                content,
+                anim_type,
+                border_color,
+                output_path,
+                path,
+                palette_key,
+                export_format=export_format,
+                export_preset=export_preset,
+                max_bytes=max_bytes,
+                seed=seed,
+                frame_threads=frame_threads,
+            )
         finally:
-            cropped.close()
+            if content is not None:
+                content.close()
 
     except Exception as exc:
         return {"status": "error", "path": path, "error": str(exc)}
 
 
-def _process_cropped(cropped, anim_type, border_color, output_path, path):
+def _process_to_bytes(task_data):
+    """
+    process_image_task with the encoded file sent back as result["data"]
+    (named result["filename"], the base name of output_path) instead of
+    being written to disk.
+    """
+    buffer = io.BytesIO()
+    result = process_image_task({**task_data, "return_bytes": False, "output_path": buffer})
+    if result.get("status") == "success":
+        result.pop("saved_to", None)
+        result["data"] = buffer.getvalue()
+        result["filename"] = os.path.basename(task_data["output_path"])
+    return result
+
+
+def _palette_key(source_path, state, borda_pos):
+    # Same source file and framing means the same content, whatever the effect.
+    return (
+        source_path,
+        os.path.getmtime(source_path),
+        tuple(state["pos"]),
+        tuple(state["size"]),
+        tuple(borda_pos),
+    )
+
+
+def _process_animated_source(
+    source_path,
+    source_durations,
+    state,
+    borda_pos,
+    anim_type,
+    border_color,
+    output_path,
+    path,
+    palette_key,
+    export_format,
+    export_preset,
+    seed,
+    reducing_gap=RENDER_REDUCING_GAP,
+):
+    """
+    Animated GIF/WebP/APNG sources: every source frame is cropped like a
+    still image and streamed to the encoder with the border effect, which is
+    refitted to run a whole number of loops over the source's length.
+    """
     if anim_type == "Nenhuma":
-        final = ImageProcessor.add_borda_to_image(cropped, border_color)
-        if output_path:
-            final.save(output_path)
-            final.close()
-            return {"status": "success", "path": path, "saved_to": output_path}
-        return {"status": "success", "image": final, "path": path, "type": "static"}
+        frames = stream_bordered_frames(source_path, state, borda_pos, border_color, reducing_gap)
+        durations = source_durations
+        # Still borders export as .png, which stays animated as APNG.
+        export_format = "apng"
+    else:
+        anim_type = _export_anim_type(anim_type)
+        loops, border_frames = border_loop(
+            sum(source_durations), EXPORT_FRAME_COUNTS[anim_type], ANIMATION_DURATIONS[anim_type]
+        )
+        timeline = export_timeline(source_durations, border_frames, loops)
+        frames = stream_animated_frames(
+            source_path, state, borda_pos, anim_type, border_color, timeline, border_frames, seed, reducing_gap
+        )
+        durations = [duration for _source, _border, duration in timeline]
 
-    frames, duration = _generate_frames(cropped, anim_type, border_color)
     try:
-        final_frames = _resize_frames(frames)
-        try:
-            if output_path:
-                _save_frames(final_frames, output_path, duration)
-                return {"status": "success", "path": path, "saved_to": output_path}
-            return {"status": "success", "frames": final_frames, "duration": duration, "path": path, "type": "anim"}
-        finally:
-            if output_path:
-                for f in final_frames:
-                    f.close()
+        if output_path:
+            save_animation(frames, output_path, durations, export_format, export_preset, palette_key)
+            return {"status": "success", "path": path, "saved_to": output_path, "source_frames": len(source_durations)}
+        images = [Image.fromarray(frame) for frame in frames]
+        return {
+            "status": "success",
+            "frames": images,
+            "duration": durations[0],
+            "durations": durations,
+            "path": path,
+            "type": "anim",
+        }
     finally:
-        for f in frames:
-            f.close()
-
-
-def _generate_frames(cropped, anim_type, border_color):
-    dispatch = {
-        "Rainbow": lambda: AnimationProcessor.generate_rainbow_frames(cropped, total_frames=40, border_width=BORDER_THICKNESS),
-        "Neon Pulsante": lambda: AnimationProcessor.generate_neon_frames(cropped, border_color, total_frames=40, border_width=BORDER_THICKNESS),
-        "Strobe (Pisca)": lambda: AnimationProcessor.generate_strobe_frames(cropped, total_frames=10, border_width=BORDER_THICKNESS),
-        "Glitch": lambda: AnimationProcessor.generate_glitch_frames(cropped, total_frames=20, border_width=BORDER_THICKNESS),
-        "Spin": lambda: AnimationProcessor.generate_spin_frames(cropped, border_color, total_frames=30, border_width=BORDER_THICKNESS),
-        "Flow": lambda: AnimationProcessor.generate_flow_frames(cropped, border_color, total_frames=30, border_width=BORDER_THICKNESS),
-    }
-    fn = dispatch.get(anim_type) or dispatch["Rainbow"]
-    return fn()
-
-
-def _resize_frames(frames):
-    result = []
-    for f in frames:
-        if f.size != (BORDA_WIDTH, BORDA_HEIGHT):
-            resized = f.resize((BORDA_WIDTH, BORDA_HEIGHT), Image.LANCZOS)
-            result.append(resized)
-        else:
-            result.append(f)
-    return result
+        frames.close()
 
 
-def _save_frames(final_frames, output_path, duration):
-    if str(output_path).lower().endswith(".gif"):
-        gif_frames = [frame.convert("P", palette=Image.ADAPTIVE) for frame in final_frames]
-        try:
-            gif_frames[0].save(
-                output_path,
-                format="GIF",
-                save_all=True,
-                append_images=gif_frames[1:],
-                loop=0,
-                duration=duration,
-                disposal=2,
-            )
-        finally:
-            for f in gif_frames:
-                f.close()
-    else:
-        final_frames[0].save(
+def _process_static(cropped, border_color, output_path, path):
+    final = ImageProcessor.add_borda_to_image(cropped, border_color)
+    if output_path:
+        final.save(output_path, format="PNG")
+        final.close()
+        return {"status": "success", "path": path, "saved_to": output_path}
+    return {"status": "success", "image": final, "path": path, "type": "static"}
+
+
+def _process_content(
+    content,
+    anim_type,
+    border_color,
+    output_path,
+    path,
+    palette_key=None,
+    export_format=DEFAULT_ANIMATION_FORMAT,
+    export_preset=DEFAULT_ENCODER_PRESET,
+    max_bytes=None,
+    seed=None,
+    frame_threads=1,
+):
+    """content is the interior image from ImageProcessor.render_content_window; frames are made at the border size."""
+    anim_type = _export_anim_type(anim_type)
+
+    def render(total_frames):
+        return _export_frames(anim_type, content, border_color, total_frames, seed, frame_threads)
+
+    if max_bytes and output_path:
+        # The content is resampled once and reused by every trial.
+        tuning = save_within_budget(
+            render,
+            EXPORT_FRAME_COUNTS[anim_type],
+            ANIMATION_DURATIONS[anim_type],
             output_path,
-            save_all=True,
-            append_images=final_frames[1:],
-            loop=0,
-            duration=duration,
-            optimize=True,
-            quality=90,
+            max_bytes,
+            export_format,
+            export_preset,
+            palette_key,
         )
+        return {"status": "success", "path": path, "saved_to": output_path, "tuning": tuning}
+
+    # Frames flow effect -> encoder one at a time.
+    final_frames = render(EXPORT_FRAME_COUNTS[anim_type])
+    duration = ANIMATION_DURATIONS[anim_type]
+    try:
+        if output_path:
+            save_animation(final_frames, output_path, duration, export_format, export_preset, palette_key)
+            return {"status": "success", "path": path, "saved_to": output_path}
+        images = [Image.fromarray(frame) for frame in final_frames]
+        return {"status": "success", "frames": images, "duration": duration, "path": path, "type": "anim"}
+    finally:
+        final_frames.close()
+
+
+def _export_anim_type(anim_type):
+    return anim_type if anim_type in EXPORT_FRAME_COUNTS else "Rainbow"
+
+
+def _export_frames(anim_type, content, border_color, total_frames, seed=None, threads=1):
+    """
+    Final export frames in order, as a generator. With threads > 1 frames are
+    composited on a thread pool (numpy releases the GIL) a few frames ahead
+    of the encoder consuming them.
+    """
+    count, render = AnimationProcessor.prepared_frame_renderer(
+        anim_type, (BORDA_WIDTH, BORDA_HEIGHT), content, border_color, total_frames, BORDER_THICKNESS, seed
+    )
+    return ordered_thread_map(render, range(count), threads)
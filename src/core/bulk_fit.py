@@ -0,0 +1,126 @@
+import concurrent.futures
+import logging
+import os
+
+from src.config.settings import FACE_CASCADE_FILE, FACE_DETECTION_WORKING_SIZE
+from src.core.face_index import FaceRecord
+from src.core.image_loader import open_image_at_scale
+from src.core.image_probe import probe_image
+from src.core.image_processor import ImageProcessor
+
+
+logger = logging.getLogger(__name__)
+
+
+# Per-process state set up by init_fit_worker.
+_worker_cascade = None
+_worker_cascade_loaded = False
+
+
+def init_fit_worker(cascade_path=FACE_CASCADE_FILE):
+    """Pool initializer: loads the cascade once per worker process."""
+    global _worker_cascade, _worker_cascade_loaded
+    _worker_cascade = ImageProcessor.load_face_cascade(cascade_path)
+    _worker_cascade_loaded = True
+
+
+def _get_worker_cascade():
+    if not _worker_cascade_loaded:
+        init_fit_worker()
+    return _worker_cascade
+
+
+def resolve_fit_workers(configured=None, task_count=None):
+    """All cores but one for the UI, or the configured max_workers."""
+    cpu_count = os.cpu_count() or 1
+    workers = max(1, cpu_count - 1)
+    if configured is not None:
+        try:
+            workers = max(1, min(int(configured), cpu_count))
+        except (TypeError, ValueError):
+            pass
+    if task_count is not None:
+        workers = max(1, min(workers, task_count))
+    return workers
+
+
+def fit_image_task(task_data, face_cascade=None):
+    """
+    Decodes, detects and computes the intelligent fit for one image.
+
+    task_data holds "path", "borda_pos", "working_size" and optionally
+    "image", an edited PIL image used instead of the file. "record" in the
+    result is in full-resolution source pixels, or in the edited image's
+    pixels when one was given. "fit" falls back to auto fit when no face is
+    found.
+    """
+    path = task_data["path"]
+    borda_pos = task_data["borda_pos"]
+    working_size = task_data.get("working_size", FACE_DETECTION_WORKING_SIZE)
+    image = task_data.get("image")
+    cascade = face_cascade if face_cascade is not None else _get_worker_cascade()
+
+    try:
+        if image is None:
+            reference = probe_image(path)
+            working = open_image_at_scale(path, min_side=working_size)
+            try:
+                best, candidates = ImageProcessor.detect_anime_faces(
+                    working, cascade, working_size, source_size=reference.size
+                )
+                detected = FaceRecord(source_size=working.size, best=best, candidates=candidates)
+            finally:
+                working.close()
+            record = detected.scaled_to(reference.size)
+        else:
+            reference = image
+            best, candidates = ImageProcessor.detect_anime_faces(image, cascade, working_size)
+            record = FaceRecord(source_size=image.size, best=best, candidates=candidates)
+        face = record.best
+
+        fit = None
+        if face:
+            fit = ImageProcessor.calculate_intelligent_frame_pos(reference, face, borda_pos)
+        if not fit:
+            fit = ImageProcessor.calculate_auto_fit_pos(reference, borda_pos)
+        return {"status": "success", "path": path, "record": record, "face": face, "fit": fit}
+    except Exception as exc:
+        return {"status": "error", "path": path, "error": str(exc)}
+
+
+def iter_fit_results(tasks, max_workers=None, cancel_event=None, cascade_path=FACE_CASCADE_FILE):
+    """
+    Runs fit_image_task over tasks on a process pool and yields each result
+    as soon as it completes, in completion order. Stops early (pending work
+    is cancelled) once cancel_event is set.
+    """
+    tasks = list(tasks)
+    if not tasks:
+        return
+
+    workers = resolve_fit_workers(max_workers, len(tasks))
+    logger.info("Ajuste inteligente em lote com %s imagem(ns), workers=%s", len(tasks), workers)
+    executor = concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_fit_worker,
+        initargs=(cascade_path,),
+    )
+    try:
+        futures = {executor.submit(fit_image_task, task): task for task in tasks}
+        pending = set(futures)
+        while pending:
+            if cancel_event and cancel_event.is_set():
+                return
+            done, pending = concurrent.futures.wait(
+                pending,
+                timeout=0.2,
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                try:
+                    yield future.result()
+                except Exception as exc:
+                    logger.exception("Erro no worker de ajuste: %s", exc)
+                    yield {"status": "error", "path": futures[future].get("path"), "error": str(exc)}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
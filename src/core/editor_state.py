@@ -2,6 +2,7 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
 
 from src.core.app_config import DEFAULT_CONFIG
+from src.core.face_index import FaceRecord
 
 
 ImagePlacement = Dict[str, Tuple[int, int]]
@@ -19,6 +20,8 @@ class EditorState:
     animation_type: str = "Nenhuma"
     uploaded_links: List[str] = field(default_factory=list)
     borda_pos: Tuple[int, int] = (0, 0)
+    # Face rects of edited images, in the edited pixels' coordinates.
+    face_geometry: Dict[str, FaceRecord] = field(default_factory=dict)
 
     @property
     def current_image_path(self) -> Optional[str]:
@@ -52,6 +55,7 @@ class EditorState:
         self.image_states.pop(path, None)
         self.individual_bordas.pop(path, None)
         self.custom_borda_hex_individual.pop(path, None)
+        self.face_geometry.pop(path, None)
         self.uploaded_links = [link for link in self.uploaded_links if path not in link]
         if path in self.image_list:
             index = self.image_list.index(path)
@@ -70,6 +74,7 @@ class EditorState:
         self.image_states.clear()
         self.individual_bordas.clear()
         self.custom_borda_hex_individual.clear()
+        self.face_geometry.clear()
         self.uploaded_links.clear()
 
 
@@ -84,6 +89,9 @@ class UiPreferences:
     thumbnail_batch_interval_ms: int = DEFAULT_CONFIG["thumbnail_batch_interval_ms"]
     thumbnail_memory_cache_mb: int = DEFAULT_CONFIG["thumbnail_memory_cache_mb"]
     thumbnail_disk_cache_mb: int = DEFAULT_CONFIG["thumbnail_disk_cache_mb"]
+    export_format: str = DEFAULT_CONFIG["export_format"]
+    export_preset: str = DEFAULT_CONFIG["export_preset"]
+    export_max_kb: int = DEFAULT_CONFIG["export_max_kb"]
 
     @classmethod
     def from_app_config(cls, app_config):
@@ -106,6 +114,9 @@ class UiPreferences:
                 "thumbnail_disk_cache_mb",
                 DEFAULT_CONFIG["thumbnail_disk_cache_mb"],
             ),
+            export_format=app_config.get("export_format", DEFAULT_CONFIG["export_format"]),
+            export_preset=app_config.get("export_preset", DEFAULT_CONFIG["export_preset"]),
+            export_max_kb=app_config.get("export_max_kb", DEFAULT_CONFIG["export_max_kb"]),
         )
 
     def save_to_app_config(self, app_config) -> None:
@@ -118,3 +129,6 @@ class UiPreferences:
         app_config.set("thumbnail_batch_interval_ms", self.thumbnail_batch_interval_ms)
         app_config.set("thumbnail_memory_cache_mb", self.thumbnail_memory_cache_mb)
         app_config.set("thumbnail_disk_cache_mb", self.thumbnail_disk_cache_mb)
+        app_config.set("export_format", self.export_format)
+        app_config.set("export_preset", self.export_preset)
+        app_config.set("export_max_kb", self.export_max_kb)
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from src.config.settings import FACE_CASCADE_FILE, FACE_DETECTION_WORKING_SIZE, FACE_INDEX_FILE
+
+
+logger = logging.getLogger(__name__)
+
+
+# Bump when detect_anime_faces changes in a way that invalidates stored results.
+FACE_DETECTOR_VERSION = 2
+# Stay below SQLite's default bound-parameter limit.
+_LOOKUP_CHUNK = 500
+
+FaceRect = Tuple[int, int, int, int]
+
+
+@dataclass(frozen=True)
+class FaceRecord:
+    """Detection result for one file, in full-resolution source pixels."""
+
+    source_size: Tuple[int, int]
+    best: Optional[FaceRect]
+    candidates: List[FaceRect] = field(default_factory=list)
+
+    def scaled_to(self, size) -> "FaceRecord":
+        """Maps the rects onto a resized copy of the same image."""
+        sx = size[0] / self.source_size[0]
+        sy = size[1] / self.source_size[1]
+
+        def scale(rect):
+            x, y, w, h = rect
+            return (int(round(x * sx)), int(round(y * sy)), int(round(w * sx)), int(round(h * sy)))
+
+        return FaceRecord(
+            source_size=tuple(size),
+            best=scale(self.best) if self.best else None,
+            candidates=[scale(rect) for rect in self.candidates],
+        )
+
+    def transposed(self, method) -> "FaceRecord":
+        """Maps the rects through the same Image.transpose(method) applied to the pixels."""
+        method = Image.Transpose(method)
+        width, height = self.source_size
+        swaps_axes = method in (
+            Image.Transpose.ROTATE_90,
+            Image.Transpose.ROTATE_270,
+            Image.Transpose.TRANSPOSE,
+            Image.Transpose.TRANSVERSE,
+        )
+
+        def transform(rect):
+            x, y, w, h = rect
+            if method == Image.Transpose.FLIP_LEFT_RIGHT:
+                return (width - x - w, y, w, h)
+            if method == Image.Transpose.FLIP_TOP_BOTTOM:
+                return (x, height - y - h, w, h)
+            if method == Image.Transpose.ROTATE_180:
+                return (width - x - w, height - y - h, w, h)
+            if method == Image.Transpose.ROTATE_90:
+                return (y, width - x - w, h, w)
+            if method == Image.Transpose.ROTATE_270:
+                return (height - y - h, x, h, w)
+            if method == Image.Transpose.TRANSPOSE:
+                return (y, x, h, w)
+            return (height - y - h, width - x - w, h, w)
+
+        return FaceRecord(
+            source_size=(height, width) if swaps_axes else (width, height),
+            best=transform(self.best) if self.best else None,
+            candidates=[transform(rect) for rect in self.candidates],
+        )
+
+
+def _file_hash(path) -> str:
+    digest = hashlib.sha1()
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 16), b""):
+                digest.update(chunk)
+    except OSError:
+        return "missing"
+    return digest.hexdigest()
+
+
+def _file_key(path) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class FaceIndex:
+    """
+    On-disk index of detect_anime_faces results keyed by path + size + mtime
+    and by a detector key (cascade file hash, working size, refine flag,
+    detector version). A changed file or detector simply misses.
+    """
+
+    def __init__(self, db_path=FACE_INDEX_FILE, cascade_path=FACE_CASCADE_FILE, working_size=FACE_DETECTION_WORKING_SIZE, refine=False):
+        self.db_path = db_path
+        self.working_size = working_size
+        self.refine = refine
+        self.detector_key = (
+            f"v{FACE_DETECTOR_VERSION}:{_file_hash(cascade_path)}:"
+            f"ws={working_size or 0}:refine={int(bool(refine))}"
+        )
+        self._lock = threading.Lock()
+        self._conn = None
+
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS faces (
+                    path TEXT NOT NULL,
+                    detector TEXT NOT NULL,
+                    file_size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    width INTEGER NOT NULL,
+                    height INTEGER NOT NULL,
+                    best TEXT,
+                    candidates TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (path, detector)
+                )
+                """
+            )
+            self._conn.commit()
+        except (OSError, sqlite3.Error) as exc:
+            logger.warning("Índice de rostos indisponível em '%s': %s", db_path, exc)
+            self._conn = None
+
+    @property
+    def available(self) -> bool:
+        return self._conn is not None
+
+    def lookup(self, path) -> Optional[FaceRecord]:
+        return self.lookup_many([path]).get(path)
+
+    def lookup_many(self, paths: Iterable[str]) -> Dict[str, FaceRecord]:
+        """Returns the still-valid records among paths, one query per 500 paths."""
+        if not self.available:
+            return {}
+        expected = {}
+        for path in paths:
+            try:
+                expected[path] = _file_key(path)
+            except OSError:
+                continue
+
+        records = {}
+        pending = list(expected)
+        for start in range(0, len(pending), _LOOKUP_CHUNK):
+            chunk = pending[start : start + _LOOKUP_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            try:
+                with self._lock:
+                    rows = self._conn.execute(
+                        f"SELECT path, file_size, mtime_ns, width, height, best, candidates FROM faces "
+                        f"WHERE detector = ? AND path IN ({placeholders})",
+                        [self.detector_key, *chunk],
+                    ).fetchall()
+            except sqlite3.Error as exc:
+                logger.warning("Falha ao consultar índice de rostos: %s", exc)
+                return records
+            for path, file_size, mtime_ns, width, height, best, candidates in rows:
+                if expected.get(path) != (file_size, mtime_ns):
+                    continue
+                best_rect = tuple(json.loads(best)) if best else None
+                records[path] = FaceRecord(
+                    source_size=(width, height),
+                    best=best_rect,
+                    candidates=[tuple(rect) for rect in json.loads(candidates)],
+                )
+        return records
+
+    def store(self, path, record: FaceRecord) -> None:
+        self.store_many([(path, record)])
+
+    def store_many(self, items: Iterable[Tuple[str, FaceRecord]]) -> None:
+        if not self.available:
+            return
+        rows = []
+        now = time.time()
+        for path, record in items:
+            try:
+                file_size, mtime_ns = _file_key(path)
+            except OSError:
+                continue
+            rows.append(
+                (
+                    path,
+                    self.detector_key,
+                    file_size,
+                    mtime_ns,
+                    int(record.source_size[0]),
+                    int(record.source_size[1]),
+                    json.dumps([int(v) for v in record.best]) if record.best else None,
+                    json.dumps([[int(v) for v in rect] for rect in record.candidates]),
+                    now,
+                )
+            )
+        if not rows:
+            return
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO faces "
+                    "(path, detector, file_size, mtime_ns, width, height, best, candidates, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+        except sqlite3.Error as exc:
+            logger.warning("Falha ao gravar índice de rostos: %s", exc)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,73 @@
+import threading
+from collections import OrderedDict
+
+from src.config.settings import FRAME_CACHE_MAX_MB
+
+
+class ArrayLRUCache:
+    """
+    LRU of read-only NumPy arrays, bounded by their total bytes and/or their
+    count (None leaves that bound off). Safe to share between threads: the
+    process-wide border frame stacks (see shared_frame_cache) and the GIF
+    content palettes both live in one.
+    """
+
+    def __init__(self, max_bytes=None, max_entries=None):
+        self.max_bytes = None if max_bytes is None else max(0, int(max_bytes))
+        self.max_entries = None if max_entries is None else max(0, int(max_entries))
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._current_bytes = 0
+        self._lock = threading.Lock()
+
+    def _over_limit(self):
+        if self.max_bytes is not None and self._current_bytes > self.max_bytes:
+            return True
+        return self.max_entries is not None and len(self._entries) > self.max_entries
+
+    def get_or_create(self, key, factory):
+        """Returns the cached array for key, calling factory() on a miss. The result must not be modified."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+
+        value = factory()
+        value.flags.writeable = False
+        if self.max_bytes is not None and value.nbytes > self.max_bytes:
+            return value
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                return existing
+            self._entries[key] = value
+            self._current_bytes += value.nbytes
+            while self._entries and self._over_limit():
+                _old_key, old = self._entries.popitem(last=False)
+                self._current_bytes -= old.nbytes
+        return value
+
+    @property
+    def current_bytes(self):
+        return self._current_bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+
+# Border frame stacks, (N, H, W, 4) uint8.
+_shared_cache = ArrayLRUCache(max_bytes=FRAME_CACHE_MAX_MB * 1024 * 1024)
+
+
+def shared_frame_cache():
+    return _shared_cache
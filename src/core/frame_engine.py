@@ -0,0 +1,218 @@
+import colorsys
+import hashlib
+import math
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw
+
+
+STROBE_COLORS = (
+    (255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255),
+    (255, 255, 0, 255), (0, 255, 255, 255), (255, 0, 255, 255),
+    (255, 255, 255, 255), (0, 0, 0, 255),
+)
+
+GLITCH_COLORS = (
+    (255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255),
+    (255, 255, 0, 255), (0, 255, 255, 255), (255, 0, 255, 255),
+)
+GLITCH_BACKGROUND = (20, 20, 20, 255)
+GLITCH_RECTS_PER_FRAME = 10
+
+# Angular resolution of the Spin sweep (a power of two); 1/4096 turn keeps channels within 1 LSB.
+SPIN_LUT_STEPS = 4096
+
+
+def ring_alpha(size, border_width):
+    """
+    Alpha of an overlay frame: 255 on the border ring, 0 inside. The hole is
+    the same inclusive box ImageDraw.rectangle filled in the per-frame mask,
+    so it reaches one pixel further on the right and bottom edges.
+    """
+    width, height = size
+    alpha = np.full((height, width), 255, dtype=np.uint8)
+    alpha[border_width : height - border_width + 1, border_width : width - border_width + 1] = 0
+    return alpha
+
+
+def solid_backgrounds(colors, size):
+    """(N, H, W, 4) stack where frame i is filled with colors[i]."""
+    width, height = size
+    colors = np.ascontiguousarray(np.asarray(colors, dtype=np.uint8).reshape(-1, 4))
+    frames = np.empty((len(colors), height, width, 4), dtype=np.uint8)
+    # Filling whole RGBA words is a plain memset per frame; broadcasting 4-byte rows is not.
+    for frame, packed in zip(frames.view(np.uint32)[..., 0], colors.view(np.uint32)[:, 0]):
+        frame.fill(packed)
+    return frames
+
+
+def rainbow_colors(total_frames):
+    colors = []
+    for i in range(total_frames):
+        r, g, b = [int(x * 255) for x in colorsys.hsv_to_rgb(i / total_frames, 1.0, 1.0)]
+        colors.append((r, g, b, 255))
+    return colors
+
+
+def neon_colors(color_hex, total_frames):
+    r, g, b = ImageColor.getrgb(color_hex)[:3]
+    colors = []
+    for i in range(total_frames):
+        intensity = 0.5 + 0.5 * math.sin(2 * math.pi * i / total_frames)
+        colors.append((int(r * intensity), int(g * intensity), int(b * intensity), 255))
+    return colors
+
+
+def strobe_colors(total_frames):
+    return [STROBE_COLORS[i % len(STROBE_COLORS)] for i in range(total_frames)]
+
+
+def flow_backgrounds(color_hex, size, total_frames):
+    """Vertical sine bands scrolling down by half the strip over the loop."""
+    width, height = size
+    grad_height = height * 2
+    # Every row of the strip is a single color, so a one-pixel column is enough.
+    strip = Image.new("RGBA", (1, grad_height), (0, 0, 0, 255))
+    draw = ImageDraw.Draw(strip)
+    r, g, b = ImageColor.getrgb(color_hex)[:3]
+    steps = 20
+    step_h = grad_height / steps
+    for i in range(steps):
+        val = 0.5 + 0.5 * math.sin(2 * math.pi * i / steps)
+        draw.rectangle([0, i * step_h, width, (i + 1) * step_h], fill=(int(r * val), int(g * val), int(b * val), 255))
+    column = np.ascontiguousarray(np.asarray(strip)[:, 0]).view(np.uint32)[:, 0]
+
+    frames = np.empty((total_frames, height, width, 4), dtype=np.uint8)
+    words = frames.view(np.uint32)[..., 0]
+    for i in range(total_frames):
+        offset = int((grad_height / 2) * (i / total_frames))
+        words[i] = column[offset : offset + height, None]
+    return frames
+
+
+def spin_backgrounds(color_hex, size, total_frames, where=None):
+    """
+    Dark-to-color conic sweep rotating one full turn over the loop. The
+    gradient is evaluated analytically (arctan2 around the frame center,
+    clockwise from 3 o'clock like ImageDraw.pieslice) and the rotation is a
+    phase offset. Only pixels set in where (an (H, W) bool mask, default all)
+    are computed; the rest stay transparent black.
+    """
+    width, height = size
+    frames = np.zeros((total_frames, height, width, 4), dtype=np.uint8)
+    if where is None:
+        where = np.ones((height, width), dtype=bool)
+    ys, xs = np.nonzero(where)
+    if total_frames == 0 or len(ys) == 0:
+        return frames
+
+    # Angles are quantized to SPIN_LUT_STEPS per turn, so a frame is one
+    # integer subtraction and a table lookup per ring pixel.
+    angles = np.arctan2(ys + 0.5 - height / 2, xs + 0.5 - width / 2)
+    steps = np.floor(np.mod(angles / (2 * np.pi), 1.0) * SPIN_LUT_STEPS).astype(np.int32)
+    shifts = np.round(np.arange(total_frames) * (SPIN_LUT_STEPS / total_frames)).astype(np.int32)
+    indices = (steps[None, :] - shifts[:, None]) & (SPIN_LUT_STEPS - 1)
+
+    factor = np.arange(SPIN_LUT_STEPS, dtype=np.float64) / SPIN_LUT_STEPS
+    rgb = np.asarray(ImageColor.getrgb(color_hex)[:3], dtype=np.float64)
+    lut = np.empty((SPIN_LUT_STEPS, 4), dtype=np.uint8)
+    lut[:, :3] = (factor[:, None] * rgb).astype(np.uint8)
+    lut[:, 3] = 255
+
+    words = frames.view(np.uint32).reshape(total_frames, height * width)
+    words[:, ys * width + xs] = lut.view(np.uint32)[indices, 0]
+    return frames
+
+
+def glitch_seed(*parts):
+    """Stable 64-bit seed from repr()-able values such as an image path and effect parameters."""
+    return int.from_bytes(hashlib.blake2b(repr(parts).encode(), digest_size=8).digest(), "little")
+
+
+def glitch_schedule(size, total_frames, seed):
+    """
+    Everything random about a Glitch loop, drawn up front from one seeded
+    generator: rects (N, R, 4) as inclusive x0, y0, x1, y1 boxes, colors
+    (N, R) indexes into GLITCH_COLORS and offsets (N, 2) content jitter in
+    -2..2. The same size, frame count and seed give the same schedule.
+    """
+    width, height = size
+    rng = np.random.default_rng(seed)
+    shape = (total_frames, GLITCH_RECTS_PER_FRAME)
+    x = rng.integers(0, width + 1, shape)
+    y = rng.integers(0, height + 1, shape)
+    w = rng.integers(5, 51, shape)
+    h = rng.integers(2, 11, shape)
+    rects = np.stack([x, y, x + w, y + h], axis=-1)
+    colors = rng.integers(0, len(GLITCH_COLORS), shape)
+    offsets = rng.integers(-2, 3, (total_frames, 2))
+    return rects, colors, offsets
+
+
+def glitch_backgrounds(size, rects, colors):
+    """(N, H, W, 4) stack of dark frames with the scheduled rectangles, clipped like ImageDraw."""
+    frames = solid_backgrounds([GLITCH_BACKGROUND] * len(rects), size)
+    palette = np.ascontiguousarray(np.asarray(GLITCH_COLORS, dtype=np.uint8)).view(np.uint32)[:, 0]
+    for frame, frame_rects, frame_colors in zip(frames.view(np.uint32)[..., 0], rects, colors):
+        for (x0, y0, x1, y1), color in zip(frame_rects, frame_colors):
+            frame[y0 : y1 + 1, x0 : x1 + 1] = palette[color]
+    return frames
+
+
+def background_mask(size, border_width, overlay_only=False):
+    """Pixels whose background can show: the ring for overlays, every pixel otherwise."""
+    width, height = size
+    if overlay_only:
+        return ring_alpha(size, border_width) > 0
+    return np.ones((height, width), dtype=bool)
+
+
+def composite_content(frames, content, offset):
+    """
+    Pastes content (an RGBA image or (h, w, 4) array) onto every frame at
+    offset using its own alpha as the mask, with the same integer blend as Image.paste(content, offset, content).
+    Opaque pixels are one broadcast write; only partially transparent pixels
+    are blended per frame.
+    """
+    if not isinstance(content, np.ndarray):
+        content = content.convert("RGBA") if content.mode != "RGBA" else content
+    fg = np.ascontiguousarray(content)
+    x, y = offset
+    # Like Image.paste, a negative offset clips the content instead of wrapping.
+    fg = fg[max(0, -y) :, max(0, -x) :]
+    x, y = max(0, x), max(0, y)
+    inner_h, inner_w = fg.shape[:2]
+    region = frames[:, y : y + inner_h, x : x + inner_w]
+    fg = np.ascontiguousarray(fg[: region.shape[1], : region.shape[2]])
+    alpha = fg[..., 3]
+
+    # Whole-pixel (uint32) copies; per-channel broadcasting is several times slower.
+    region_words = region.view(np.uint32)[..., 0]
+    fg_words = fg.view(np.uint32)[..., 0]
+    opaque = alpha == 255
+    if opaque.all():
+        region_words[:] = fg_words
+        return frames
+    np.copyto(region_words, fg_words, where=opaque)
+
+    partial = (alpha > 0) & ~opaque
+    if partial.any():
+        mask = alpha[partial].astype(np.uint32)[None, :, None]
+        src = fg[partial].astype(np.uint32)[None]
+        dst = region[:, partial].astype(np.uint32)
+        blended = dst * (255 - mask) + src * mask + 128
+        region[:, partial] = ((blended >> 8) + blended) >> 8
+    return frames
+
+
+def finish_frames(frames, content, border_width, overlay_only):
+    """Turns a background stack into final frames: overlay ring or composited content."""
+    if overlay_only:
+        frames[..., 3] = ring_alpha((frames.shape[2], frames.shape[1]), border_width)
+    elif content is not None:
+        composite_content(frames, content, (border_width, border_width))
+    return frames
+
+
+def to_images(frames):
+    return [Image.fromarray(frame) for frame in frames]
@@ -0,0 +1,68 @@
+import hashlib
+import itertools
+
+import numpy as np
+
+
+def frame_digest(frame):
+    """128-bit digest of a frame's pixels and shape (PIL image or (H, W, C) array)."""
+    if not isinstance(frame, np.ndarray):
+        frame = np.asarray(frame if frame.mode == "RGBA" else frame.convert("RGBA"))
+    digest = hashlib.blake2b(repr(frame.shape).encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(frame).data)
+    return digest.digest()
+
+
+def loop_period(items):
+    """Length of the shortest prefix that repeated gives items, or len(items) when none does."""
+    count = len(items)
+    for period in range(1, count):
+        if count % period == 0 and all(items[i] == items[i % period] for i in range(period, count)):
+            return period
+    return count
+
+
+class FrameRuns:
+    """
+    Encoder pre-pass. Iterating yields the frames with every run of identical
+    consecutive frames reduced to its first one; frames are compared by digest
+    and only the current one is kept, so a generator source stays streaming.
+
+    Once the iteration ends, durations has one entry per frame to write and
+    may be shorter than what was yielded: when the runs repeat with a shorter
+    period only the first period is kept, and a last frame equal to the first
+    is folded into it. The loop plays the same either way. Encoders write the
+    first len(durations) frames they received.
+
+    duration is the time of every frame in ms, or a sequence with the time
+    of each frame.
+    """
+
+    def __init__(self, frames, duration):
+        self._frames = frames
+        self._duration = duration
+        self.source_count = 0
+        self.durations = None
+
+    def __iter__(self):
+        keys = []
+        durations = []
+        if isinstance(self._duration, (int, float)):
+            frame_durations = itertools.repeat(self._duration)
+        else:
+            frame_durations = iter(self._duration)
+        for frame, duration in zip(self._frames, frame_durations):
+            self.source_count += 1
+            key = frame_digest(frame)
+            if keys and key == keys[-1]:
+                durations[-1] += duration
+                continue
+            keys.append(key)
+            durations.append(duration)
+            yield frame
+
+        period = loop_period(list(zip(keys, durations)))
+        keys, durations = keys[:period], durations[:period]
+        if len(keys) > 1 and keys[-1] == keys[0]:
+            durations[0] += durations.pop()
+        self.durations = durations
@@ -0,0 +1,118 @@
+import contextlib
+
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+from src.core.frame_runs import FrameRuns
+from src.core.palette import PALETTE_MAX_COLORS, build_global_palette, map_to_palette
+
+
+# Palette slot left free in every frame and declared transparent.
+GIF_TRANSPARENT_INDEX = 255
+
+
+def _frame_words(frame):
+    """Flat uint32 view (one word per RGBA pixel) of a PIL image or (H, W, 4) array, plus (H, W)."""
+    if not isinstance(frame, np.ndarray):
+        frame = np.asarray(frame if frame.mode == "RGBA" else frame.convert("RGBA"))
+    return np.ascontiguousarray(frame).view(np.uint32).reshape(-1), frame.shape[:2]
+
+
+def _collect_changes(frames):
+    """
+    Consumes frames one at a time, keeping the first in full and only the
+    pixels where each later frame differs from it. Returns
+    (first_words, (height, width), changing_positions, later_words) where
+    later_words is a (N - 1, len(changing_positions)) array.
+    """
+    iterator = iter(frames)
+    first, shape = _frame_words(next(iterator))
+    first = first.copy()
+    deltas = []
+    changing = np.zeros(first.shape, dtype=bool)
+    for frame in iterator:
+        words, _shape = _frame_words(frame)
+        positions = np.flatnonzero(words != first).astype(np.int32)
+        deltas.append((positions, words[positions]))
+        changing[positions] = True
+
+    changing_positions = np.flatnonzero(changing)
+    later = np.empty((len(deltas), len(changing_positions)), dtype=np.uint32)
+    later[:] = first[changing_positions]
+    for row, (positions, values) in zip(later, deltas):
+        row[np.searchsorted(changing_positions, positions)] = values
+    return first, shape, changing_positions, later
+
+
+def _open_output(output_path):
+    if hasattr(output_path, "write"):
+        return contextlib.nullcontext(output_path)
+    return open(output_path, "wb")
+
+
+def save_delta_gif(frames, output_path, duration, loop=0, palette_key=None, colors=PALETTE_MAX_COLORS):
+    """
+    Writes an animated GIF where the first frame is complete and every later
+    frame only carries the pixels that change somewhere in the animation (the
+    border ring, plus content pixels the border shows through). The rest is
+    the transparent index over disposal 1, so the first frame's interior stays
+    on screen and LZW collapses it to almost nothing.
+
+    Every frame uses one global palette (see build_global_palette) and is
+    mapped to it without dithering, so the content looks the same on every
+    frame. palette_key identifies the content for the palette cache; colors
+    caps the palette size.
+
+    frames is any iterable of RGBA images or (H, W, 4) uint8 arrays (an
+    (N, H, W, 4) array works too). It is read once, keeping the first frame
+    and only the changing pixels of the others, so a generator never has more
+    than one later frame fully in memory. output_path may also be a binary
+    file object. Repeated frames are merged first (see FrameRuns), so a frame
+    may be shown for a multiple of duration. duration is ms per frame, or a
+    sequence with one entry per frame.
+    """
+    runs = FrameRuns(frames, duration)
+    first, (height, width), changing_positions, later = _collect_changes(runs)
+    durations = runs.durations
+    later = later[: len(durations) - 1]
+    first_pixels = first.view(np.uint8).reshape(-1, 4)
+    later_pixels = later.view(np.uint8).reshape(-1, 4)
+    changing = np.zeros(first.shape, dtype=bool)
+    changing[changing_positions] = True
+
+    border_pixels = np.concatenate([first_pixels[changing_positions], later_pixels])
+    palette = build_global_palette(
+        border_pixels,
+        first_pixels[~changing],
+        palette_key,
+        colors,
+        border_share=len(changing_positions) / len(first),
+    )
+    first_indexes = map_to_palette(first_pixels, palette)
+
+    # A full 256-entry table keeps the transparent index inside it.
+    palette_bytes = palette.tobytes().ljust(256 * 3, b"\0")
+    frame_info = {"disposal": 1, "transparency": GIF_TRANSPARENT_INDEX}
+    delta_indexes = np.full(len(first), GIF_TRANSPARENT_INDEX, dtype=np.uint8)
+    # Frames are written one by one so they all share the global color table;
+    # Pillow's save_all would add a local table to every delta frame.
+    with _open_output(output_path) as fp:
+        for index in range(len(later) + 1):
+            if index == 0:
+                data = first_indexes
+            else:
+                # Mapped per frame so only one frame's lookup tables exist at a time.
+                pixels = later[index - 1].view(np.uint8).reshape(-1, 4)
+                delta_indexes[changing_positions] = map_to_palette(pixels, palette)
+                data = delta_indexes
+            frame = Image.frombytes("P", (width, height), data.tobytes())
+            info = {"duration": durations[index], **frame_info}
+            try:
+                frame.putpalette(palette_bytes)
+                if index == 0:
+                    header, _used = GifImagePlugin.getheader(frame, info={"loop": loop, **info})
+                    fp.write(b"".join(header))
+                fp.write(b"".join(GifImagePlugin.getdata(frame, **info)))
+            finally:
+                frame.close()
+        fp.write(b";")
@@ -0,0 +1,121 @@
+import math
+
+from PIL import Image
+
+
+# JPEG DCT scaling only goes down to 1/8.
+_MAX_DRAFT_SCALE = 8
+_REDUCIBLE_MODES = ("L", "LA", "RGB", "RGBA")
+
+# Browsers play GIF frames shorter than 20 ms at 100 ms; animated sources follow suit.
+MIN_FRAME_DURATION_MS = 20
+DEFAULT_FRAME_DURATION_MS = 100
+
+
+def reduction_factor(source_size, min_size=None, min_side=None, reducing_gap=1.0):
+    """
+    Largest power-of-two factor that keeps the image covering min_size
+    (width, height) and/or min_side (longest side), with reducing_gap as an
+    extra safety multiplier. Returns 1 when no target is given or
+    reducing_gap is None (exact decode).
+    """
+    if reducing_gap is None:
+        return 1
+    width, height = source_size
+    limit = math.inf
+    if min_size is not None:
+        need_w = max(1, int(math.ceil(min_size[0] * reducing_gap)))
+        need_h = max(1, int(math.ceil(min_size[1] * reducing_gap)))
+        limit = min(limit, width / need_w, height / need_h)
+    if min_side is not None:
+        need = max(1, int(math.ceil(min_side * reducing_gap)))
+        limit = min(limit, max(width, height) / need)
+    if limit == math.inf or limit < 2:
+        return 1
+    return 1 << int(math.floor(math.log2(limit)))
+
+
+def _draft_scale(full_size, drafted_size):
+    for scale in (8, 4, 2):
+        if (full_size[0] + scale - 1) // scale == drafted_size[0]:
+            return scale
+    return 1
+
+
+def open_image_at_scale(path, min_size=None, min_side=None, reducing_gap=1.0, mode="RGBA"):
+    """
+    Opens an image already shrunk by the largest power-of-two factor that
+    still covers the requested size. JPEGs decode straight to the reduced
+    scale via draft(); other formats are cut down with reduce() before the
+    mode conversion. With no target the full image is returned.
+    """
+    with Image.open(path) as source:
+        full_size = source.size
+        factor = reduction_factor(full_size, min_size=min_size, min_side=min_side, reducing_gap=reducing_gap)
+
+        if factor > 1:
+            draft_factor = min(factor, _MAX_DRAFT_SCALE)
+            source.draft(None, (full_size[0] // draft_factor, full_size[1] // draft_factor))
+            factor //= _draft_scale(full_size, source.size)
+
+        return _reduced_copy(source, factor, mode)
+
+
+def reduce_image(image, min_size=None, min_side=None, reducing_gap=1.0, mode="RGBA"):
+    """open_image_at_scale for an image already in memory: a new, reduced copy in mode."""
+    factor = reduction_factor(image.size, min_size=min_size, min_side=min_side, reducing_gap=reducing_gap)
+    return _reduced_copy(image, factor, mode)
+
+
+def _reduced_copy(source, factor, mode):
+    """New image of the current frame of source, reduced by factor and converted to mode."""
+    if factor == 1:
+        return source.convert(mode)
+    working = source if source.mode in _REDUCIBLE_MODES else source.convert("RGBA")
+    reduced = working.reduce(factor)
+    if working is not source:
+        working.close()
+    if reduced.mode == mode:
+        return reduced
+    try:
+        return reduced.convert(mode)
+    finally:
+        reduced.close()
+
+
+def _frame_duration(source):
+    # WebP only reports a frame's duration once the frame is decoded.
+    if source.format == "WEBP":
+        source.load()
+    duration = source.info.get("duration") or 0
+    return int(duration) if duration >= MIN_FRAME_DURATION_MS else DEFAULT_FRAME_DURATION_MS
+
+
+def animation_durations(path):
+    """
+    Per-frame durations in ms of an animated image (GIF, WebP, APNG), or
+    None for a still one. Frames are visited one at a time and not kept.
+    """
+    with Image.open(path) as source:
+        if not getattr(source, "is_animated", False):
+            return None
+        durations = []
+        for index in range(source.n_frames):
+            source.seek(index)
+            durations.append(_frame_duration(source))
+        return durations
+
+
+def iter_frames_at_scale(path, min_size=None, min_side=None, reducing_gap=1.0, mode="RGBA"):
+    """
+    Frames of an (animated) image one at a time as (image, duration_ms),
+    each a new image reduced like open_image_at_scale. Only the frame being
+    yielded is decoded, so a long animation is never in memory at once; the
+    caller closes every image.
+    """
+    with Image.open(path) as source:
+        factor = reduction_factor(source.size, min_size=min_size, min_side=min_side, reducing_gap=reducing_gap)
+        for index in range(getattr(source, "n_frames", 1)):
+            source.seek(index)
+            duration = _frame_duration(source)
+            yield _reduced_copy(source, factor, mode), duration
@@ -0,0 +1,110 @@
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from PIL import Image
+
+
+logger = logging.getLogger(__name__)
+
+
+EXIF_ORIENTATION_TAG = 0x0112
+PROBE_CACHE_MAX_ENTRIES = 8192
+
+_cache: "OrderedDict[str, Tuple[Tuple[int, int], ImageInfo]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    """Header-level facts about an image file. Duck-types as an image for size-only math."""
+
+    path: str
+    size: Tuple[int, int]
+    mode: str
+    format: Optional[str]
+    frame_count: int = 1
+    orientation: int = 1
+
+    @property
+    def width(self) -> int:
+        return self.size[0]
+
+    @property
+    def height(self) -> int:
+        return self.size[1]
+
+    @property
+    def is_animated(self) -> bool:
+        return self.frame_count > 1
+
+
+def _read_orientation(image) -> int:
+    # Only EXIF already parsed with the header; PNG getexif() would decode the file.
+    raw = image.info.get("exif")
+    if not raw:
+        return 1
+    try:
+        exif = Image.Exif()
+        exif.load(raw)
+        return int(exif.get(EXIF_ORIENTATION_TAG, 1) or 1)
+    except Exception:
+        return 1
+
+
+def _stat_key(path) -> Tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_header(path) -> ImageInfo:
+    with Image.open(path) as source:
+        return ImageInfo(
+            path=path,
+            size=source.size,
+            mode=source.mode,
+            format=source.format,
+            frame_count=int(getattr(source, "n_frames", 1) or 1),
+            orientation=_read_orientation(source),
+        )
+
+
+def probe_image(path) -> ImageInfo:
+    """
+    Reads dimensions, mode, frame count and EXIF orientation without decoding
+    pixels. Results are cached per path and invalidated when mtime/size change.
+    Raises OSError for missing or unreadable files.
+    """
+    key = _stat_key(path)
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            _cache.move_to_end(path)
+            return cached[1]
+
+    info = _read_header(path)
+    with _cache_lock:
+        _cache[path] = (key, info)
+        _cache.move_to_end(path)
+        while len(_cache) > PROBE_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return info
+
+
+def probe_images(paths: Iterable[str]) -> Dict[str, ImageInfo]:
+    """Probes every path, leaving out files that cannot be read as images."""
+    result = {}
+    for path in paths:
+        try:
+            result[path] = probe_image(path)
+        except (OSError, ValueError) as exc:
+            logger.warning("Falha ao ler cabeçalho de %s: %s", path, exc)
+    return result
+
+
+def clear_probe_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
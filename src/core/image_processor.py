@@ -5,17 +5,29 @@ import cv2
 import numpy as np
 from PIL import Image, ImageDraw
 
-from src.config.settings import BORDA_HEIGHT, BORDA_WIDTH, BORDER_THICKNESS, FACE_CASCADE_FILE
+from src.config.settings import (
+    BORDA_HEIGHT,
+    BORDA_WIDTH,
+    BORDER_THICKNESS,
+    FACE_CASCADE_FILE,
+    FACE_DETECTION_WORKING_SIZE,
+)
+from src.core.region_resample import resample_region
 
 
 logger = logging.getLogger(__name__)
 
+# Above this source/output ratio a full Pillow resize beats resampling only the window.
+REGION_RENDER_MAX_SCALE = 4.0
+
+# lbpcascade_animeface is trained on 24x24 windows.
+FACE_CASCADE_MIN_WINDOW = 24
+
 
 class ImageProcessor:
     @staticmethod
-    def load_face_cascade():
+    def load_face_cascade(cascade_path=FACE_CASCADE_FILE):
         """Loads the face cascade classifier."""
-        cascade_path = FACE_CASCADE_FILE
         if not os.path.exists(cascade_path):
             logger.warning("%s não encontrado.", cascade_path)
             return None
@@ -47,50 +59,135 @@ class ImageProcessor:
         return image.resize((new_width, new_height), Image.LANCZOS)
 
     @staticmethod
-    def crop_image_to_borda(image_to_crop, image_pos_on_canvas, image_current_size, borda_pos):
-        """Crops the image to fit the border area."""
+    def _borda_window(image_pos_on_canvas, image_current_size, borda_pos, frame_size=(BORDA_WIDTH, BORDA_HEIGHT)):
+        """
+        Returns ((x1, y1, x2, y2), (paste_x, paste_y)) for the part of the resized
+        image that falls inside the border, or None when nothing is visible.
+        """
         borda_canvas_x, borda_canvas_y = borda_pos
         img_x_canvas, img_y_canvas = image_pos_on_canvas
         img_w, img_h = image_current_size
+        frame_w, frame_h = frame_size
 
         crop_rel_x1 = max(0, borda_canvas_x - img_x_canvas)
         crop_rel_y1 = max(0, borda_canvas_y - img_y_canvas)
-        crop_rel_x2 = min(img_w, borda_canvas_x + BORDA_WIDTH - img_x_canvas)
-        crop_rel_y2 = min(img_h, borda_canvas_y + BORDA_HEIGHT - img_y_canvas)
+        crop_rel_x2 = min(img_w, borda_canvas_x + frame_w - img_x_canvas)
+        crop_rel_y2 = min(img_h, borda_canvas_y + frame_h - img_y_canvas)
 
         if crop_rel_x1 >= crop_rel_x2 or crop_rel_y1 >= crop_rel_y2:
-            return Image.new("RGBA", (BORDA_WIDTH, BORDA_HEIGHT), (0, 0, 0, 0))
-
-        content_to_paste = image_to_crop.crop((crop_rel_x1, crop_rel_y1, crop_rel_x2, crop_rel_y2))
-        final_custom_area = Image.new("RGBA", (BORDA_WIDTH, BORDA_HEIGHT), (0, 0, 0, 0))
+            return None
 
         paste_x_on_final = max(0, img_x_canvas - borda_canvas_x)
         paste_y_on_final = max(0, img_y_canvas - borda_canvas_y)
+        return (
+            (crop_rel_x1, crop_rel_y1, crop_rel_x2, crop_rel_y2),
+            (round(paste_x_on_final), round(paste_y_on_final)),
+        )
 
-        final_custom_area.paste(content_to_paste, (round(paste_x_on_final), round(paste_y_on_final)))
+    @staticmethod
+    def crop_image_to_borda(image_to_crop, image_pos_on_canvas, image_current_size, borda_pos, frame_size=(BORDA_WIDTH, BORDA_HEIGHT)):
+        """Crops the image to fit the border area (frame_size, the whole border by default)."""
+        window = ImageProcessor._borda_window(image_pos_on_canvas, image_current_size, borda_pos, frame_size)
+        if window is None:
+            return Image.new("RGBA", frame_size, (0, 0, 0, 0))
+
+        crop_box, paste_pos = window
+        content_to_paste = image_to_crop.crop(crop_box)
+        final_custom_area = Image.new("RGBA", frame_size, (0, 0, 0, 0))
+        final_custom_area.paste(content_to_paste, paste_pos)
         return final_custom_area
 
     @staticmethod
-    def render_image_to_borda(original_image, image_pos_on_canvas, image_current_size, borda_pos):
-        """
-        Renders the visible border area using the same logic as the legacy UI:
-        resize first, crop after.
+    def _use_region_render(original_image, image_current_size):
+        if original_image.mode not in ("RGB", "RGBA"):
+            return False
+        img_w, img_h = image_current_size
+        scale = max(original_image.width / img_w, original_image.height / img_h)
+        return scale <= REGION_RENDER_MAX_SCALE
 
-        The previous optimized path was faster but produced positional drift
-        versus the editor preview, especially on non-uniform images.
+    @staticmethod
+    def render_image_to_borda(
+        original_image,
+        image_pos_on_canvas,
+        image_current_size,
+        borda_pos,
+        mode="auto",
+        frame_size=(BORDA_WIDTH, BORDA_HEIGHT),
+    ):
+        """
+        Renders the visible border area with the same pixels as the legacy UI
+        path (LANCZOS resize of the whole image, crop after).
+
+        mode="full" runs that path literally. mode="region" resamples only the
+        source pixels behind the border window with Pillow-identical LANCZOS
+        coefficients, so zoomed-in images never materialize the full resize.
+        mode="auto" picks region unless the image is being shrunk by more than
+        REGION_RENDER_MAX_SCALE, where Pillow's full resize is cheaper.
+        frame_size is the size of the window at borda_pos.
         """
         if original_image is None:
-            return Image.new("RGBA", (BORDA_WIDTH, BORDA_HEIGHT), (0, 0, 0, 0))
+            return Image.new("RGBA", frame_size, (0, 0, 0, 0))
         img_w, img_h = image_current_size
         if img_w <= 0 or img_h <= 0:
-            return Image.new("RGBA", (BORDA_WIDTH, BORDA_HEIGHT), (0, 0, 0, 0))
-        resized = original_image.resize((int(img_w), int(img_h)), Image.LANCZOS)
-        return ImageProcessor.crop_image_to_borda(
-            resized,
-            image_pos_on_canvas,
-            (int(img_w), int(img_h)),
-            borda_pos,
+            return Image.new("RGBA", frame_size, (0, 0, 0, 0))
+        size = (int(img_w), int(img_h))
+
+        if mode == "auto":
+            mode = "region" if ImageProcessor._use_region_render(original_image, size) else "full"
+
+        if mode == "full":
+            resized = original_image.resize(size, Image.LANCZOS)
+            try:
+                return ImageProcessor.crop_image_to_borda(resized, image_pos_on_canvas, size, borda_pos, frame_size)
+            finally:
+                resized.close()
+
+        final_custom_area = Image.new("RGBA", frame_size, (0, 0, 0, 0))
+        window = ImageProcessor._borda_window(image_pos_on_canvas, size, borda_pos, frame_size)
+        if window is None:
+            return final_custom_area
+        crop_box, paste_pos = window
+        # Same rounding Image.crop applies on the full path.
+        x1, y1, x2, y2 = (int(round(v)) for v in crop_box)
+        if x1 >= x2 or y1 >= y2:
+            return final_custom_area
+        content = resample_region(original_image, size, (x1, y1, x2, y2))
+        try:
+            final_custom_area.paste(content, paste_pos)
+        finally:
+            content.close()
+        return final_custom_area
+
+    @staticmethod
+    def render_content_window(
+        original_image,
+        image_pos_on_canvas,
+        image_current_size,
+        borda_pos,
+        border_width=BORDER_THICKNESS,
+        mode="auto",
+    ):
+        """
+        What the animated borders show inside the border ring: the border
+        window squeezed into the interior, (BORDA_WIDTH - 2 * border_width,
+        BORDA_HEIGHT - 2 * border_width). The placement is scaled to the
+        interior first, so the source is resampled once, straight to its
+        final size, instead of to the border window and then again to the
+        interior. Returns None when there is no interior.
+        """
+        inner_w = BORDA_WIDTH - 2 * border_width
+        inner_h = BORDA_HEIGHT - 2 * border_width
+        if inner_w <= 0 or inner_h <= 0:
+            return None
+        scale_x = inner_w / BORDA_WIDTH
+        scale_y = inner_h / BORDA_HEIGHT
+        img_w, img_h = image_current_size
+        size = (max(1, round(img_w * scale_x)), max(1, round(img_h * scale_y)))
+        pos = (
+            (image_pos_on_canvas[0] - borda_pos[0]) * scale_x,
+            (image_pos_on_canvas[1] - borda_pos[1]) * scale_y,
         )
+        return ImageProcessor.render_image_to_borda(original_image, pos, size, (0, 0), mode, (inner_w, inner_h))
 
     @staticmethod
     def add_borda_to_image(image_content_pil, border_hex_color):
@@ -105,48 +202,143 @@ class ImageProcessor:
         return image_with_border
 
     @staticmethod
-    def detect_anime_face(original_image, face_cascade):
-        """
-        Detects anime face in the image using the provided cascade.
-        Returns (x, y, w, h) of the best face or None.
-        """
-        if not face_cascade or not original_image:
-            return None
-
-        try:
-            open_cv_image_rgb = np.array(original_image.convert("RGB"))
-            open_cv_image_bgr = cv2.cvtColor(open_cv_image_rgb, cv2.COLOR_RGB2BGR)
-            gray_image = cv2.cvtColor(open_cv_image_bgr, cv2.COLOR_BGR2GRAY)
-            gray_image = cv2.equalizeHist(gray_image)
+    def _detection_gray(original_image, working_size):
+        """Equalized grayscale working image and the factor that maps it back to source pixels."""
+        gray = np.asarray(original_image.convert("L"))
+        h, w = gray.shape
+        scale = 1.0
+        if working_size and max(w, h) > working_size:
+            scale = working_size / max(w, h)
+            gray = cv2.resize(
+                gray,
+                (max(1, round(w * scale)), max(1, round(h * scale))),
+                interpolation=cv2.INTER_AREA,
+            )
+        return cv2.equalizeHist(gray), scale
 
-            h, w = gray_image.shape
-            min_dim = min(h, w)
-            min_size_strict = max(60, int(min_dim * 0.15))
+    @staticmethod
+    def _detect_faces(face_cascade, gray_image, source_min_dim, scale):
+        # Thresholds are defined in full-resolution source pixels (source_min_dim
+        # is the source's short side, scale maps source pixels to gray_image), so
+        # they mean the same whatever size the caller decoded and detection ran at.
+        min_size_strict = max(FACE_CASCADE_MIN_WINDOW, int(max(60, int(source_min_dim * 0.15)) * scale))
+        faces = face_cascade.detectMultiScale(
+            gray_image,
+            scaleFactor=1.1,
+            minNeighbors=5,
+            minSize=(min_size_strict, min_size_strict),
+        )
 
+        if faces is None or len(faces) == 0:
+            min_size_relaxed = max(FACE_CASCADE_MIN_WINDOW, int(max(40, int(source_min_dim * 0.05)) * scale))
             faces = face_cascade.detectMultiScale(
                 gray_image,
-                scaleFactor=1.1,
-                minNeighbors=5,
-                minSize=(min_size_strict, min_size_strict),
+                scaleFactor=1.05,
+                minNeighbors=3,
+                minSize=(min_size_relaxed, min_size_relaxed),
             )
+        if faces is None:
+            return []
+        return [tuple(int(v) for v in face) for face in faces]
 
-            if faces is None or len(faces) == 0:
-                min_size_relaxed = max(40, int(min_dim * 0.05))
-                faces = face_cascade.detectMultiScale(
-                    gray_image,
-                    scaleFactor=1.05,
-                    minNeighbors=3,
-                    minSize=(min_size_relaxed, min_size_relaxed),
-                )
+    @staticmethod
+    def _refine_face(original_image, face_cascade, face, working_size):
+        """Re-runs detection on a crop around a coarse hit, at up to working_size resolution."""
+        fx, fy, fw, fh = face
+        margin = max(fw, fh) // 2
+        left = max(0, fx - margin)
+        top = max(0, fy - margin)
+        right = min(original_image.width, fx + fw + margin)
+        bottom = min(original_image.height, fy + fh + margin)
+        crop = original_image.crop((left, top, right, bottom))
+        try:
+            gray, scale = ImageProcessor._detection_gray(crop, working_size)
+        finally:
+            crop.close()
+
+        min_side = max(FACE_CASCADE_MIN_WINDOW, int(min(fw, fh) * 0.6 * scale))
+        candidates = face_cascade.detectMultiScale(
+            gray,
+            scaleFactor=1.05,
+            minNeighbors=3,
+            minSize=(min_side, min_side),
+        )
+        if candidates is None or len(candidates) == 0:
+            return face
+        cx, cy, cw, ch = max(candidates, key=lambda f: f[2] * f[3])
+        return (
+            left + int(round(cx / scale)),
+            top + int(round(cy / scale)),
+            int(round(cw / scale)),
+            int(round(ch / scale)),
+        )
 
-            if len(faces) == 0:
-                return None
+    @staticmethod
+    def detect_anime_faces(
+        original_image,
+        face_cascade,
+        working_size=FACE_DETECTION_WORKING_SIZE,
+        refine=False,
+        source_size=None,
+    ):
+        """
+        Detects anime faces in the image using the provided cascade.
+        The cascade runs on a copy whose longest side is at most working_size
+        (None runs at full resolution) and hits are mapped back to
+        original_image coordinates. refine=True re-detects the best hit on a
+        crop around it. source_size is the full-resolution size when
+        original_image is a reduced decode, so the minimum face sizes stay
+        relative to the real source. Returns (best, candidates); best is None
+        when nothing was found.
+        """
+        if not face_cascade or not original_image:
+            return None, []
 
-            best_face = sorted(faces, key=lambda f: f[2] * f[3], reverse=True)[0]
-            return best_face
+        try:
+            gray_image, scale = ImageProcessor._detection_gray(original_image, working_size)
+            source_size = source_size or original_image.size
+            faces = ImageProcessor._detect_faces(
+                face_cascade,
+                gray_image,
+                min(source_size),
+                scale * original_image.width / source_size[0],
+            )
+            candidates = [
+                (
+                    int(round(x / scale)),
+                    int(round(y / scale)),
+                    int(round(w / scale)),
+                    int(round(h / scale)),
+                )
+                for x, y, w, h in faces
+            ]
+            if not candidates:
+                return None, []
+
+            best_face = max(candidates, key=lambda f: f[2] * f[3])
+            if refine and scale < 1.0:
+                best_face = ImageProcessor._refine_face(original_image, face_cascade, best_face, working_size)
+            return best_face, candidates
         except Exception as exc:
             logger.warning("Erro de detecção OpenCV: %s", exc)
-            return None
+            return None, []
+
+    @staticmethod
+    def detect_anime_face(
+        original_image,
+        face_cascade,
+        working_size=FACE_DETECTION_WORKING_SIZE,
+        refine=False,
+        source_size=None,
+    ):
+        """
+        Detects anime face in the image using the provided cascade.
+        Returns (x, y, w, h) of the best face or None.
+        """
+        best_face, _candidates = ImageProcessor.detect_anime_faces(
+            original_image, face_cascade, working_size, refine, source_size
+        )
+        return best_face
 
     @staticmethod
     def calculate_intelligent_frame_pos(original_image, face_rect, borda_pos):
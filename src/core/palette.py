@@ -0,0 +1,130 @@
+import numpy as np
+from PIL import Image
+
+from src.config.settings import PALETTE_BORDER_COLORS, PALETTE_CACHE_ENTRIES, PALETTE_SAMPLE_PIXELS
+from src.core.frame_cache import ArrayLRUCache
+
+
+# Palette slots available to frame colors; slot 255 stays free for transparency.
+PALETTE_MAX_COLORS = 255
+
+# Content palettes, (K, 3) uint8.
+_content_palettes = ArrayLRUCache(max_entries=PALETTE_CACHE_ENTRIES)
+
+
+def _rgb_pixels(pixels):
+    """(M, 3) uint8 copy of the RGB channels of (..., 3 or 4) pixels."""
+    return np.ascontiguousarray(pixels[..., :3].reshape(-1, 3))
+
+
+def _rgb_words(rgb):
+    """Packs (M, 3) RGB rows into comparable uint32 words."""
+    padded = np.zeros((len(rgb), 4), dtype=np.uint8)
+    padded[:, :3] = rgb
+    return padded.view(np.uint32)[:, 0]
+
+
+def _rgb_strip(rgb):
+    return Image.frombytes("RGB", (len(rgb), 1), rgb.tobytes())
+
+
+def quantize_colors(pixels, colors):
+    """
+    Median-cut palette of at most colors entries for pixels, as a (K, 3)
+    uint8 array. Past PALETTE_SAMPLE_PIXELS pixels an evenly spaced sample
+    of them is used.
+    """
+    rgb = pixels[..., :3].reshape(-1, 3)
+    if len(rgb) > PALETTE_SAMPLE_PIXELS:
+        rgb = rgb[:: -(-len(rgb) // PALETTE_SAMPLE_PIXELS)]
+    rgb = np.ascontiguousarray(rgb)
+    if len(rgb) == 0:
+        return np.zeros((0, 3), dtype=np.uint8)
+    unique = np.unique(_rgb_words(rgb))
+    if len(unique) <= colors:
+        return unique.view(np.uint8).reshape(-1, 4)[:, :3].copy()
+    strip = _rgb_strip(rgb)
+    try:
+        quantized = strip.quantize(colors=colors)
+        palette = np.asarray(quantized.getpalette(), dtype=np.uint8).reshape(-1, 3)[:colors]
+        quantized.close()
+    finally:
+        strip.close()
+    return palette
+
+
+def content_palette(pixels, colors, key=None):
+    """quantize_colors for the static content, cached under key when one is given."""
+    if key is None:
+        return quantize_colors(pixels, colors)
+    return _content_palettes.get_or_create((key, colors), lambda: quantize_colors(pixels, colors))
+
+
+def build_global_palette(border_pixels, static_pixels, key=None, colors=PALETTE_MAX_COLORS, border_share=0.0):
+    """
+    One palette for a whole animation: every color the border takes over the
+    loop (quantized down to PALETTE_BORDER_COLORS only when the effect uses
+    more) followed by a palette of the static content. border_pixels are the
+    pixels that change between frames, from every frame; static_pixels the
+    ones that never do. The content part is cached under key, so exporting
+    the same image with another effect reuses it.
+
+    colors caps the whole palette; a smaller one shrinks the border share in
+    proportion. border_share is the fraction of a frame's pixels that change;
+    when the content itself animates it is large, and the changing pixels
+    get at least that fraction of the palette.
+    """
+    colors = max(2, min(int(colors), PALETTE_MAX_COLORS))
+    border_colors = max(1, PALETTE_BORDER_COLORS * colors // PALETTE_MAX_COLORS, round(colors * border_share))
+    border_colors = min(border_colors, colors - 1)
+    border = quantize_colors(border_pixels, border_colors)
+    static = static_pixels if len(static_pixels) else border_pixels
+    content = content_palette(static, colors - border_colors, key)
+    palette = np.concatenate([border, content])
+    # Drop repeated entries, keeping the first; a color must have one index.
+    _unique, first = np.unique(_rgb_words(palette), return_index=True)
+    return palette[np.sort(first)]
+
+
+def map_to_palette(pixels, palette):
+    """
+    Palette index of every pixel, without dithering. Each distinct color is
+    resolved once: exact palette colors by lookup, the rest through Pillow's
+    nearest-color search, then spread back with the inverse index.
+    """
+    rgb = _rgb_pixels(pixels)
+    if len(rgb) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    unique, inverse = np.unique(_rgb_words(rgb), return_inverse=True)
+
+    palette_words = _rgb_words(palette)
+    order = np.argsort(palette_words, kind="stable")
+    sorted_words = palette_words[order]
+    positions = np.minimum(np.searchsorted(sorted_words, unique), len(sorted_words) - 1)
+    exact = sorted_words[positions] == unique
+
+    mapped = np.empty(len(unique), dtype=np.uint8)
+    mapped[exact] = order[positions[exact]]
+    if not exact.all():
+        mapped[~exact] = _nearest_indexes(unique[~exact].view(np.uint8).reshape(-1, 4)[:, :3], palette)
+    return mapped[inverse]
+
+
+def _nearest_indexes(rgb, palette):
+    # Pad with copies of the first entry so no color lands on an unused slot.
+    padded = np.empty((256, 3), dtype=np.uint8)
+    padded[:] = palette[0]
+    padded[: len(palette)] = palette
+    palette_image = Image.new("P", (1, 1))
+    palette_image.putpalette(padded.tobytes())
+
+    strip = _rgb_strip(np.ascontiguousarray(rgb))
+    try:
+        quantized = strip.quantize(palette=palette_image, dither=Image.Dither.NONE)
+        indexes = np.asarray(quantized)[0].copy()
+        quantized.close()
+    finally:
+        strip.close()
+        palette_image.close()
+    indexes[indexes >= len(palette)] = 0
+    return indexes
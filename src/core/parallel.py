@@ -0,0 +1,28 @@
+import concurrent.futures
+from collections import deque
+
+
+def ordered_thread_map(fn, items, threads, window=None):
+    """
+    map(fn, items) on a pool of threads, yielding the results in input order.
+    At most window calls (twice threads by default) are in flight, so a long
+    input never has all of its results in memory; closing the generator
+    cancels what has not started. With one thread it is a plain map in the
+    calling thread.
+    """
+    if threads <= 1:
+        yield from map(fn, items)
+        return
+    window = max(threads, window or threads * 2)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(pool.submit(fn, item))
+                if len(pending) >= window:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,135 @@
+import functools
+import math
+
+import numpy as np
+from PIL import Image
+
+
+# Pillow's 8-bit resampler works in fixed point with this many fractional bits.
+_PRECISION_BITS = 32 - 8 - 2
+_LANCZOS_SUPPORT = 3.0
+
+
+def _sinc(x):
+    if x == 0.0:
+        return 1.0
+    x = x * math.pi
+    return math.sin(x) / x
+
+
+def _lanczos(x):
+    if -3.0 <= x < 3.0:
+        return _sinc(x) * _sinc(x / 3)
+    return 0.0
+
+
+@functools.lru_cache(maxsize=16)
+def _lanczos_coeffs(in_size, out_size, start, stop):
+    """
+    Mirrors Pillow's precompute_coeffs/normalize_coeffs_8bpc for output pixels
+    start..stop of a full-image LANCZOS resize from in_size to out_size.
+    Returns (first source index, kernel indices, fixed-point weights).
+    Cached, since every frame of an animated source has the same geometry;
+    the arrays are read-only.
+    """
+    scale = float(in_size) / out_size
+    filterscale = max(scale, 1.0)
+    support = _LANCZOS_SUPPORT * filterscale
+    ksize = int(math.ceil(support)) * 2 + 1
+    inv = 1.0 / filterscale
+
+    count = stop - start
+    xmins = np.zeros(count, dtype=np.int64)
+    weights = np.zeros((count, ksize), dtype=np.int64)
+    for row, xx in enumerate(range(start, stop)):
+        center = (xx + 0.5) * scale
+        xmin = max(0, int(center - support + 0.5))
+        xmax = min(in_size, int(center + support + 0.5)) - xmin
+
+        values = []
+        total = 0.0
+        for x in range(xmax):
+            w = _lanczos((x + xmin - center + 0.5) * inv)
+            values.append(w)
+            total += w
+        for x, w in enumerate(values):
+            if total != 0.0:
+                w /= total
+            if w < 0:
+                weights[row, x] = int(-0.5 + w * (1 << _PRECISION_BITS))
+            else:
+                weights[row, x] = int(0.5 + w * (1 << _PRECISION_BITS))
+        xmins[row] = xmin
+
+    first = int(xmins.min())
+    last = int(min(in_size, xmins.max() + ksize))
+    indices = np.minimum(xmins[:, None] + np.arange(ksize)[None, :], in_size - 1) - first
+    indices.flags.writeable = False
+    weights.flags.writeable = False
+    return first, last, indices, weights
+
+
+def _convolve(pixels, indices, weights, axis):
+    acc = np.full(
+        pixels.shape[:axis] + (indices.shape[0],) + pixels.shape[axis + 1:],
+        1 << (_PRECISION_BITS - 1),
+        dtype=np.int64,
+    )
+    shape = [1] * pixels.ndim
+    shape[axis] = indices.shape[0]
+    for k in range(indices.shape[1]):
+        column = weights[:, k]
+        if not column.any():
+            continue
+        acc += np.take(pixels, indices[:, k], axis=axis).astype(np.int64) * column.reshape(shape)
+    return np.clip(acc >> _PRECISION_BITS, 0, 255).astype(np.uint8)
+
+
+def resample_region(image, size, window):
+    """
+    Returns image.resize(size, Image.LANCZOS).crop(window) bit for bit, but
+    only reads and resamples the source pixels that feed the window.
+    Supports RGB and RGBA sources.
+    """
+    if image.mode not in ("RGB", "RGBA"):
+        raise ValueError(f"Modo de imagem não suportado para recorte por região: {image.mode}")
+
+    out_w, out_h = size
+    x1, y1, x2, y2 = window
+    src_w, src_h = image.size
+    if (out_w, out_h) == (src_w, src_h):
+        return image.crop(window)
+
+    if out_w == src_w:
+        col_first, col_last, col_indices, col_weights = x1, x2, None, None
+    else:
+        col_first, col_last, col_indices, col_weights = _lanczos_coeffs(src_w, out_w, x1, x2)
+    if out_h == src_h:
+        row_first, row_last, row_indices, row_weights = y1, y2, None, None
+    else:
+        row_first, row_last, row_indices, row_weights = _lanczos_coeffs(src_h, out_h, y1, y2)
+
+    source = image.crop((col_first, row_first, col_last, row_last))
+    try:
+        if source.mode == "RGBA":
+            # Pillow resamples RGBA with premultiplied alpha.
+            premultiplied = source.convert("RGBa")
+            pixels = np.asarray(premultiplied)
+            premultiplied.close()
+        else:
+            pixels = np.asarray(source)
+    finally:
+        source.close()
+
+    if col_indices is not None:
+        pixels = _convolve(pixels, col_indices, col_weights, axis=1)
+    if row_indices is not None:
+        pixels = _convolve(pixels, row_indices, row_weights, axis=0)
+
+    if image.mode == "RGBA":
+        premultiplied = Image.frombuffer("RGBa", (x2 - x1, y2 - y1), np.ascontiguousarray(pixels).tobytes(), "raw", "RGBa", 0, 1)
+        try:
+            return premultiplied.convert("RGBA")
+        finally:
+            premultiplied.close()
+    return Image.fromarray(np.ascontiguousarray(pixels), "RGB")
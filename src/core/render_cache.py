@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import os
+import secrets
+import shutil
+import threading
+
+import numpy as np
+
+from src.config.settings import BORDA_HEIGHT, BORDA_WIDTH, BORDER_THICKNESS, RENDER_CACHE_DIR, RENDER_CACHE_MAX_MB
+from src.core import frame_engine
+from src.core.animation_processor import ANIMATION_DURATIONS
+from src.core.batch_worker import EXPORT_FRAME_COUNTS
+
+
+logger = logging.getLogger(__name__)
+
+
+# Bump when the same task would now render a different file (effects,
+# encoders, palette, resampling), so older cached outputs stop matching.
+RENDER_CACHE_VERSION = 2
+
+# Task fields that decide the output file, besides the source pixels.
+_KEY_FIELDS = (
+    "state",
+    "borda_pos",
+    "anim_type",
+    "border_color",
+    "export_format",
+    "export_preset",
+    "max_bytes",
+    "exact_source",
+)
+
+
+def image_digest(image):
+    """Digest of an in-memory image's mode, size and pixels."""
+    digest = hashlib.blake2b(f"{image.mode}:{image.size}".encode(), digest_size=16)
+    digest.update(np.ascontiguousarray(np.asarray(image)).data)
+    return digest.hexdigest()
+
+
+def _file_digest(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _copy_into_place(source, target):
+    """
+    Copies source to target through a temp file and os.replace, so target
+    is never half written and is always a file of its own. Cache entries are
+    never hard-linked to outputs: the encoders rewrite outputs in place, which
+    would change the entry stored for another key.
+    """
+    temp = f"{target}.{secrets.token_hex(4)}.tmp"
+    try:
+        shutil.copyfile(source, temp)
+        os.replace(temp, target)
+    except OSError:
+        try:
+            os.remove(temp)
+        except OSError:
+            pass
+        raise
+
+
+class RenderCache:
+    """
+    Finished export files on disk, keyed by everything that decides their
+    bytes (see key), so re-exporting a folder only renders the images that
+    changed. Files go in and out as copies (see _copy_into_place).
+    Least recently used entries are dropped past max_bytes.
+    """
+
+    def __init__(self, cache_dir=RENDER_CACHE_DIR, max_bytes=RENDER_CACHE_MAX_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        # (path, size, mtime_ns) -> digest, so unchanged files are read once per session.
+        self._file_digests = {}
+
+    def _source_digest(self, path):
+        stat = os.stat(path)
+        file_key = (path, stat.st_size, stat.st_mtime_ns)
+        digest = self._file_digests.get(file_key)
+        if digest is None:
+            digest = _file_digest(path)
+            self._file_digests[file_key] = digest
+        return digest
+
+    def key(self, task, source_digest=None):
+        """
+        Cache key of a process_image_task task, or None when its source
+        can't be read. source_digest stands in for the file (see image_digest)
+        when the task renders an edited image.
+        """
+        try:
+            source = source_digest or self._source_digest(task.get("source_path") or task["path"])
+        except OSError:
+            return None
+        seed = None
+        if task.get("anim_type") == "Glitch":
+            # The default Glitch pattern follows the path (see process_image_task).
+            seed = task.get("seed")
+            if seed is None:
+                seed = frame_engine.glitch_seed(task["path"])
+        fields = {
+            "version": RENDER_CACHE_VERSION,
+            "source": source,
+            "seed": seed,
+            "frames": [EXPORT_FRAME_COUNTS, ANIMATION_DURATIONS, BORDA_WIDTH, BORDA_HEIGHT, BORDER_THICKNESS],
+            **{name: task.get(name) for name in _KEY_FIELDS},
+        }
+        encoded = json.dumps(fields, sort_keys=True, default=list).encode()
+        return hashlib.blake2b(encoded, digest_size=20).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def fetch(self, key, output_path):
+        """Writes the cached output for key to output_path; False on a miss."""
+        path = self._path(key)
+        with self._lock:
+            if not os.path.isfile(path):
+                return False
+            try:
+                os.utime(path, None)
+                _copy_into_place(path, output_path)
+            except OSError as exc:
+                logger.debug("Falha ao reutilizar render em cache %s: %s", key, exc)
+                return False
+        return True
+
+    def read(self, key):
+        """The cached output for key as bytes, or None on a miss."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                os.utime(path, None)
+                with open(path, "rb") as f:
+                    return f.read()
+            except OSError:
+                return None
+
+    def store(self, key, output_path):
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                _copy_into_place(output_path, self._path(key))
+            except OSError as exc:
+                logger.debug("Falha ao gravar render em cache %s: %s", key, exc)
+                return
+            self._evict()
+
+    def store_bytes(self, key, data):
+        path = self._path(key)
+        temp = f"{path}.{secrets.token_hex(4)}.tmp"
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                with open(temp, "wb") as f:
+                    f.write(data)
+                os.replace(temp, path)
+            except OSError as exc:
+                logger.debug("Falha ao gravar render em cache %s: %s", key, exc)
+                try:
+                    os.remove(temp)
+                except OSError:
+                    pass
+                return
+            self._evict()
+
+    def _evict(self):
+        files = []
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _mtime, size, _path in files)
+        for _mtime, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
@@ -0,0 +1,83 @@
+import concurrent.futures
+import logging
+import threading
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+
+from src.config.settings import FACE_CASCADE_FILE
+# Imported for its side effect: workers unpickle init_render_worker from this
+# module, which loads the whole render stack before the first task.
+from src.core import batch_worker  # noqa: F401
+from src.core.bulk_fit import init_fit_worker
+
+
+logger = logging.getLogger(__name__)
+
+
+def init_render_worker(cascade_path=FACE_CASCADE_FILE):
+    """
+    Pool initializer. Importing this module already brought in the render
+    stack (cv2, numpy, Pillow, batch_worker); this also registers every
+    Pillow plugin and loads the face cascade, so the first task a worker
+    gets starts rendering at once.
+    """
+    Image.init()
+    init_fit_worker(cascade_path)
+
+
+class RenderPool:
+    """
+    Long-lived process pool for batch exports. Workers are started with the
+    first batch and kept warm for the next ones; the pool is rebuilt only
+    when the worker count changes or a worker died. Safe to share between
+    threads.
+    """
+
+    def __init__(self, cascade_path=FACE_CASCADE_FILE):
+        self._cascade_path = cascade_path
+        self._executor = None
+        self._max_workers = None
+        self._lock = threading.Lock()
+
+    @property
+    def max_workers(self):
+        return self._max_workers
+
+    def _executor_for(self, max_workers):
+        with self._lock:
+            if self._executor is not None and self._max_workers != max_workers:
+                logger.info("Recriando pool de render: %s -> %s worker(s)", self._max_workers, max_workers)
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+            if self._executor is None:
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    initializer=init_render_worker,
+                    initargs=(self._cascade_path,),
+                )
+                self._max_workers = max_workers
+            return self._executor
+
+    def _discard(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+                self._max_workers = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def submit(self, max_workers, fn, *args, **kwargs):
+        """executor.submit on a pool of max_workers processes; a broken pool is replaced once."""
+        executor = self._executor_for(max_workers)
+        try:
+            return executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            logger.warning("Pool de render quebrado, iniciando outro.")
+            self._discard(executor)
+            return self._executor_for(max_workers).submit(fn, *args, **kwargs)
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            executor, self._executor, self._max_workers = self._executor, None, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
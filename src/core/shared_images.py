@@ -0,0 +1,81 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+from PIL import Image
+
+from src.core.image_loader import reduce_image
+
+
+# Modes copied as they are; anything else is shared as RGBA.
+_SHARED_MODES = {"L": 1, "LA": 2, "RGB": 3, "RGBA": 4}
+
+
+def _shape(handle):
+    width, height = handle["size"]
+    bands = _SHARED_MODES[handle["mode"]]
+    return (height, width) if bands == 1 else (height, width, bands)
+
+
+class SharedImages:
+    """
+    In-memory images published to the render workers for one batch, as raw
+    pixel buffers in shared memory: no PNG encode in the app and no decode
+    in the worker. share() returns a small picklable handle for the task;
+    release() (or leaving the with block) frees every buffer, so it must
+    run after the batch.
+    """
+
+    def __init__(self):
+        self._segments = []
+
+    def share(self, image):
+        if not isinstance(image, Image.Image):
+            raise TypeError("Edited source image must be a PIL image.")
+        converted = image if image.mode in _SHARED_MODES else image.convert("RGBA")
+        mode = converted.mode
+        try:
+            pixels = np.asarray(converted)
+        finally:
+            if converted is not image:
+                converted.close()
+        segment = shared_memory.SharedMemory(create=True, size=max(1, pixels.nbytes))
+        self._segments.append(segment)
+        np.ndarray(pixels.shape, dtype=np.uint8, buffer=segment.buf)[...] = pixels
+        return {"name": segment.name, "size": image.size, "mode": mode}
+
+    def release(self):
+        segments, self._segments = self._segments, []
+        for segment in segments:
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+
+    def __len__(self):
+        return len(self._segments)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.release()
+
+
+def open_shared_image(handle, min_size=None, min_side=None, reducing_gap=1.0, mode="RGBA"):
+    """
+    The image behind a SharedImages handle, reduced like open_image_at_scale.
+    The pixels are copied out and the shared buffer detached before returning.
+    """
+    segment = shared_memory.SharedMemory(name=handle["name"])
+    try:
+        view = np.ndarray(_shape(handle), dtype=np.uint8, buffer=segment.buf)
+        pixels = view.copy()
+        del view
+    finally:
+        segment.close()
+    image = Image.fromarray(pixels, handle["mode"])
+    try:
+        return reduce_image(image, min_size=min_size, min_side=min_side, reducing_gap=reducing_gap, mode=mode)
+    finally:
+        image.close()
@@ -0,0 +1,159 @@
+import io
+from itertools import islice
+
+from src.config.settings import SIZE_TUNER_MIN_FRAMES, SIZE_TUNER_SAMPLE_FRAMES
+from src.core.anim_export import (
+    DEFAULT_ANIMATION_FORMAT,
+    DEFAULT_ENCODER_PRESET,
+    ENCODER_OPTIONS,
+    resolve_animation_format,
+    resolve_encoder_preset,
+    save_animation,
+)
+from src.core.palette import PALETTE_MAX_COLORS
+
+
+# Share of the effect's frame count tried at each step, largest first.
+FRAME_COUNT_SCALES = (1.0, 0.75, 0.5, 0.34)
+
+# GIF palette sizes tried, largest first.
+GIF_PALETTE_SIZES = (PALETTE_MAX_COLORS, 128, 64, 32)
+
+# Lossy WebP qualities tried after the preset's own, when lower than it.
+WEBP_QUALITIES = (65, 50, 35, 20)
+
+
+def frame_count_steps(frame_count):
+    """Distinct frame counts to try for an effect that normally uses frame_count, largest first."""
+    minimum = min(frame_count, SIZE_TUNER_MIN_FRAMES)
+    counts = []
+    for scale in FRAME_COUNT_SCALES:
+        count = max(minimum, round(frame_count * scale))
+        if count not in counts:
+            counts.append(count)
+    return counts
+
+
+def quality_levels(export_format, preset):
+    """
+    save_animation overrides from best to smallest: palette sizes for GIF,
+    qualities for lossy WebP. Lossless WebP and APNG only have their preset.
+    """
+    if export_format == "gif":
+        return [{"colors": colors} for colors in GIF_PALETTE_SIZES]
+    if export_format == "webp":
+        base = ENCODER_OPTIONS["webp"][preset]["quality"]
+        return [{"quality": base}] + [{"quality": quality} for quality in WEBP_QUALITIES if quality < base]
+    return [{}]
+
+
+def tuning_candidates(frame_count, export_format, preset):
+    """
+    (frame_count, level) pairs in the order they are tried. Frame count and
+    encoder level go down together, so neither reaches its minimum while the
+    other is untouched; between two equally reduced pairs the one with more
+    frames comes first.
+    """
+    counts = frame_count_steps(frame_count)
+    levels = quality_levels(export_format, preset)
+    steps = [(i, j) for i in range(len(counts)) for j in range(len(levels))]
+    steps.sort(key=lambda step: (step[0] + step[1], step[0]))
+    return [(counts[i], levels[j]) for i, j in steps]
+
+
+def scaled_duration(duration, frame_count, count):
+    """Per-frame duration that keeps the loop as long with count frames as with frame_count."""
+    return max(1, round(duration * frame_count / count))
+
+
+def _encode(frames, duration, export_format, preset, palette_key, level):
+    buffer = io.BytesIO()
+    save_animation(frames, buffer, duration, export_format, preset, palette_key, **level)
+    return buffer
+
+
+def _take(frames, count):
+    try:
+        return list(islice(frames, count))
+    finally:
+        close = getattr(frames, "close", None)
+        if close is not None:
+            close()
+
+
+def estimate_size(sample, total_frames, duration, export_format, preset, palette_key=None, level=None):
+    """
+    Expected bytes of a total_frames encode, from sample (its first frames):
+    the first frame is encoded alone and then with the rest of the sample,
+    and the cost of each later frame is extrapolated from the difference.
+    """
+    level = level or {}
+    size = _encode(sample, duration, export_format, preset, palette_key, level).getbuffer().nbytes
+    if len(sample) >= total_frames or len(sample) < 2:
+        return size
+    first = _encode(sample[:1], duration, export_format, preset, palette_key, level).getbuffer().nbytes
+    per_frame = (size - first) / (len(sample) - 1)
+    return int(first + per_frame * (total_frames - 1))
+
+
+def save_within_budget(
+    render,
+    frame_count,
+    duration,
+    output_path,
+    max_bytes,
+    export_format=DEFAULT_ANIMATION_FORMAT,
+    preset=DEFAULT_ENCODER_PRESET,
+    palette_key=None,
+):
+    """
+    Writes the animation to output_path with the best candidate (see
+    tuning_candidates) whose file fits in max_bytes. render(total_frames)
+    returns fresh frames for that frame count; the caller keeps the content
+    resized once, so a trial only composites it over cached border frames.
+
+    Every candidate is sized from a sample encode first and only the ones
+    estimated to fit are encoded in full; a full encode that still misses
+    scales the later estimates by how far off it was. When nothing fits the
+    smallest candidate is written. output_path may be a binary file object.
+    Returns the chosen parameters.
+    """
+    export_format = resolve_animation_format(export_format)
+    preset = resolve_encoder_preset(preset)
+    candidates = tuning_candidates(frame_count, export_format, preset)
+    samples = {}
+    correction = 1.0
+    trials = 0
+
+    for index, (count, level) in enumerate(candidates):
+        count_duration = scaled_duration(duration, frame_count, count)
+        if count not in samples:
+            samples[count] = _take(render(count), SIZE_TUNER_SAMPLE_FRAMES + 1)
+        estimate = estimate_size(samples[count], count, count_duration, export_format, preset, palette_key, level)
+        is_last = index == len(candidates) - 1
+        if estimate * correction > max_bytes and not is_last:
+            continue
+
+        trials += 1
+        buffer = _encode(render(count), count_duration, export_format, preset, palette_key, level)
+        size = buffer.getbuffer().nbytes
+        if size > max_bytes and not is_last:
+            correction = max(correction, size / max(1, estimate))
+            continue
+
+        if hasattr(output_path, "write"):
+            output_path.write(buffer.getbuffer())
+        else:
+            with open(output_path, "wb") as fp:
+                fp.write(buffer.getbuffer())
+        return {
+            "frames": count,
+            "duration": count_duration,
+            "colors": level.get("colors"),
+            "quality": level.get("quality"),
+            "bytes": size,
+            "estimated_bytes": estimate,
+            "max_bytes": max_bytes,
+            "fits": size <= max_bytes,
+            "trials": trials,
+        }
@@ -0,0 +1,141 @@
+import logging
+import queue
+import threading
+
+from src.core.uploader import part_title, upload_batch_size
+
+
+logger = logging.getLogger(__name__)
+
+
+class UploadPipeline:
+    """
+    Uploads a batch export to ImgChest on a background thread while the rest
+    is still rendering. Files are numbered from 0 (image list order) and go
+    into posts of upload_batch_size() in that order whatever order they
+    arrive in: a post is sent as soon as its files and every earlier one are
+    in, so the links come back in image order and the first posts go up
+    while later images render. The first post also waits for one file of
+    the next, so it is only titled "(Part 1)" when the album really has more
+    parts; failed renders never count towards the parts.
+
+    Progress covers both stages on one bar of 2 * total steps: one per
+    rendered image and one per image sent (or dropped because its render
+    failed).
+    """
+
+    def __init__(self, uploader, album_title, total, progress_callback=None, cancel_event=None, privacy="hidden"):
+        self.uploader = uploader
+        self.album_title = album_title
+        self.total = total
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        self.privacy = privacy
+        self.batch_size = upload_batch_size()
+        self.links = []
+        self.errors = []
+        self.uploaded = 0
+        self.rendered = 0
+        self.handled = 0
+        self.batches_sent = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="imgchest-upload", daemon=True)
+        self._progress_lock = threading.Lock()
+        self._aborted = False
+        self._cancel_noted = False
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def put(self, index, path, filename):
+        self._queue.put((index, {"path": path, "filename": filename}))
+
+    def skip(self, index):
+        """Marks a file that will never come (its render failed)."""
+        self._queue.put((index, None))
+
+    def render_progress(self, completed, _total, _message=None):
+        """on_progress for the render stage."""
+        with self._progress_lock:
+            self.rendered = completed
+            self._report(f"Processando {self.rendered}/{self.total} - enviadas {self.uploaded}/{self.total}")
+
+    def close(self):
+        """Waits until every file put so far is uploaded; returns (links, errors)."""
+        self._queue.put(None)
+        self._thread.join()
+        return self.links, self.errors
+
+    def abort(self):
+        """Stops after the post in flight; files not sent yet are dropped."""
+        self._aborted = True
+        self._queue.put(None)
+        self._thread.join()
+        return self.links, self.errors
+
+    def _report(self, message):
+        if self.progress_callback:
+            self.progress_callback(self.rendered + self.handled, 2 * self.total, message)
+
+    def _send(self, items, remaining):
+        """Uploads items as the next post; remaining is how many files may still follow it."""
+        if self._aborted:
+            return
+        if self.cancel_event and self.cancel_event.is_set():
+            if not self._cancel_noted:
+                self._cancel_noted = True
+                self.errors.append("Upload cancelado pelo usuario.")
+            return
+        self.batches_sent += 1
+        batch_num = self.batches_sent
+        # Exact once no render is outstanding; until then it assumes they all succeed.
+        total_batches = batch_num + (remaining + self.batch_size - 1) // self.batch_size
+        with self._progress_lock:
+            self._report(f"Enviando lote {batch_num}/{total_batches} - processadas {self.rendered}/{self.total}")
+        links, errors = self.uploader.upload_batch(
+            items,
+            part_title(self.album_title, batch_num, total_batches),
+            batch_num,
+            privacy=self.privacy,
+            cancel_event=self.cancel_event,
+        )
+        self.links.extend(links)
+        self.errors.extend(errors)
+        self.uploaded += len(items)
+        with self._progress_lock:
+            self.handled += len(items)
+            self._report(f"Processando {self.rendered}/{self.total} - enviadas {self.uploaded}/{self.total}")
+
+    def _run(self):
+        ready = {}
+        next_index = 0
+        batch = []
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None or self._aborted:
+                    break
+                index, entry = item
+                ready[index] = entry
+                while next_index in ready:
+                    entry = ready.pop(next_index)
+                    next_index += 1
+                    if entry is None:
+                        with self._progress_lock:
+                            self.handled += 1
+                        continue
+                    batch.append(entry)
+                    if len(batch) > self.batch_size or (self.batches_sent and len(batch) == self.batch_size):
+                        rest = batch[self.batch_size :]
+                        self._send(batch[: self.batch_size], len(rest) + self.total - next_index)
+                        batch = rest
+            if not self._aborted:
+                # Files after a gap that was never filled (cancelled renders).
+                batch.extend(ready[index] for index in sorted(ready) if ready[index] is not None)
+                for start in range(0, len(batch), self.batch_size):
+                    end = start + self.batch_size
+                    self._send(batch[start:end], max(0, len(batch) - end))
+        except Exception as exc:
+            logger.exception("Falha no envio para o ImgChest: %s", exc)
+            self.errors.append(f"Upload: {exc}")
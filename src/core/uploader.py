@@ -12,6 +12,21 @@ from src.config.settings import IMG_CHEST_API_TOKEN, UPLOAD_BATCH_SIZE
 logger = logging.getLogger(__name__)
 
 
+def upload_batch_size():
+    """Images per ImgChest post: UPLOAD_BATCH_SIZE clamped to what the API takes."""
+    try:
+        return min(max(1, int(UPLOAD_BATCH_SIZE)), 20)
+    except (ValueError, TypeError):
+        return 20
+
+
+def part_title(album_title, batch_num, total_batches):
+    title = f"{album_title} (Part {batch_num})" if total_batches > 1 else album_title
+    if len(title) < 3:
+        title = f"Upload_{batch_num}"
+    return title
+
+
 class ImgChestUploader:
     def __init__(self, api_token=None, session: requests.Session = None):
         self.api_token = api_token or IMG_CHEST_API_TOKEN
@@ -59,16 +74,11 @@ class ImgChestUploader:
         if not self.api_token:
             raise ValueError("Token da API ImgChest nao configurado.")
 
-        headers = {"Authorization": f"Bearer {self.api_token}"}
         total_images = len(images_data)
         if total_images == 0:
             return [], []
 
-        try:
-            batch_size = min(max(1, int(UPLOAD_BATCH_SIZE)), 20)
-        except (ValueError, TypeError):
-            batch_size = 20
-
+        batch_size = upload_batch_size()
         all_uploaded_links: List[str] = []
         errors: List[str] = []
         total_processed = 0
@@ -86,88 +96,110 @@ class ImgChestUploader:
                 progress_callback(total_processed, total_images, f"Enviando lote {batch_num}/{total_batches}...")
 
             try:
-                title_part = f"{album_title} (Part {batch_num})" if total_batches > 1 else album_title
-                if len(title_part) < 3:
-                    title_part = f"Upload_{batch_num}"
-
-                payload = {
-                    "title": title_part,
-                    "privacy": privacy,
-                    "anonymous": "1",
-                    "nsfw": "1",
-                }
-
-                batch_uploaded = False
-                last_exc = None
-
-                for attempt in range(retries + 1):
-                    if cancel_event and cancel_event.is_set():
-                        errors.append(f"Lote {batch_num}: cancelado pelo usuario.")
-                        batch_uploaded = True
-                        break
+                links, batch_errors = self.upload_batch(
+                    batch_items,
+                    part_title(album_title, batch_num, total_batches),
+                    batch_num,
+                    privacy=privacy,
+                    retries=retries,
+                    cancel_event=cancel_event,
+                )
+                all_uploaded_links.extend(links)
+                errors.extend(batch_errors)
+            finally:
+                total_processed += len(batch_items)
+                if progress_callback:
+                    progress_callback(total_processed, total_images, "Processando...")
+
+        return all_uploaded_links, errors
 
-                    files_payload = []
-                    try:
-                        with contextlib.ExitStack() as stack:
-                            for item in batch_items:
-                                f = stack.enter_context(open(item["path"], "rb"))
-                                filename = item["filename"]
-                                content_type = item.get("content_type") or self._guess_content_type(filename)
-                                files_payload.append(("images[]", (filename, f, content_type)))
-
-                            response = self.session.post(
-                                "https://api.imgchest.com/v1/post",
-                                headers=headers,
-                                files=files_payload,
-                                data=payload,
-                                timeout=120,
-                            )
-
-                        if response.status_code == 200:
-                            try:
-                                data = response.json()
-                            except ValueError:
-                                err = f"Lote {batch_num}: resposta não é JSON válido."
-                                logger.warning("%s body=%s", err, response.text[:200])
-                                errors.append(err)
-                                batch_uploaded = True
-                                break
-
-                            images = (data.get("data") or {}).get("images") or []
-                            batch_links = [img["link"] for img in images if "link" in img]
-                            if batch_links:
-                                all_uploaded_links.extend(batch_links)
-                                batch_uploaded = True
-                                break
-
-                            err = f"Lote {batch_num}: upload aceito mas nenhum link retornado."
-                            logger.warning("%s data=%s", err, data)
+    def upload_batch(self, batch_items, title, batch_num=1, privacy="hidden", retries=2, cancel_event=None):
+        """
+        Uploads one batch as one ImgChest post, retrying transient failures.
+        batch_items as in upload_images. Returns (links, errors); links are
+        in batch_items order.
+        """
+        if not self.api_token:
+            raise ValueError("Token da API ImgChest nao configurado.")
+
+        headers = {"Authorization": f"Bearer {self.api_token}"}
+        links: List[str] = []
+        errors: List[str] = []
+        try:
+            payload = {
+                "title": title,
+                "privacy": privacy,
+                "anonymous": "1",
+                "nsfw": "1",
+            }
+
+            batch_uploaded = False
+            last_exc = None
+
+            for attempt in range(retries + 1):
+                if cancel_event and cancel_event.is_set():
+                    errors.append(f"Lote {batch_num}: cancelado pelo usuario.")
+                    batch_uploaded = True
+                    break
+
+                files_payload = []
+                try:
+                    with contextlib.ExitStack() as stack:
+                        for item in batch_items:
+                            f = stack.enter_context(open(item["path"], "rb"))
+                            filename = item["filename"]
+                            content_type = item.get("content_type") or self._guess_content_type(filename)
+                            files_payload.append(("images[]", (filename, f, content_type)))
+
+                        response = self.session.post(
+                            "https://api.imgchest.com/v1/post",
+                            headers=headers,
+                            files=files_payload,
+                            data=payload,
+                            timeout=120,
+                        )
+
+                    if response.status_code == 200:
+                        try:
+                            data = response.json()
+                        except ValueError:
+                            err = f"Lote {batch_num}: resposta não é JSON válido."
+                            logger.warning("%s body=%s", err, response.text[:200])
                             errors.append(err)
                             batch_uploaded = True
                             break
 
-                        err = f"Lote {batch_num} falhou - HTTP {response.status_code}: {response.text[:200]}"
-                        logger.error(err)
-                        if not self._is_retryable_http_status(response.status_code):
-                            errors.append(err)
+                        images = (data.get("data") or {}).get("images") or []
+                        batch_links = [img["link"] for img in images if "link" in img]
+                        if batch_links:
+                            links.extend(batch_links)
                             batch_uploaded = True
                             break
-                        last_exc = RuntimeError(err)
-                    except Exception as exc:
-                        last_exc = exc
-                        logger.warning("Erro no lote %s tentativa %s/%s: %s", batch_num, attempt + 1, retries + 1, exc)
-
-                    if attempt < retries:
-                        time.sleep(1.0 * (attempt + 1))
-
-                if not batch_uploaded and last_exc:
-                    errors.append(f"Lote {batch_num}: {last_exc}")
-            except Exception as exc:
-                logger.exception("Excecao no lote %s: %s", batch_num, exc)
-                errors.append(f"Lote {batch_num}: {exc}")
-            finally:
-                total_processed += len(batch_items)
-                if progress_callback:
-                    progress_callback(total_processed, total_images, "Processando...")
 
-        return all_uploaded_links, errors
+                        err = f"Lote {batch_num}: upload aceito mas nenhum link retornado."
+                        logger.warning("%s data=%s", err, data)
+                        errors.append(err)
+                        batch_uploaded = True
+                        break
+
+                    err = f"Lote {batch_num} falhou - HTTP {response.status_code}: {response.text[:200]}"
+                    logger.error(err)
+                    if not self._is_retryable_http_status(response.status_code):
+                        errors.append(err)
+                        batch_uploaded = True
+                        break
+                    last_exc = RuntimeError(err)
+                except Exception as exc:
+                    last_exc = exc
+                    logger.warning("Erro no lote %s tentativa %s/%s: %s", batch_num, attempt + 1, retries + 1, exc)
+
+                if attempt < retries:
+                    time.sleep(1.0 * (attempt + 1))
+
+            if not batch_uploaded and last_exc:
+                errors.append(f"Lote {batch_num}: {last_exc}")
+        except Exception as exc:
+            logger.exception("Excecao no lote %s: %s", batch_num, exc)
+            errors.append(f"Lote {batch_num}: {exc}")
+        return links, errors
+
@@ -0,0 +1,101 @@
+import logging
+import os
+import queue
+import threading
+import zipfile
+
+
+logger = logging.getLogger(__name__)
+
+
+# Formats that are compressed already; deflating them again only costs time.
+STORED_EXTENSIONS = (".png", ".gif", ".webp", ".jpg", ".jpeg")
+
+
+def zip_compression(filename):
+    if filename.lower().endswith(STORED_EXTENSIONS):
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+class ZipStreamWriter:
+    """
+    Writes a ZIP on a background thread while its entries are still being
+    produced. Entries are numbered from 0 and land in the archive in
+    that order whatever order they arrive in: each is written as soon as
+    every earlier one was written or skipped, so only out-of-order entries
+    wait in memory.
+    """
+
+    def __init__(self, target_file):
+        self.target_file = target_file
+        self.written = 0
+        self.error = None
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="zip-writer", daemon=True)
+        self._aborted = False
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def put(self, index, filename, data):
+        self._queue.put((index, filename, data))
+
+    def skip(self, index):
+        """Marks an entry that will never come (its render failed)."""
+        self._queue.put((index, None, None))
+
+    def close(self):
+        """
+        Waits until every entry put so far is written; returns how many were.
+        If writing failed (disk full, ...), the partial archive is removed and
+        the error re-raised.
+        """
+        self._queue.put(None)
+        self._thread.join()
+        if self.error is not None:
+            self._remove_target()
+            raise self.error
+        return self.written
+
+    def abort(self):
+        """Stops writing and removes the partial archive."""
+        self._aborted = True
+        self._queue.put(None)
+        self._thread.join()
+        self._remove_target()
+
+    def _remove_target(self):
+        try:
+            os.remove(self.target_file)
+        except OSError:
+            pass
+
+    def _run(self):
+        ready = {}
+        next_index = 0
+        try:
+            with zipfile.ZipFile(self.target_file, "w") as archive:
+                while True:
+                    item = self._queue.get()
+                    if item is None or self._aborted:
+                        break
+                    index, filename, data = item
+                    ready[index] = (filename, data)
+                    while next_index in ready:
+                        filename, data = ready.pop(next_index)
+                        if filename is not None:
+                            archive.writestr(filename, data, compress_type=zip_compression(filename))
+                            self.written += 1
+                        next_index += 1
+                if ready and not self._aborted:
+                    # Entries after a gap that was never filled (cancelled renders).
+                    for index in sorted(ready):
+                        filename, data = ready[index]
+                        if filename is not None:
+                            archive.writestr(filename, data, compress_type=zip_compression(filename))
+                            self.written += 1
+        except Exception as exc:
+            logger.exception("Falha ao escrever o ZIP %s: %s", self.target_file, exc)
+            self.error = exc
@@ -34,6 +34,7 @@ try:
         QDialogButtonBox,
         QScrollArea,
         QSizePolicy,
+        QSpinBox,
         QSplitter,
         QStatusBar,
         QTabWidget,
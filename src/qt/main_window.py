@@ -1,12 +1,25 @@
+import logging
 import os
 from collections import OrderedDict
 
 from PIL import Image, ImageGrab
 
-from src.config.settings import BORDA_HEIGHT, BORDA_HEX, BORDA_WIDTH, BORDER_THICKNESS, SUPPORTED_EXTENSIONS
+from src.config.settings import (
+    BORDA_HEIGHT,
+    BORDA_HEX,
+    BORDA_WIDTH,
+    BORDER_THICKNESS,
+    FACE_DETECTION_WORKING_SIZE,
+    SUPPORTED_EXTENSIONS,
+)
 from src.controllers.batch_controller import BatchController
+from src.core import frame_engine
 from src.core.animation_processor import AnimationProcessor
+from src.core.bulk_fit import iter_fit_results
 from src.core.editor_state import EditorState, UiPreferences
+from src.core.face_index import FaceIndex, FaceRecord
+from src.core.image_loader import open_image_at_scale
+from src.core.image_probe import probe_image, probe_images
 from src.core.image_processor import ImageProcessor
 from src.core.preset_manager import PresetManager
 from src.core.uploader import ImgChestUploader
@@ -42,6 +55,13 @@ if QT_AVAILABLE:
     )
 
 
+logger = logging.getLogger(__name__)
+
+
+# Detections are written to the face index in batches of this size.
+FACE_INDEX_FLUSH_EVERY = 50
+
+
 if QT_AVAILABLE:
     class QtMainWindow(QMainWindow):
         def __init__(self, app_config):
@@ -52,6 +72,7 @@ if QT_AVAILABLE:
             self.preset_manager = PresetManager()
             self.uploader = ImgChestUploader()
             self.face_cascade = ImageProcessor.load_face_cascade()
+            self.face_index = FaceIndex(working_size=self._face_detection_working_size())
             self.task_runner = QtTaskRunner(self)
             self.edited_images = {}
             self.batch_controller = BatchController(
@@ -147,6 +168,8 @@ if QT_AVAILABLE:
                 ("Alt+B", self.apply_auto_fit),
                 ("Ctrl+Q", lambda: self.rotate_current_image("left")),
                 ("Ctrl+E", lambda: self.rotate_current_image("right")),
+                ("Alt+H", lambda: self.flip_current_image("horizontal")),
+                ("Alt+V", lambda: self.flip_current_image("vertical")),
                 ("Ctrl+Z", self.undo_current_image),
                 ("Ctrl+V", self.paste_image),
             ]
@@ -225,6 +248,15 @@ if QT_AVAILABLE:
             else:
                 self.show_info(title, message)
 
+        def _ensure_current_original(self):
+            # Full-resolution pixels are only needed for edits, so they load on demand.
+            if self.current_original_image is None and self.current_path:
+                try:
+                    self.current_original_image = open_image_at_scale(self.current_path)
+                except Exception as exc:
+                    self.show_status(f"Falha ao abrir original: {exc}")
+            return self.current_original_image
+
         def _close_current_original(self):
             if self.current_original_image is not None:
                 try:
@@ -274,6 +306,19 @@ if QT_AVAILABLE:
                 except Exception:
                     pass
 
+        def _drop_preview_cache_entry(self, path):
+            cached_preview = self._preview_cache.pop(path, None)
+            if cached_preview is None:
+                return
+            self._preview_cache_current_bytes = max(
+                0,
+                self._preview_cache_current_bytes - self._estimate_image_bytes(cached_preview),
+            )
+            try:
+                cached_preview.close()
+            except Exception:
+                pass
+
         def _clear_preview_cache(self):
             while self._preview_cache:
                 _, image = self._preview_cache.popitem(last=False)
@@ -308,14 +353,28 @@ if QT_AVAILABLE:
 
         @staticmethod
         def _dispose_image_load_result(result):
-            for key in ("original", "preview"):
-                image = result.get(key)
-                if image is None:
-                    continue
-                try:
-                    image.close()
-                except Exception:
-                    pass
+            image = result.get("preview")
+            if image is None:
+                return
+            try:
+                image.close()
+            except Exception:
+                pass
+
+        def _face_detection_working_size(self):
+            return self.app_config.get("face_detection_working_size", FACE_DETECTION_WORKING_SIZE)
+
+        def _detect_face_record(self, path, image):
+            """
+            Detects faces on image (a possibly downscaled copy of the unedited
+            file at path) and returns the record in full-resolution coordinates.
+            """
+            source_size = probe_image(path).size
+            best, candidates = ImageProcessor.detect_anime_faces(
+                image, self.face_cascade, self.face_index.working_size, source_size=source_size
+            )
+            record = FaceRecord(source_size=image.size, best=best, candidates=candidates)
+            return record.scaled_to(source_size)
 
         def _preview_max_dimension(self):
             viewport = self.image_canvas.viewport().size()
@@ -326,25 +385,21 @@ if QT_AVAILABLE:
             if cancel_event and cancel_event.is_set():
                 return {"cancelled": True, "index": index, "path": path}
 
-            with Image.open(path) as source:
-                original = source.convert("RGBA")
-
             preview = None
             if include_preview:
-                preview = ImageProcessor.resize_image(original, preview_max_dim, preview_max_dim)
-                if preview is original:
-                    preview = original.copy()
+                loaded = open_image_at_scale(path, min_side=preview_max_dim)
+                preview = ImageProcessor.resize_image(loaded, preview_max_dim, preview_max_dim)
+                if preview is not loaded:
+                    loaded.close()
 
             if cancel_event and cancel_event.is_set():
-                result = {"original": original, "preview": preview}
-                self._dispose_image_load_result(result)
+                self._dispose_image_load_result({"preview": preview})
                 return {"cancelled": True, "index": index, "path": path}
 
             return {
                 "cancelled": False,
                 "index": index,
                 "path": path,
-                "original": original,
                 "preview": preview,
             }
 
@@ -356,6 +411,9 @@ if QT_AVAILABLE:
                 lower_path = path.lower()
                 if os.path.isfile(path) and lower_path.endswith(SUPPORTED_EXTENSIONS):
                     valid_paths.append(path)
+            # Header-only probe: drops unreadable files and warms the cache used by fits and export.
+            probed = probe_images(valid_paths)
+            valid_paths = [path for path in valid_paths if path in probed]
 
             if replace:
                 self.editor_state.reset_images()
@@ -409,7 +467,7 @@ if QT_AVAILABLE:
         def get_active_image_copy(self):
             if not self.current_path:
                 return None
-            image = self.edited_images.get(self.current_path) or self.current_original_image
+            image = self.edited_images.get(self.current_path) or self._ensure_current_original()
             if image is None:
                 image = self._get_preview_cache_copy(self.current_path)
                 if image is None:
@@ -422,10 +480,15 @@ if QT_AVAILABLE:
                 return None
             return image.copy()
 
-        def set_edited_image_for_current(self, image):
+        def set_edited_image_for_current(self, image, face_geometry=None):
+            """face_geometry is the FaceRecord of the new pixels, when known (rotate/flip)."""
             if not self.current_path:
                 return
             self.edited_images[self.current_path] = image.copy()
+            if face_geometry is not None:
+                self.editor_state.face_geometry[self.current_path] = face_geometry
+            else:
+                self.editor_state.face_geometry.pop(self.current_path, None)
             self._remember_preview_cache(self.current_path, self.edited_images[self.current_path])
             state = self.editor_state.image_states.get(self.current_path)
             self.image_canvas.set_image(
@@ -438,15 +501,24 @@ if QT_AVAILABLE:
         def save_state_for_undo(self):
             if not self.current_path:
                 return
-            image = self.get_active_image_copy()
-            if image is None:
+            # Unedited images snapshot as None ("back to the file on disk") so a
+            # drag never forces a full-resolution decode and copy.
+            edited = self.edited_images.get(self.current_path)
+            image = edited.copy() if edited is not None else None
+            reference = image or self._get_preview_cache_copy(self.current_path)
+            if reference is None:
                 return
-            state = self.editor_state.image_states.get(self.current_path) or self._ensure_state_for_current(image)
-            snapshot = (
-                image,
-                tuple(state.get("pos", self.editor_state.borda_pos)),
-                tuple(state.get("size", image.size)),
-            )
+            try:
+                state = self.editor_state.image_states.get(self.current_path) or self._ensure_state_for_current(reference)
+                snapshot = (
+                    image,
+                    tuple(state.get("pos", self.editor_state.borda_pos)),
+                    tuple(state.get("size", reference.size)),
+                    self.editor_state.face_geometry.get(self.current_path) if image is not None else None,
+                )
+            finally:
+                if reference is not image:
+                    reference.close()
             stack = self._undo_stacks.setdefault(self.current_path, [])
             stack.append(snapshot)
             while len(stack) > 20:
@@ -460,18 +532,31 @@ if QT_AVAILABLE:
             if not stack:
                 self.show_status("Nada para desfazer.")
                 return
-            image, pos, size = stack.pop()
-            previous = self.edited_images.get(self.current_path)
+            image, pos, size, face_geometry = stack.pop()
+            previous = self.edited_images.pop(self.current_path, None)
             if previous is not None:
                 self._dispose_images([previous])
-            self.edited_images[self.current_path] = image.copy()
-            self._remember_preview_cache(self.current_path, self.edited_images[self.current_path])
+            if face_geometry is not None:
+                self.editor_state.face_geometry[self.current_path] = face_geometry
+            else:
+                self.editor_state.face_geometry.pop(self.current_path, None)
+            if image is not None:
+                self.edited_images[self.current_path] = image.copy()
+                self._remember_preview_cache(self.current_path, self.edited_images[self.current_path])
+                display_image = self.edited_images[self.current_path]
+            else:
+                if previous is not None:
+                    self._drop_preview_cache_entry(self.current_path)
+                display_image = self._get_preview_cache_copy(self.current_path) or self.get_active_image_copy()
             self.editor_state.set_image_state(self.current_path, pos, size)
-            self.image_canvas.set_image(
-                self.edited_images[self.current_path],
-                state={"pos": pos, "size": size},
-                border_color=self.editor_state.resolve_border_hex(BORDA_HEX, self.current_path),
-            )
+            if display_image is not None:
+                self.image_canvas.set_image(
+                    display_image,
+                    state={"pos": pos, "size": size},
+                    border_color=self.editor_state.resolve_border_hex(BORDA_HEX, self.current_path),
+                )
+                if display_image is not self.edited_images.get(self.current_path):
+                    self._dispose_images([display_image])
             self._dispose_images([image])
             self._update_preview_animation()
             self.show_status("Ultima alteracao desfeita.")
@@ -482,7 +567,13 @@ if QT_AVAILABLE:
             state = self.editor_state.image_states.get(self.current_path)
             if state:
                 return state
-            fit = ImageProcessor.calculate_auto_fit_pos(image, self.editor_state.borda_pos)
+            reference = image
+            if self.current_path not in self.edited_images:
+                try:
+                    reference = probe_image(self.current_path)
+                except (OSError, ValueError):
+                    reference = image
+            fit = ImageProcessor.calculate_auto_fit_pos(reference, self.editor_state.borda_pos)
             if fit:
                 new_w, new_h, pos_x, pos_y = fit
                 state = {"pos": (pos_x, pos_y), "size": (new_w, new_h)}
@@ -539,9 +630,6 @@ if QT_AVAILABLE:
                     self._dispose_image_load_result(result)
                     return
 
-                self._close_current_original()
-                self.current_original_image = result.get("original")
-
                 preview = result.get("preview")
                 if preview is not None:
                     self._remember_preview_cache(path, preview)
@@ -551,7 +639,7 @@ if QT_AVAILABLE:
                         pass
 
                 refreshed_image = self.edited_images.get(path) or self._get_preview_cache_copy(path)
-                if refreshed_image is None and self.current_original_image is not None:
+                if refreshed_image is None and self._ensure_current_original() is not None:
                     refreshed_image = ImageProcessor.resize_image(self.current_original_image, preview_max_dim, preview_max_dim)
                     if refreshed_image is self.current_original_image:
                         refreshed_image = self.current_original_image.copy()
@@ -617,14 +705,61 @@ if QT_AVAILABLE:
             self.image_canvas.set_image_state((pos_x, pos_y), (new_w, new_h))
             self.show_status("Auto fit aplicado.")
 
+        def _current_face_record(self):
+            """Known face rects for the current pixels, without decoding or detecting."""
+            if not self.current_path or self.face_cascade is None:
+                return None
+            edited = self.edited_images.get(self.current_path)
+            if edited is None:
+                return self.face_index.lookup(self.current_path)
+            record = self.editor_state.face_geometry.get(self.current_path)
+            if record is not None and tuple(record.source_size) != tuple(edited.size):
+                record = record.scaled_to(edited.size)
+            return record
+
         def apply_intelligent_fit(self, push_undo=True):
-            image = self.get_active_image_copy()
+            image = None
+            face = None
+            edited = self.edited_images.get(self.current_path) if self.current_path else None
+            if edited is not None and self.face_cascade is not None:
+                record = self._current_face_record()
+                if record is None:
+                    best, candidates = ImageProcessor.detect_anime_faces(
+                        edited,
+                        self.face_cascade,
+                        self._face_detection_working_size(),
+                    )
+                    record = FaceRecord(source_size=edited.size, best=best, candidates=candidates)
+                    self.editor_state.face_geometry[self.current_path] = record
+                # Fit math only needs the dimensions of the edited pixels.
+                image = edited
+                face = record.best
+            elif self.current_path and self.face_cascade is not None:
+                record = self.face_index.lookup(self.current_path)
+                if record is None:
+                    # The preview is never smaller than the detection working
+                    # size, so unedited images skip the full-resolution decode.
+                    preview = self._get_preview_cache_copy(self.current_path)
+                    if preview is None:
+                        preview = self.get_active_image_copy()
+                    if preview is not None:
+                        try:
+                            record = self._detect_face_record(self.current_path, preview)
+                        finally:
+                            self._dispose_images([preview])
+                        self.face_index.store(self.current_path, record)
+                if record is not None:
+                    image = probe_image(self.current_path)
+                    face = record.best
+            if image is None:
+                image = self.get_active_image_copy()
+                if image is not None:
+                    face = ImageProcessor.detect_anime_face(image, self.face_cascade, self._face_detection_working_size())
             if image is None or not self.current_path:
                 self.show_warning("Ajuste", "Carregue uma imagem primeiro.")
                 return
             if push_undo:
                 self.save_state_for_undo()
-            face = ImageProcessor.detect_anime_face(image, self.face_cascade)
             if not face:
                 self.show_warning("Ajuste", "Nenhum rosto detectado. Aplicando auto fit.")
                 self.apply_auto_fit(push_undo=False)
@@ -638,17 +773,39 @@ if QT_AVAILABLE:
             self.image_canvas.set_image_state((pos_x, pos_y), (new_w, new_h))
             self.show_status("Ajuste inteligente aplicado.")
 
-        def rotate_current_image(self, direction):
+        def _transpose_current_image(self, method):
+            """Applies a lossless rotate/flip and carries the face rects along analytically."""
             image = self.get_active_image_copy()
             if image is None or not self.current_path:
-                return
+                return False
             self.save_state_for_undo()
-            angle = 90 if direction == "left" else -90
-            rotated = image.rotate(angle, expand=True)
-            self.set_edited_image_for_current(rotated)
+            record = self._current_face_record()
+            if record is not None:
+                record = record.scaled_to(image.size).transposed(method)
+            try:
+                transformed = image.transpose(method)
+            finally:
+                image.close()
+            try:
+                self.set_edited_image_for_current(transformed, face_geometry=record)
+            finally:
+                transformed.close()
+            return True
+
+        def rotate_current_image(self, direction):
+            method = Image.Transpose.ROTATE_90 if direction == "left" else Image.Transpose.ROTATE_270
+            if not self._transpose_current_image(method):
+                return
             self.apply_auto_fit(push_undo=False)
             self.show_status(f"Prévia rotacionada para {direction}.")
 
+        def flip_current_image(self, axis):
+            method = Image.Transpose.FLIP_LEFT_RIGHT if axis == "horizontal" else Image.Transpose.FLIP_TOP_BOTTOM
+            if not self._transpose_current_image(method):
+                return
+            self.apply_auto_fit(push_undo=False)
+            self.show_status("Prévia espelhada.")
+
         def apply_preset(self, data):
             border_name = data.get("border_name", self.editor_state.selected_borda)
             if border_name in BORDA_HEX or border_name == "Cor Personalizada":
@@ -668,46 +825,84 @@ if QT_AVAILABLE:
                 self.show_warning("Ajuste", "Nenhuma imagem carregada.")
                 return
 
+            working_size = self._face_detection_working_size()
+            use_face_detection = adjustment_name != "auto_fit" and self.face_cascade is not None
+            borda_pos = self.editor_state.borda_pos
+
             def task_fn(cancel_event, on_progress):
-                updated = 0
-                total = len(self.editor_state.image_list)
-                for index, path in enumerate(self.editor_state.image_list, start=1):
-                    if cancel_event and cancel_event.is_set():
-                        break
+                image_list = list(self.editor_state.image_list)
+                total = len(image_list)
+                progress = {"completed": 0, "updated": 0}
+                message = "Aplicando ajuste em lote..."
+
+                def apply_result(path, result):
+                    if result:
+                        new_w, new_h, pos_x, pos_y = result
+                        self.editor_state.set_image_state(path, (pos_x, pos_y), (new_w, new_h))
+                        progress["updated"] += 1
+                    progress["completed"] += 1
+                    if on_progress:
+                        on_progress(progress["completed"], total, message)
 
-                    working = self.edited_images.get(path)
-                    should_close = False
-                    if working is None:
-                        with Image.open(path) as source:
-                            working = source.convert("RGBA")
-                        should_close = True
+                records = {}
+                if use_face_detection:
+                    # One indexed lookup answers every file analysed before.
+                    records = self.face_index.lookup_many(
+                        [path for path in image_list if path not in self.edited_images]
+                    )
 
-                    try:
-                        if adjustment_name == "auto_fit":
-                            result = ImageProcessor.calculate_auto_fit_pos(working, self.editor_state.borda_pos)
+                pending = []
+                for path in image_list:
+                    if cancel_event and cancel_event.is_set():
+                        return {"updated": progress["updated"]}
+
+                    edited = self.edited_images.get(path)
+                    if edited is not None:
+                        record = self.editor_state.face_geometry.get(path)
+                        if record is not None and tuple(record.source_size) != tuple(edited.size):
+                            record = record.scaled_to(edited.size)
+                    else:
+                        record = records.get(path)
+                    if use_face_detection and record is None:
+                        task = {"path": path, "borda_pos": borda_pos, "working_size": working_size}
+                        if edited is not None:
+                            task["image"] = edited
+                        pending.append(task)
+                        continue
+
+                    # Auto fit and known rects only need the dimensions.
+                    working = edited if edited is not None else probe_image(path)
+                    result = None
+                    if record is not None and record.best:
+                        result = ImageProcessor.calculate_intelligent_frame_pos(working, record.best, borda_pos)
+                    if not result:
+                        result = ImageProcessor.calculate_auto_fit_pos(working, borda_pos)
+                    apply_result(path, result)
+
+                new_records = []
+                try:
+                    for fitted in iter_fit_results(
+                        pending,
+                        max_workers=self.app_config.get("max_workers"),
+                        cancel_event=cancel_event,
+                    ):
+                        if fitted.get("status") != "success":
+                            logger.warning("Ajuste inteligente falhou em %s: %s", fitted.get("path"), fitted.get("error"))
+                            apply_result(fitted.get("path"), None)
+                            continue
+                        apply_result(fitted["path"], fitted["fit"])
+                        if fitted["path"] in self.edited_images:
+                            self.editor_state.face_geometry[fitted["path"]] = fitted["record"]
                         else:
-                            face = ImageProcessor.detect_anime_face(working, self.face_cascade)
-                            if face:
-                                result = ImageProcessor.calculate_intelligent_frame_pos(
-                                    working,
-                                    face,
-                                    self.editor_state.borda_pos,
-                                )
-                            else:
-                                result = ImageProcessor.calculate_auto_fit_pos(working, self.editor_state.borda_pos)
-                        if result:
-                            new_w, new_h, pos_x, pos_y = result
-                            self.editor_state.set_image_state(path, (pos_x, pos_y), (new_w, new_h))
-                            updated += 1
-                    finally:
-                        if should_close:
-                            self._dispose_images([working])
-
-                    if on_progress:
-                        message = "Aplicando ajuste em lote..."
-                        on_progress(index, total, message)
+                            new_records.append((fitted["path"], fitted["record"]))
+                        if len(new_records) >= FACE_INDEX_FLUSH_EVERY:
+                            self.face_index.store_many(new_records)
+                            new_records.clear()
+                finally:
+                    # Keep what was detected even if the run was cancelled.
+                    self.face_index.store_many(new_records)
 
-                return {"updated": updated}
+                return {"updated": progress["updated"]}
 
             def on_done(result):
                 if self.current_path:
@@ -730,16 +925,7 @@ if QT_AVAILABLE:
                 return
             path = self.editor_state.image_list[index]
             self.editor_state.remove_image(path)
-            cached_preview = self._preview_cache.pop(path, None)
-            if cached_preview is not None:
-                self._preview_cache_current_bytes = max(
-                    0,
-                    self._preview_cache_current_bytes - self._estimate_image_bytes(cached_preview),
-                )
-                try:
-                    cached_preview.close()
-                except Exception:
-                    pass
+            self._drop_preview_cache_entry(path)
             edited = self.edited_images.pop(path, None)
             if edited is not None:
                 try:
@@ -791,7 +977,7 @@ if QT_AVAILABLE:
             self.show_info("Pick Color", f"Cor copiada: {color}")
 
         @staticmethod
-        def _generate_preview_frames(animation_type, border_color, cancel_event):
+        def _generate_preview_frames(animation_type, border_color, cancel_event, seed=None):
             try:
                 size = (BORDA_WIDTH, BORDA_HEIGHT)
                 if cancel_event and cancel_event.is_set():
@@ -803,7 +989,7 @@ if QT_AVAILABLE:
                 elif animation_type == "Strobe (Pisca)":
                     frames, duration = AnimationProcessor.generate_strobe_frames(size, total_frames=10, border_width=BORDER_THICKNESS, overlay_only=True)
                 elif animation_type == "Glitch":
-                    frames, duration = AnimationProcessor.generate_glitch_frames(size, total_frames=20, border_width=BORDER_THICKNESS, overlay_only=True)
+                    frames, duration = AnimationProcessor.generate_glitch_frames(size, total_frames=20, border_width=BORDER_THICKNESS, overlay_only=True, seed=seed)
                 elif animation_type == "Spin":
                     frames, duration = AnimationProcessor.generate_spin_frames(size, border_color, total_frames=30, border_width=BORDER_THICKNESS, overlay_only=True)
                 elif animation_type == "Flow":
@@ -825,6 +1011,8 @@ if QT_AVAILABLE:
         def start_preview_animation(self):
             animation_type = self.editor_state.animation_type
             border_color = self.editor_state.resolve_border_hex(BORDA_HEX, self.current_path)
+            # Same seed as the batch worker, so the preview shows the exported Glitch.
+            seed = frame_engine.glitch_seed(self.current_path)
             self.stop_preview_animation(clear_frames=False)
             self._preview_index = 0
             self._preview_seq += 1
@@ -832,7 +1020,7 @@ if QT_AVAILABLE:
             self._active_preview_task_id = task_id
 
             def task_fn(cancel_event, _on_progress):
-                result = self._generate_preview_frames(animation_type, border_color, cancel_event)
+                result = self._generate_preview_frames(animation_type, border_color, cancel_event, seed)
                 result["task_id"] = task_id
                 return result
 
@@ -922,6 +1110,9 @@ if QT_AVAILABLE:
                     target_dir,
                     progress_callback=on_progress,
                     cancel_event=cancel_event,
+                    export_format=self.ui_preferences.export_format,
+                    export_preset=self.ui_preferences.export_preset,
+                    export_max_kb=self.ui_preferences.export_max_kb,
                 )
 
             def on_done(result):
@@ -954,6 +1145,9 @@ if QT_AVAILABLE:
                     file_path,
                     progress_callback=on_progress,
                     cancel_event=cancel_event,
+                    export_format=self.ui_preferences.export_format,
+                    export_preset=self.ui_preferences.export_preset,
+                    export_max_kb=self.ui_preferences.export_max_kb,
                 )
 
             def on_done(result):
@@ -988,6 +1182,9 @@ if QT_AVAILABLE:
                     album_title,
                     progress_callback=on_progress,
                     cancel_event=cancel_event,
+                    export_format=self.ui_preferences.export_format,
+                    export_preset=self.ui_preferences.export_preset,
+                    export_max_kb=self.ui_preferences.export_max_kb,
                 )
 
             def on_done(result):
@@ -1067,6 +1264,8 @@ if QT_AVAILABLE:
             self.online_tab.close()
             self._close_current_original()
             self._clear_preview_cache()
+            self.face_index.close()
+            self.batch_controller.shutdown()
             for image in self.edited_images.values():
                 try:
                     image.close()
@@ -1,4 +1,5 @@
-from src.config.settings import BORDA_HEX
+from src.config.settings import ANIMATION_EXPORT_FORMATS, BORDA_HEX, ENCODER_PRESETS, EXPORT_MAX_KB_LIMIT
+from src.core.anim_export import ANIMATION_FORMAT_LABELS, ENCODER_PRESET_LABELS
 from src.qt.compat import QT_AVAILABLE, qt_unavailable_error
 
 if QT_AVAILABLE:
@@ -10,6 +11,7 @@ if QT_AVAILABLE:
         QLineEdit,
         QPushButton,
         QScrollArea,
+        QSpinBox,
         Qt,
         QVBoxLayout,
         QWidget,
@@ -99,6 +101,27 @@ if QT_AVAILABLE:
             save_group = QGroupBox("Saída")
             save_layout = QVBoxLayout(save_group)
             save_layout.setSpacing(8)
+            save_layout.addWidget(QLabel("Formato da animação"))
+            self.export_format_combo = QComboBox()
+            for export_format in ANIMATION_EXPORT_FORMATS:
+                self.export_format_combo.addItem(ANIMATION_FORMAT_LABELS[export_format], export_format)
+            self.export_format_combo.currentIndexChanged.connect(self._on_export_format_changed)
+            save_layout.addWidget(self.export_format_combo)
+            save_layout.addWidget(QLabel("Preset do encoder"))
+            self.export_preset_combo = QComboBox()
+            for preset in ENCODER_PRESETS:
+                self.export_preset_combo.addItem(ENCODER_PRESET_LABELS[preset], preset)
+            self.export_preset_combo.currentIndexChanged.connect(self._on_export_preset_changed)
+            save_layout.addWidget(self.export_preset_combo)
+            save_layout.addWidget(QLabel("Tamanho máximo"))
+            self.export_max_kb_spin = QSpinBox()
+            self.export_max_kb_spin.setRange(0, EXPORT_MAX_KB_LIMIT)
+            self.export_max_kb_spin.setSingleStep(100)
+            self.export_max_kb_spin.setSuffix(" KB")
+            self.export_max_kb_spin.setSpecialValueText("Sem limite")
+            self.export_max_kb_spin.setToolTip("Reduz quadros, cores e qualidade até a animação caber no limite.")
+            self.export_max_kb_spin.valueChanged.connect(self._on_export_max_kb_changed)
+            save_layout.addWidget(self.export_max_kb_spin)
             save_images_button = QPushButton("Salvar Imagens")
             save_images_button.clicked.connect(self.main_window.save_all_images)
             save_zip_button = QPushButton("Salvar ZIP")
@@ -173,6 +196,20 @@ if QT_AVAILABLE:
             self.animation_combo.blockSignals(False)
             self.custom_color_edit.blockSignals(False)
 
+            preferences = self.main_window.ui_preferences
+            for combo, value in (
+                (self.export_format_combo, preferences.export_format),
+                (self.export_preset_combo, preferences.export_preset),
+            ):
+                index = combo.findData(value)
+                if index >= 0:
+                    combo.blockSignals(True)
+                    combo.setCurrentIndex(index)
+                    combo.blockSignals(False)
+            self.export_max_kb_spin.blockSignals(True)
+            self.export_max_kb_spin.setValue(int(preferences.export_max_kb or 0))
+            self.export_max_kb_spin.blockSignals(False)
+
         def _on_border_changed(self, value):
             self.main_window.editor_state.selected_borda = value
             self.main_window.ui_preferences.last_global_borda = value
@@ -189,6 +226,15 @@ if QT_AVAILABLE:
             self.main_window.refresh_current_canvas()
             self.main_window.show_status(f"Animação selecionada: {value}")
 
+        def _on_export_format_changed(self, index):
+            self.main_window.ui_preferences.export_format = self.export_format_combo.itemData(index)
+
+        def _on_export_preset_changed(self, index):
+            self.main_window.ui_preferences.export_preset = self.export_preset_combo.itemData(index)
+
+        def _on_export_max_kb_changed(self, value):
+            self.main_window.ui_preferences.export_max_kb = value
+
         def _save_preset(self):
             name = self.preset_name_edit.text().strip()
             if not name:
@@ -39,6 +39,7 @@ from src.core.image_processor import ImageProcessor
 from src.core.uploader import ImgChestUploader
 from src.ui.online_search import DanbooruSearchTab
 from src.core.animation_processor import AnimationProcessor
+from src.core import frame_engine
 from src.controllers.batch_controller import BatchController
 from src.core.preset_manager import PresetManager
 from src.core.task_runner import TaskRunner
@@ -231,6 +232,7 @@ class CustomMakerApp:
                 pass
         self.edited_source_images.clear()
         self._clear_image_cache()
+        self.batch_controller.shutdown()
         if hasattr(self, "danbooru_tab"):
             try:
                 self.danbooru_tab.close()
@@ -1121,9 +1123,11 @@ class CustomMakerApp:
             b_hex = self.custom_borda_hex_individual.get(self.image_path, self.custom_borda_hex) if self.image_path else self.custom_borda_hex
         else:
             b_hex = self.borda_hex.get(b_name, "#FFFFFF")
+        # Same seed as the batch worker, so the preview shows the exported Glitch.
+        seed = frame_engine.glitch_seed(self.image_path) if self.image_path else None
 
         def task_fn(cancel_event, _on_progress):
-            result = self._generate_preview_frames(anim_type, b_hex, cancel_event)
+            result = self._generate_preview_frames(anim_type, b_hex, cancel_event, seed)
             result["task_id"] = task_id
             return result
 
@@ -1148,7 +1152,7 @@ class CustomMakerApp:
         self.task_runner.submit(task_id, task_fn, on_done=on_done, on_error=on_error)
 
     @staticmethod
-    def _generate_preview_frames(anim_type, b_hex, cancel_event):
+    def _generate_preview_frames(anim_type, b_hex, cancel_event, seed=None):
         try:
             size = (BORDA_WIDTH, BORDA_HEIGHT)
 
@@ -1163,7 +1167,7 @@ class CustomMakerApp:
             elif anim_type == "Strobe (Pisca)":
                 frames, duration = AnimationProcessor.generate_strobe_frames(size, total_frames=10, border_width=BORDER_THICKNESS, overlay_only=True)
             elif anim_type == "Glitch":
-                frames, duration = AnimationProcessor.generate_glitch_frames(size, total_frames=20, border_width=BORDER_THICKNESS, overlay_only=True)
+                frames, duration = AnimationProcessor.generate_glitch_frames(size, total_frames=20, border_width=BORDER_THICKNESS, overlay_only=True, seed=seed)
             elif anim_type == "Spin":
                 frames, duration = AnimationProcessor.generate_spin_frames(size, b_hex, total_frames=30, border_width=BORDER_THICKNESS, overlay_only=True)
             elif anim_type == "Flow":
@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from src.config.settings import ANIMATION_EXPORT_FORMATS, ENCODER_PRESETS
+from src.core.anim_export import animation_extension, resolve_animation_format, save_animation
+
+
+def _frames(count=4, size=(40, 60)):
+    width, height = size
+    frames = np.zeros((count, height, width, 4), dtype=np.uint8)
+    frames[..., 3] = 255
+    for i in range(count):
+        frames[i, :4] = (60 * i, 255 - 60 * i, 128, 255)
+        frames[i, 10:20, 10:30] = (200, 40, 40, 255)
+    return frames
+
+
+class TestAnimExport(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_every_format_and_preset_writes_an_animation(self):
+        frames = _frames()
+        for export_format in ANIMATION_EXPORT_FORMATS:
+            for preset in ENCODER_PRESETS:
+                with self.subTest(export_format=export_format, preset=preset):
+                    path = os.path.join(self.tmp.name, f"{export_format}_{preset}{animation_extension(export_format)}")
+
+                    save_animation(iter(frames), path, 50, export_format, preset)
+
+                    with Image.open(path) as image:
+                        self.assertEqual(image.n_frames, len(frames))
+                        self.assertEqual(image.size, (40, 60))
+
+    def test_lossless_webp_round_trips_pixels(self):
+        frames = _frames()
+        path = os.path.join(self.tmp.name, "out.webp")
+
+        save_animation(frames, path, 50, "webp_lossless", "rapido")
+
+        with Image.open(path) as image:
+            image.seek(2)
+            self.assertTrue((np.asarray(image.convert("RGBA")) == frames[2]).all())
+
+    def test_apng_decodes_to_source_frames(self):
+        frames = _frames()
+        path = os.path.join(self.tmp.name, "out.png")
+
+        save_animation(list(frames), path, 50, "apng", "rapido")
+
+        with Image.open(path) as image:
+            for index in range(len(frames)):
+                image.seek(index)
+                self.assertTrue((np.asarray(image.convert("RGBA")) == frames[index]).all(), f"frame {index}")
+
+    def test_apng_frames_returning_to_earlier_colors_round_trip(self):
+        # A/B/A/C ring: frame 2 goes back to frame 0's colors.
+        frames = _frames()
+        for i, color in enumerate([(255, 0, 0), (0, 255, 0), (255, 0, 0), (0, 0, 255)]):
+            frames[i, :4] = (*color, 255)
+        path = os.path.join(self.tmp.name, "ring.png")
+
+        save_animation(list(frames), path, 50, "apng", "rapido")
+
+        with Image.open(path) as image:
+            for index in range(len(frames)):
+                image.seek(index)
+                self.assertTrue((np.asarray(image.convert("RGBA")) == frames[index]).all(), f"frame {index}")
+
+    def test_apng_with_moving_transparent_region_round_trips(self):
+        frames = _frames()
+        for i in range(len(frames)):
+            frames[i, 30:40, 8 * i : 8 * i + 10] = 0
+        path = os.path.join(self.tmp.name, "alpha.png")
+
+        save_animation(list(frames), path, 50, "apng", "rapido")
+
+        with Image.open(path) as image:
+            for index in range(len(frames)):
+                image.seek(index)
+                self.assertTrue((np.asarray(image.convert("RGBA")) == frames[index]).all(), f"frame {index}")
+
+    def test_identical_frames_are_merged_in_every_format(self):
+        frames = np.repeat(_frames(count=1), 6, axis=0)
+        for export_format in ANIMATION_EXPORT_FORMATS:
+            with self.subTest(export_format=export_format):
+                path = os.path.join(self.tmp.name, f"still{animation_extension(export_format)}")
+
+                save_animation(iter(frames), path, 50, export_format)
+
+                with Image.open(path) as image:
+                    self.assertEqual(getattr(image, "n_frames", 1), 1)
+
+    def test_unknown_format_falls_back_to_gif(self):
+        self.assertEqual(resolve_animation_format("bmp"), "gif")
+        self.assertEqual(animation_extension("apng"), ".png")
+
+
+if __name__ == "__main__":
+    unittest.main()
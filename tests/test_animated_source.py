@@ -0,0 +1,126 @@
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from src.config.settings import BORDA_HEIGHT, BORDA_WIDTH
+from src.core.animated_source import border_loop, export_timeline, stream_animated_frames, stream_bordered_frames
+from src.core.batch_worker import process_image_task
+from src.core.image_loader import MIN_FRAME_DURATION_MS
+
+
+class TestAnimatedSource(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = f"{self.tmp.name}/source.gif"
+        frames = []
+        for index in range(6):
+            pixels = np.zeros((700, 450, 3), dtype=np.uint8)
+            pixels[..., 0] = index * 40
+            frames.append(Image.fromarray(pixels))
+        frames[0].save(self.source, save_all=True, append_images=frames[1:], duration=70, loop=0)
+        self.state = {"pos": (0, 0), "size": (BORDA_WIDTH, BORDA_HEIGHT)}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_border_loop_keeps_effect_frame_duration(self):
+        self.assertEqual(border_loop(3000, 30, 50), (2, 30))
+        self.assertEqual(border_loop(420, 30, 50), (1, 8))
+        self.assertEqual(border_loop(1000, 4, 100), (2, 5))
+
+    def test_timeline_covers_source_and_border_changes(self):
+        timeline = export_timeline([100, 100, 100], border_frames=2, loops=1)
+        self.assertEqual(timeline, [(0, 0, 100), (1, 0, 50), (1, 1, 50), (2, 1, 100)])
+
+    def test_timeline_snaps_to_gif_delay_unit(self):
+        timeline = export_timeline([70] * 6, border_frames=8, loops=1)
+        self.assertEqual(sum(duration for _source, _border, duration in timeline), 420)
+        for _source, _border, duration in timeline:
+            self.assertEqual(duration % 10, 0)
+            self.assertGreater(duration, 0)
+        self.assertEqual([entry[0] for entry in timeline], sorted(entry[0] for entry in timeline))
+        self.assertEqual({entry[0] for entry in timeline}, set(range(6)))
+
+    def test_timeline_has_no_frames_shorter_than_browsers_play(self):
+        cases = [
+            ([40, 80, 120, 60, 100], 8, 1),
+            ([30, 90, 20, 150, 70, 40], 12, 2),
+            ([25, 35, 45, 55, 65], 30, 1),
+        ]
+        for durations, border_frames, loops in cases:
+            with self.subTest(durations=durations):
+                timeline = export_timeline(durations, border_frames, loops)
+                self.assertGreaterEqual(min(duration for _s, _b, duration in timeline), MIN_FRAME_DURATION_MS)
+                self.assertEqual(sum(duration for _s, _b, duration in timeline), round(sum(durations), -1))
+                # Every source frame keeps its own (snapped) length.
+                per_source = [0] * len(durations)
+                for source_index, _border, duration in timeline:
+                    per_source[source_index] += duration
+                for shown, duration in zip(per_source, durations):
+                    self.assertLessEqual(abs(shown - duration), 10)
+
+    def test_merged_border_change_keeps_its_frame(self):
+        # The border change at 40 ms is 10 ms from the source change at 30 ms.
+        timeline = export_timeline([30, 90], border_frames=3, loops=1)
+        self.assertEqual(timeline, [(0, 0, 30), (1, 1, 50), (1, 2, 40)])
+
+    def test_streamed_frames_follow_the_source(self):
+        timeline = export_timeline([70] * 6, border_frames=8, loops=1)
+        frames = list(
+            stream_animated_frames(self.source, self.state, (0, 0), "Rainbow", "#FFFFFF", timeline, 8)
+        )
+        self.assertEqual(len(frames), len(timeline))
+        for frame, (source_index, _border, _duration) in zip(frames, timeline):
+            self.assertEqual(frame.shape, (BORDA_HEIGHT, BORDA_WIDTH, 4))
+            self.assertEqual(frame[BORDA_HEIGHT // 2, BORDA_WIDTH // 2, 0], source_index * 40)
+
+    def test_bordered_frames_one_per_source_frame(self):
+        frames = list(stream_bordered_frames(self.source, self.state, (0, 0), "#FFFFFF"))
+        self.assertEqual(len(frames), 6)
+        self.assertEqual(frames[3][BORDA_HEIGHT // 2, BORDA_WIDTH // 2, 0], 120)
+        self.assertEqual(tuple(frames[3][0, 0]), (255, 255, 255, 255))
+
+    def test_process_image_task_exports_animated_source(self):
+        output = f"{self.tmp.name}/output.gif"
+        result = process_image_task(
+            {
+                "path": self.source,
+                "state": self.state,
+                "borda_pos": (0, 0),
+                "anim_type": "Rainbow",
+                "border_color": "#FFFFFF",
+                "output_path": output,
+            }
+        )
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["source_frames"], 6)
+        with Image.open(output) as image:
+            self.assertTrue(image.is_animated)
+            total = 0
+            for index in range(image.n_frames):
+                image.seek(index)
+                total += image.info["duration"]
+        self.assertEqual(total, 420)
+
+    def test_static_border_on_animated_source_stays_animated(self):
+        output = f"{self.tmp.name}/output.png"
+        result = process_image_task(
+            {
+                "path": self.source,
+                "state": self.state,
+                "borda_pos": (0, 0),
+                "anim_type": "Nenhuma",
+                "border_color": "#FFFFFF",
+                "output_path": output,
+            }
+        )
+        self.assertEqual(result["status"], "success")
+        with Image.open(output) as image:
+            self.assertEqual(image.format, "PNG")
+            self.assertEqual(image.n_frames, 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,13 @@
+import types
 import unittest
 
-from PIL import Image
+import numpy as np
+from PIL import Image, ImageDraw
 
 from src.config.settings import BORDA_HEIGHT, BORDA_WIDTH
+from src.core import frame_engine
 from src.core.animation_processor import AnimationProcessor
+from src.core.frame_cache import shared_frame_cache
 
 
 class TestAnimationProcessor(unittest.TestCase):
@@ -113,6 +117,143 @@ class TestAnimationProcessor(unittest.TestCase):
             self.assertEqual(f.size, size)
             f.close()
 
+    def test_spin_sweep_follows_pieslice_angles(self):
+        """Frame 0 is dark at 3 o'clock and brightens clockwise; later frames rotate it clockwise."""
+        frames, _ = AnimationProcessor.render_frames_array("Spin", self.img, "#FF0000", total_frames=4, border_width=5)
+        mid_x, mid_y = BORDA_WIDTH // 2, BORDA_HEIGHT // 2
+        self.assertLess(frames[0, mid_y, BORDA_WIDTH - 1, 0], 10)
+        self.assertAlmostEqual(int(frames[0, BORDA_HEIGHT - 1, mid_x, 0]), 63, delta=2)
+        self.assertAlmostEqual(int(frames[0, mid_y, 0, 0]), 127, delta=2)
+        self.assertAlmostEqual(int(frames[0, 0, mid_x, 0]), 191, delta=2)
+        # A quarter turn later the bottom carries what 3 o'clock had.
+        self.assertLess(frames[1, BORDA_HEIGHT - 1, mid_x, 0], 10)
+        # Opaque content is untouched.
+        self.assertEqual(tuple(frames[0, mid_y, mid_x]), (0, 0, 255, 255))
+
+    def test_spin_overlay_only_evaluates_ring(self):
+        frames, _ = AnimationProcessor.render_frames_array(
+            "Spin", (60, 80), "#00FF00", total_frames=3, border_width=5, overlay_only=True
+        )
+        self.assertTrue((frames[:, 10:70, 10:50] == 0).all())
+        self.assertTrue((frames[:, :5, :, 3] == 255).all())
+
+    def test_overlay_frames_are_reused_from_shared_cache(self):
+        cache = shared_frame_cache()
+        cache.clear()
+        first, _ = AnimationProcessor.render_frames_array("Neon Pulsante", (60, 80), "#FF00FF", 4, 5, overlay_only=True)
+        misses = cache.misses
+
+        second, _ = AnimationProcessor.render_frames_array("Neon Pulsante", (60, 80), "#ff00ff", 4, 5, overlay_only=True)
+
+        self.assertIs(first, second)
+        self.assertEqual(cache.misses, misses)
+        other, _ = AnimationProcessor.render_frames_array("Neon Pulsante", (60, 80), "#00FF00", 4, 5, overlay_only=True)
+        self.assertIsNot(other, first)
+
+    def test_export_frames_do_not_touch_cached_backgrounds(self):
+        shared_frame_cache().clear()
+        frames, _ = AnimationProcessor.render_frames_array("Rainbow", self.img, total_frames=3, border_width=5)
+        again, _ = AnimationProcessor.render_frames_array("Rainbow", self.img, total_frames=3, border_width=5)
+
+        self.assertTrue(frames.flags.writeable)
+        self.assertIsNot(frames, again)
+        self.assertEqual(tuple(frames[0, 100, 100]), (0, 0, 255, 255))
+
+    def test_render_frames_array_shape(self):
+        frames, duration = AnimationProcessor.render_frames_array("Flow", self.img, "#00FF00", total_frames=4, border_width=5)
+        self.assertEqual(frames.shape, (4, BORDA_HEIGHT, BORDA_WIDTH, 4))
+        self.assertEqual(frames.dtype, np.uint8)
+        self.assertEqual(duration, 60)
+
+    def test_stream_frames_match_render_frames_array(self):
+        expected, expected_duration = AnimationProcessor.render_frames_array("Spin", self.img, "#FF0000", 4, 5)
+
+        frames, duration = AnimationProcessor.stream_frames("Spin", self.img, "#FF0000", 4, 5)
+
+        self.assertIsInstance(frames, types.GeneratorType)
+        self.assertEqual(duration, expected_duration)
+        streamed = list(frames)
+        self.assertEqual(len(streamed), 4)
+        for frame, reference in zip(streamed, expected):
+            self.assertTrue(frame.flags.writeable)
+            self.assertTrue((frame == reference).all())
+
+    def test_stream_frames_glitch_yields_arrays(self):
+        frames, duration = AnimationProcessor.stream_frames("Glitch", self.img, total_frames=3, border_width=5)
+
+        shapes = [frame.shape for frame in frames]
+
+        self.assertEqual(shapes, [(BORDA_HEIGHT, BORDA_WIDTH, 4)] * 3)
+        self.assertEqual(duration, 50)
+
+    def test_glitch_is_reproducible_per_seed(self):
+        first, _ = AnimationProcessor.render_frames_array("Glitch", self.img, total_frames=4, border_width=5, seed=7)
+        again, _ = AnimationProcessor.render_frames_array("Glitch", self.img, total_frames=4, border_width=5, seed=7)
+        other, _ = AnimationProcessor.render_frames_array("Glitch", self.img, total_frames=4, border_width=5, seed=8)
+        default, _ = AnimationProcessor.render_frames_array("Glitch", self.img, total_frames=4, border_width=5)
+        default_again, _ = AnimationProcessor.render_frames_array("Glitch", self.img, total_frames=4, border_width=5)
+
+        self.assertTrue((first == again).all())
+        self.assertFalse((first == other).all())
+        self.assertTrue((default == default_again).all())
+
+    def test_glitch_overlay_is_cached(self):
+        shared_frame_cache().clear()
+        first, _ = AnimationProcessor.render_frames_array("Glitch", (60, 80), total_frames=3, border_width=5, overlay_only=True)
+        again, _ = AnimationProcessor.render_frames_array("Glitch", (60, 80), total_frames=3, border_width=5, overlay_only=True)
+
+        self.assertIs(first, again)
+        self.assertFalse(first.flags.writeable)
+
+    def test_glitch_stream_matches_render_frames_array(self):
+        expected, _ = AnimationProcessor.render_frames_array("Glitch", self.img, total_frames=4, border_width=5, seed=3)
+
+        frames, _ = AnimationProcessor.stream_frames("Glitch", self.img, total_frames=4, border_width=5, seed=3)
+
+        self.assertTrue((np.stack(list(frames)) == expected).all())
+
+    def test_glitch_matches_image_draw_and_paste(self):
+        """The schedule drawn with ImageDraw and Image.paste gives the same frames."""
+        size, border_width, seed = (60, 80), 5, 11
+        source = Image.new("RGBA", size, (9, 99, 199, 255))
+        content = source.resize((size[0] - 2 * border_width, size[1] - 2 * border_width), Image.LANCZOS)
+        rects, colors, offsets = frame_engine.glitch_schedule(size, 3, seed)
+
+        frames, _ = AnimationProcessor.render_frames_array("Glitch", source, total_frames=3, border_width=border_width, seed=seed)
+
+        for index, frame in enumerate(frames):
+            expected = Image.new("RGBA", size, frame_engine.GLITCH_BACKGROUND)
+            draw = ImageDraw.Draw(expected)
+            for box, color in zip(rects[index].tolist(), colors[index]):
+                draw.rectangle(box, fill=frame_engine.GLITCH_COLORS[color])
+            expected.paste(content, (border_width + int(offsets[index][0]), border_width + int(offsets[index][1])), content)
+            self.assertEqual(frame.tobytes(), expected.tobytes(), f"frame {index}")
+
+    def test_rainbow_matches_per_frame_paste_with_soft_alpha(self):
+        """Composite must be bit-identical to Image.new + paste(content, mask=content)."""
+        rng = np.random.default_rng(0)
+        pixels = rng.integers(0, 256, (BORDA_HEIGHT, BORDA_WIDTH, 4), dtype=np.uint8)
+        pixels[:50, :, 3] = 255
+        pixels[50:80, :, 3] = 0
+        source = Image.fromarray(pixels)
+        border_width = 5
+
+        frames, _ = AnimationProcessor.generate_rainbow_frames(source, total_frames=4, border_width=border_width)
+
+        content = source.resize((BORDA_WIDTH - 2 * border_width, BORDA_HEIGHT - 2 * border_width), Image.LANCZOS)
+        for i, frame in enumerate(frames):
+            expected = Image.new("RGBA", source.size, frame.getpixel((0, 0)))
+            expected.paste(content, (border_width, border_width), content)
+            self.assertEqual(frame.tobytes(), expected.tobytes(), f"frame {i}")
+            frame.close()
+
+    def test_overlay_alpha_matches_clear_center_mask(self):
+        frames, _ = AnimationProcessor.generate_neon_frames((60, 80), "#FF0000", total_frames=2, border_width=5, overlay_only=True)
+        expected = AnimationProcessor._clear_center(Image.new("RGBA", (60, 80)), 5).getchannel("A")
+        for frame in frames:
+            self.assertEqual(frame.getchannel("A").tobytes(), expected.tobytes())
+            frame.close()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -33,6 +33,7 @@ class TestAppConfig(unittest.TestCase):
             self.assertEqual(cfg.get("danbooru_pool_connections"), DEFAULT_CONFIG["danbooru_pool_connections"])
             self.assertEqual(cfg.get("thumbnail_batch_size"), DEFAULT_CONFIG["thumbnail_batch_size"])
             self.assertEqual(cfg.get("image_cache_max_mb"), DEFAULT_CONFIG["image_cache_max_mb"])
+            self.assertEqual(cfg.get("export_max_kb"), DEFAULT_CONFIG["export_max_kb"])
 
     def test_invalid_json_uses_defaults(self):
         with tempfile.TemporaryDirectory() as tmp:
@@ -52,6 +53,8 @@ class TestAppConfig(unittest.TestCase):
             self.assertEqual(cfg.get("ui_show_tips"), True)
             self.assertEqual(cfg.get("danbooru_retry_total"), DEFAULT_CONFIG["danbooru_retry_total"])
             self.assertEqual(cfg.get("thumbnail_disk_cache_mb"), DEFAULT_CONFIG["thumbnail_disk_cache_mb"])
+            self.assertEqual(cfg.get("export_format"), DEFAULT_CONFIG["export_format"])
+            self.assertEqual(cfg.get("export_preset"), DEFAULT_CONFIG["export_preset"])
 
     def test_save_persists_changes(self):
         with tempfile.TemporaryDirectory() as tmp:
@@ -90,6 +93,10 @@ class TestAppConfig(unittest.TestCase):
                         "thumbnail_memory_cache_mb": "xx",
                         "thumbnail_disk_cache_mb": "yy",
                         "image_cache_max_mb": "zz",
+                        "export_format": "bmp",
+                        "export_preset": 3,
+                        "export_max_kb": "big",
+                        "exact_render": "maybe",
                     },
                     f,
                 )
@@ -109,3 +116,16 @@ class TestAppConfig(unittest.TestCase):
             self.assertEqual(cfg.get("thumbnail_memory_cache_mb"), DEFAULT_CONFIG["thumbnail_memory_cache_mb"])
             self.assertEqual(cfg.get("thumbnail_disk_cache_mb"), DEFAULT_CONFIG["thumbnail_disk_cache_mb"])
             self.assertEqual(cfg.get("image_cache_max_mb"), DEFAULT_CONFIG["image_cache_max_mb"])
+            self.assertIs(cfg.get("exact_render"), False)
+
+    def test_exact_render_is_coerced_to_bool(self):
+        for stored, expected in (("true", True), (1, True), ("0", False), (False, False)):
+            with self.subTest(stored=stored), tempfile.TemporaryDirectory() as tmp:
+                config_path = f"{tmp}/custommaker_config.json"
+                with open(config_path, "w", encoding="utf-8") as f:
+                    json.dump({"exact_render": stored}, f)
+
+                with patch("src.core.app_config.CONFIG_FILE", config_path):
+                    cfg = AppConfig()
+
+                self.assertIs(cfg.get("exact_render"), expected)
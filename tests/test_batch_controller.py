@@ -1,10 +1,15 @@
+import os
 import unittest
+import zipfile
 from tempfile import TemporaryDirectory
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from PIL import Image
 
 from src.controllers.batch_controller import BatchController
+from src.core.batch_worker import process_image_task
+from src.core.render_cache import RenderCache
+from src.core.shared_images import SharedImages, open_shared_image
 
 
 class DummyVar:
@@ -28,11 +33,17 @@ class DummyConfig:
 class DummyUploader:
     def __init__(self):
         self.called = False
+        self.posts = []
 
     def upload_images(self, files, title, progress_callback=None, cancel_event=None):
         self.called = True
         return ["https://imgchest.com/p/test"], []
 
+    def upload_batch(self, items, title, batch_num=1, privacy="hidden", retries=2, cancel_event=None):
+        self.called = True
+        self.posts.append((title, [item["filename"] for item in items]))
+        return [f"https://imgchest.com/i/{item['filename']}" for item in items], []
+
 
 class DummyApp:
     def __init__(self, max_workers=None):
@@ -88,35 +99,306 @@ class TestBatchController(unittest.TestCase):
             controller_invalid = BatchController(app_invalid)
             self.assertEqual(controller_invalid._resolve_max_workers(), 4)
 
+    def test_plan_parallelism_moves_spare_workers_into_frames(self):
+        self.assertEqual(BatchController._plan_parallelism(10, 4), (4, 1))
+        self.assertEqual(BatchController._plan_parallelism(4, 4), (4, 1))
+        self.assertEqual(BatchController._plan_parallelism(1, 4), (1, 4))
+        self.assertEqual(BatchController._plan_parallelism(3, 8), (3, 2))
+
+    def test_run_batch_sets_frame_threads_for_small_batches(self):
+        pool = MagicMock()
+        controller = BatchController(DummyApp(max_workers=4), render_pool=pool)
+        tasks = [{"path": "a.png"}]
+        future = MagicMock()
+        future.result.return_value = {"status": "success", "path": "a.png"}
+        pool.submit.return_value = future
+
+        with patch.object(controller, "_resolve_max_workers", return_value=4), patch(
+            "concurrent.futures.wait", return_value=({future}, set())
+        ):
+            result = controller._run_batch(tasks)
+
+        self.assertEqual(pool.submit.call_args[0][0], 4)
+        self.assertEqual(tasks[0]["frame_threads"], 4)
+        self.assertEqual(result["results"], [{"status": "success", "path": "a.png"}])
+
+    def test_run_batch_reuses_render_pool_and_shutdown_stops_it(self):
+        pool = MagicMock()
+        controller = BatchController(DummyApp(max_workers=2), render_pool=pool)
+        future = MagicMock()
+        future.result.return_value = {"status": "success", "path": "a.png"}
+        pool.submit.return_value = future
+
+        with patch("concurrent.futures.wait", return_value=({future}, set())):
+            controller._run_batch([{"path": "a.png"}])
+            controller._run_batch([{"path": "a.png"}])
+
+        self.assertEqual(pool.submit.call_count, 2)
+        pool.shutdown.assert_not_called()
+        controller.shutdown()
+        pool.shutdown.assert_called_once_with()
+
+    def test_cancelled_batch_drops_pending_work_but_keeps_pool(self):
+        pool = MagicMock()
+        controller = BatchController(DummyApp(max_workers=2), render_pool=pool)
+        future = MagicMock()
+        pool.submit.return_value = future
+        cancel_event = MagicMock()
+        cancel_event.is_set.return_value = True
+
+        result = controller._run_batch([{"path": "a.png"}], cancel_event=cancel_event)
+
+        self.assertTrue(result["cancelled"])
+        future.cancel.assert_called_once_with()
+        pool.shutdown.assert_not_called()
+
     def test_get_task_data_uses_edited_source_override(self):
         app = DummyApp()
         app.edited_source_images["image.png"] = Image.new("RGBA", (32, 32), "red")
         controller = BatchController(app)
         try:
-            with TemporaryDirectory() as temp_dir:
-                data = controller._get_task_data("image.png", output_path="out.png", source_dir=temp_dir)
+            with SharedImages() as shared_images:
+                data = controller._get_task_data("image.png", output_path="out.png", shared_images=shared_images)
 
                 self.assertIsNotNone(data)
-                self.assertIn("source_path", data)
-                self.assertTrue(data["source_path"].startswith(temp_dir))
+                self.assertNotIn("source_path", data)
+                self.assertEqual(data["source_image"]["size"], (32, 32))
+                self.assertEqual(len(shared_images), 1)
+                shared = open_shared_image(data["source_image"])
+                self.assertEqual(shared.getpixel((5, 5)), (255, 0, 0, 255))
+                shared.close()
+        finally:
+            app.edited_source_images["image.png"].close()
+
+    def test_get_task_data_requires_shared_images_for_edited_source(self):
+        app = DummyApp()
+        app.edited_source_images["image.png"] = Image.new("RGBA", (32, 32), "red")
+        controller = BatchController(app)
+        try:
+            with self.assertRaises(ValueError):
+                controller._get_task_data("image.png", output_path="out.png")
         finally:
             app.edited_source_images["image.png"].close()
 
+    def test_get_task_data_auto_fits_images_never_opened(self):
+        with TemporaryDirectory() as temp_dir:
+            path = f"{temp_dir}/unseen.png"
+            Image.new("RGB", (800, 600)).save(path)
+            app = DummyApp()
+            app.image_list.append(path)
+            controller = BatchController(app)
+
+            data = controller._get_task_data(path, output_path="out.png")
+
+            self.assertEqual(data["state"], {"pos": (-121, 0), "size": (466, 350)})
+
+    def test_get_task_data_skips_unreadable_images_without_state(self):
+        controller = BatchController(DummyApp())
+        self.assertIsNone(controller._get_task_data("missing.png", output_path="out.png"))
+
+    def test_export_format_sets_extension_and_task_options(self):
+        app = DummyApp()
+        app.animation_type = DummyVar("Rainbow")
+        controller = BatchController(app)
+        with patch.object(controller, "_run_batch", return_value={"results": [], "cancelled": False}) as run_batch:
+            controller.save_all_images("out", export_format="webp", export_preset="compacto")
+
+        task = run_batch.call_args[0][0][0]
+        self.assertTrue(task["output_path"].endswith("image_custom.webp"))
+        self.assertEqual((task["export_format"], task["export_preset"]), ("webp", "compacto"))
+        self.assertEqual(controller._output_extension("apng"), ".png")
+        self.assertEqual(controller._output_extension("unknown"), ".gif")
+        self.assertIsNone(task["max_bytes"])
+
+    def test_second_export_reuses_cached_renders(self):
+        with TemporaryDirectory() as temp_dir:
+            paths = []
+            for name, color in (("a.png", "red"), ("b.png", "blue")):
+                path = f"{temp_dir}/{name}"
+                Image.new("RGB", (400, 600), color).save(path)
+                paths.append(path)
+            app = DummyApp()
+            app.image_list = paths
+            app.image_states = {path: {"pos": (0, 0), "size": (225, 350)} for path in paths}
+            controller = BatchController(app, render_cache=RenderCache(f"{temp_dir}/cache"))
+            for name in ("out1", "out2", "out3"):
+                os.makedirs(f"{temp_dir}/{name}")
+
+            def run_in_process(tasks, on_progress=None, cancel_event=None, on_result=None):
+                results = [process_image_task(task) for task in tasks]
+                for result in results:
+                    on_result(result)
+                return {"results": results, "cancelled": False}
+
+            with patch.object(controller, "_run_batch", side_effect=run_in_process) as run_batch:
+                first = controller.save_all_images(f"{temp_dir}/out1")
+                progress = []
+                second = controller.save_all_images(
+                    f"{temp_dir}/out2", progress_callback=lambda *args: progress.append(args[:2])
+                )
+                app.individual_bordas = {paths[0]: "Cor Personalizada"}
+                app.custom_borda_hex_individual = {paths[0]: "#000000"}
+                third = controller.save_all_images(f"{temp_dir}/out3")
+
+            self.assertEqual(first["errors"], 0)
+            self.assertEqual((first["cache_hits"], first["cache_misses"]), (0, 2))
+            self.assertEqual((second["cache_hits"], second["cache_misses"]), (2, 0))
+            self.assertEqual(second["processed"], 2)
+            self.assertEqual(progress, [(2, 2)])
+            self.assertEqual(run_batch.call_args_list[1][0][0], [])
+            self.assertEqual((third["cache_hits"], third["cache_misses"]), (1, 1))
+            with open(f"{temp_dir}/out1/b_custom.png", "rb") as f1, open(f"{temp_dir}/out2/b_custom.png", "rb") as f2:
+                self.assertEqual(f1.read(), f2.read())
+
+    def test_reexport_to_same_path_leaves_cached_renders_intact(self):
+        with TemporaryDirectory() as temp_dir:
+            path = f"{temp_dir}/a.png"
+            Image.effect_noise((400, 600), 60).convert("RGB").save(path)
+            app = DummyApp()
+            app.image_list = [path]
+            controller = BatchController(app, render_cache=RenderCache(f"{temp_dir}/cache"))
+            os.makedirs(f"{temp_dir}/out")
+            output = f"{temp_dir}/out/a_custom.png"
+            framings = {"F1": {"pos": (0, 0), "size": (225, 350)}, "F2": {"pos": (-60, -40), "size": (340, 510)}}
+
+            def run_in_process(tasks, on_progress=None, cancel_event=None, on_result=None):
+                results = [process_image_task(task) for task in tasks]
+                for result in results:
+                    on_result(result)
+                return {"results": results, "cancelled": False}
+
+            exported = []
+            with patch.object(controller, "_run_batch", side_effect=run_in_process):
+                for name in ("F1", "F2", "F1"):
+                    app.image_states = {path: framings[name]}
+                    result = controller.save_all_images(f"{temp_dir}/out")
+                    with open(output, "rb") as f:
+                        exported.append((result["cache_hits"], f.read()))
+
+            self.assertEqual([hits for hits, _data in exported], [0, 0, 1])
+            self.assertNotEqual(exported[0][1], exported[1][1])
+            self.assertEqual(exported[2][1], exported[0][1])
+
+    def test_export_max_kb_becomes_task_byte_budget(self):
+        app = DummyApp()
+        app.animation_type = DummyVar("Rainbow")
+        controller = BatchController(app)
+        with patch.object(controller, "_run_batch", return_value={"results": [], "cancelled": False}) as run_batch:
+            controller.save_all_images("out", export_max_kb=500)
+
+        self.assertEqual(run_batch.call_args[0][0][0]["max_bytes"], 500 * 1024)
+        self.assertIsNone(controller._export_max_bytes(0))
+
     def test_save_zip_summary_includes_written_processed_and_errors(self):
         app = DummyApp()
         controller = BatchController(app)
-        batch_result = {
-            "cancelled": False,
-            "results": [
-                {"status": "success", "saved_to": "C:/tmp/ok.png"},
-                {"status": "error", "path": "bad.png", "error": "boom"},
-            ],
-        }
-        with patch.object(controller, "_run_batch", return_value=batch_result), patch("zipfile.ZipFile"):
-            result = controller.save_zip("out.zip")
+        results = [
+            {"status": "success", "path": "image.png", "data": b"png", "filename": "image_custom.png"},
+            {"status": "error", "path": "bad.png", "error": "boom"},
+        ]
+
+        def run_batch(tasks, on_progress=None, cancel_event=None, on_result=None):
+            self.assertTrue(tasks[0]["return_bytes"])
+            for result in results:
+                on_result(result)
+            return {"cancelled": False, "results": results}
+
+        with TemporaryDirectory() as temp_dir:
+            target = f"{temp_dir}/out.zip"
+            with patch.object(controller, "_run_batch", side_effect=run_batch):
+                result = controller.save_zip(target)
+            with zipfile.ZipFile(target) as archive:
+                self.assertEqual(archive.namelist(), ["image_custom.png"])
+                self.assertEqual(archive.read("image_custom.png"), b"png")
 
         self.assertFalse(result["cancelled"])
         self.assertEqual(result["written"], 1)
         self.assertEqual(result["processed"], 2)
         self.assertEqual(result["errors"], 1)
-        self.assertEqual(result["zip_path"], "out.zip")
+        self.assertEqual(result["zip_path"], target)
+
+    def test_save_zip_streams_renders_in_list_order(self):
+        with TemporaryDirectory() as temp_dir:
+            paths = []
+            for name, color in (("b.png", "red"), ("a.png", "blue"), ("c.png", "green")):
+                path = f"{temp_dir}/{name}"
+                Image.new("RGB", (400, 600), color).save(path)
+                paths.append(path)
+            app = DummyApp()
+            app.image_list = paths
+            app.image_states = {path: {"pos": (0, 0), "size": (225, 350)} for path in paths}
+            controller = BatchController(app, render_cache=RenderCache(f"{temp_dir}/cache"))
+
+            def run_reversed(tasks, on_progress=None, cancel_event=None, on_result=None):
+                results = [process_image_task(task) for task in reversed(tasks)]
+                for result in results:
+                    on_result(result)
+                return {"results": results, "cancelled": False}
+
+            with patch.object(controller, "_run_batch", side_effect=run_reversed):
+                first = controller.save_zip(f"{temp_dir}/first.zip")
+                second = controller.save_zip(f"{temp_dir}/second.zip")
+
+            self.assertEqual(first["written"], 3)
+            self.assertEqual((second["cache_hits"], second["written"]), (3, 3))
+            with zipfile.ZipFile(f"{temp_dir}/first.zip") as one, zipfile.ZipFile(f"{temp_dir}/second.zip") as two:
+                names = ["b_custom.png", "a_custom.png", "c_custom.png"]
+                self.assertEqual(one.namelist(), names)
+                self.assertEqual(two.namelist(), names)
+                self.assertEqual(one.getinfo("a_custom.png").compress_type, zipfile.ZIP_STORED)
+                for name in names:
+                    self.assertEqual(one.read(name), two.read(name))
+
+    def test_upload_sends_posts_in_list_order_as_renders_arrive(self):
+        with TemporaryDirectory() as temp_dir:
+            paths = []
+            for name, color in (("b.png", "red"), ("a.png", "blue"), ("c.png", "green")):
+                path = f"{temp_dir}/{name}"
+                Image.new("RGB", (400, 600), color).save(path)
+                paths.append(path)
+            app = DummyApp()
+            app.image_list = paths
+            app.image_states = {path: {"pos": (0, 0), "size": (225, 350)} for path in paths}
+            controller = BatchController(app, render_cache=RenderCache(f"{temp_dir}/cache"))
+            progress = []
+
+            def run_reversed(tasks, on_progress=None, cancel_event=None, on_result=None):
+                results = [process_image_task(task) for task in reversed(tasks)]
+                for completed, result in enumerate(results, start=1):
+                    on_result(result)
+                    on_progress(completed, len(tasks), "")
+                return {"results": results, "cancelled": False}
+
+            with patch.object(controller, "_run_batch", side_effect=run_reversed), patch(
+                "src.core.uploader.UPLOAD_BATCH_SIZE", 2
+            ):
+                result = controller.upload_to_imgchest(
+                    "Album", progress_callback=lambda *args: progress.append(args)
+                )
+
+            names = ["b_custom.png", "a_custom.png", "c_custom.png"]
+            self.assertEqual(result["links"], [f"https://imgchest.com/i/{name}" for name in names])
+            self.assertEqual((result["uploaded"], result["errors"]), (3, []))
+            self.assertEqual(
+                app.uploader.posts,
+                [("Album (Part 1)", names[:2]), ("Album (Part 2)", names[2:])],
+            )
+            self.assertEqual(progress[-1][:2], (6, 6))
+
+    def test_upload_without_uploader_fails_before_rendering(self):
+        app = DummyApp()
+        app.uploader = None
+        controller = BatchController(app)
+        with patch.object(controller, "_run_batch") as run_batch:
+            with self.assertRaises(ValueError):
+                controller.upload_to_imgchest("Album")
+        run_batch.assert_not_called()
+
+    def test_cancelled_zip_is_removed(self):
+        controller = BatchController(DummyApp())
+        with TemporaryDirectory() as temp_dir:
+            target = f"{temp_dir}/out.zip"
+            with patch.object(controller, "_run_batch", return_value={"results": [], "cancelled": True}):
+                result = controller.save_zip(target)
+            self.assertTrue(result["cancelled"])
+            self.assertFalse(os.path.exists(target))
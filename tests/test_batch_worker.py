@@ -1,10 +1,13 @@
+import os
 import tempfile
 import unittest
 
+import numpy as np
 from PIL import Image
 
-from src.config.settings import BORDA_HEIGHT, BORDA_WIDTH
+from src.config.settings import BORDA_HEIGHT, BORDA_WIDTH, BORDER_THICKNESS
 from src.core.batch_worker import process_image_task
+from src.core.image_processor import ImageProcessor
 
 
 class TestBatchWorker(unittest.TestCase):
@@ -67,3 +70,98 @@ class TestBatchWorker(unittest.TestCase):
             self.assertTrue(result["saved_to"].endswith("output.gif"))
             with Image.open(output) as img:
                 self.assertEqual(img.format, "GIF")
+
+    def test_process_image_task_byte_budget_records_tuning(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = f"{tmp}/source.png"
+            output = f"{tmp}/output.webp"
+            Image.new("RGBA", (512, 512), "blue").save(source)
+
+            result = process_image_task(
+                {
+                    "path": source,
+                    "state": {"pos": (0, 0), "size": (BORDA_WIDTH, BORDA_HEIGHT)},
+                    "borda_pos": (0, 0),
+                    "anim_type": "Spin",
+                    "border_color": "#FF0000",
+                    "output_path": output,
+                    "export_format": "webp",
+                    "max_bytes": 200 * 1024,
+                }
+            )
+
+            self.assertEqual(result["status"], "success", result.get("error"))
+            tuning = result["tuning"]
+            self.assertTrue(tuning["fits"])
+            self.assertEqual(os.path.getsize(output), tuning["bytes"])
+            with Image.open(output) as img:
+                self.assertEqual(img.n_frames, tuning["frames"])
+
+    def test_reduced_decode_stays_close_to_full_resolution_render(self):
+        # Photo-like source big enough for a 4x reduce at render time.
+        rng = np.random.default_rng(7)
+        y, x = np.mgrid[0:2800, 0:1800]
+        pixels = np.stack([x * 255 // 1800, y * 255 // 2800, (x + y) % 256], axis=-1) + rng.normal(0, 20, (2800, 1800, 3))
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).convert("RGBA")
+        state = {"pos": (-40, -30), "size": (BORDA_WIDTH + 80, BORDA_HEIGHT + 120)}
+        with tempfile.TemporaryDirectory() as tmp:
+            source = f"{tmp}/source.png"
+            image.save(source)
+            task = {"path": source, "state": state, "borda_pos": (0, 0), "anim_type": "Nenhuma", "border_color": "#FFFFFF"}
+            reduced = process_image_task(task)["image"]
+            exact = process_image_task({**task, "exact_source": True})["image"]
+
+        expected = ImageProcessor.add_borda_to_image(
+            ImageProcessor.render_image_to_borda(image, state["pos"], state["size"], (0, 0)), "#FFFFFF"
+        )
+        self.assertEqual(exact.tobytes(), expected.tobytes())
+        difference = np.abs(np.asarray(reduced, dtype=np.int16) - np.asarray(expected, dtype=np.int16))
+        # Accepted cost of the reduced decode: a few levels per channel.
+        self.assertLess(difference.mean(), 2.0)
+        self.assertLessEqual(difference.max(), 32)
+
+    def test_frame_threads_give_the_same_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = f"{tmp}/source.png"
+            Image.effect_noise((300, 300), 60).convert("RGBA").save(source)
+            outputs = []
+            for threads in (1, 3):
+                output = f"{tmp}/output_{threads}.gif"
+                result = process_image_task(
+                    {
+                        "path": source,
+                        "state": {"pos": (0, 0), "size": (BORDA_WIDTH, BORDA_HEIGHT)},
+                        "borda_pos": (0, 0),
+                        "anim_type": "Glitch",
+                        "border_color": "#FFFFFF",
+                        "output_path": output,
+                        "frame_threads": threads,
+                    }
+                )
+                self.assertEqual(result["status"], "success", result.get("error"))
+                with open(output, "rb") as f:
+                    outputs.append(f.read())
+
+            self.assertEqual(outputs[0], outputs[1])
+
+    def test_animated_frames_show_content_resampled_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = f"{tmp}/source.png"
+            image = Image.effect_noise((300, 300), 60).convert("RGBA")
+            image.save(source)
+            state = {"pos": (-20, -10), "size": (BORDA_WIDTH + 60, BORDA_HEIGHT + 40)}
+            result = process_image_task(
+                {
+                    "path": source,
+                    "state": state,
+                    "borda_pos": (0, 0),
+                    "anim_type": "Rainbow",
+                    "border_color": "#FFFFFF",
+                }
+            )
+            self.assertEqual(result["status"], "success", result.get("error"))
+            content = ImageProcessor.render_content_window(image, state["pos"], state["size"], (0, 0), BORDER_THICKNESS)
+            frame = np.asarray(result["frames"][0])
+            self.assertEqual(frame.shape, (BORDA_HEIGHT, BORDA_WIDTH, 4))
+            interior = frame[BORDER_THICKNESS:-BORDER_THICKNESS, BORDER_THICKNESS:-BORDER_THICKNESS]
+            np.testing.assert_array_equal(interior, np.asarray(content))
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+from src.config.settings import BORDA_HEIGHT
+from src.core.bulk_fit import fit_image_task, iter_fit_results, resolve_fit_workers
+
+
+class FakeCascade:
+    def __init__(self, faces):
+        self.faces = faces
+
+    def empty(self):
+        return False
+
+    def detectMultiScale(self, image, scaleFactor, minNeighbors, minSize):
+        return np.array(self.faces, dtype=np.int32).reshape(-1, 4)
+
+
+class TestBulkFit(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _image(self, name, size=(1600, 1200)):
+        path = os.path.join(self.tmp.name, name)
+        Image.new("RGB", size, "gray").save(path)
+        return path
+
+    def test_fit_image_task_maps_record_to_source_pixels(self):
+        path = self._image("a.png")
+        task = {"path": path, "borda_pos": (0, 0), "working_size": 800}
+
+        result = fit_image_task(task, face_cascade=FakeCascade([(100, 50, 80, 80)]))
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["record"].source_size, (1600, 1200))
+        self.assertEqual(result["record"].best, (200, 100, 160, 160))
+        new_w, new_h, _pos_x, _pos_y = result["fit"]
+        self.assertEqual(new_h, int(1200 * (0.55 * BORDA_HEIGHT) / 160))
+
+    def test_fit_image_task_edited_image_record_uses_edited_pixels(self):
+        edited = Image.new("RGB", (600, 800), "gray")
+        task = {"path": "/nonexistent.png", "image": edited, "borda_pos": (0, 0), "working_size": 800}
+
+        result = fit_image_task(task, face_cascade=FakeCascade([]))
+
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["record"].source_size, (600, 800))
+        self.assertIsNone(result["face"])
+        self.assertEqual(result["fit"][:2], (262, 350))
+
+    def test_fit_image_task_reports_unreadable_file(self):
+        result = fit_image_task(
+            {"path": os.path.join(self.tmp.name, "missing.png"), "borda_pos": (0, 0)},
+            face_cascade=FakeCascade([]),
+        )
+        self.assertEqual(result["status"], "error")
+
+    def test_iter_fit_results_streams_every_task(self):
+        paths = [self._image(f"{i}.png", (400, 300)) for i in range(3)]
+        tasks = [{"path": path, "borda_pos": (0, 0), "working_size": 800} for path in paths]
+
+        results = list(iter_fit_results(tasks, max_workers=2))
+
+        self.assertEqual(sorted(r["path"] for r in results), sorted(paths))
+        self.assertTrue(all(r["status"] == "success" and r["fit"] for r in results))
+
+    def test_iter_fit_results_stops_when_cancelled(self):
+        cancel = threading.Event()
+        cancel.set()
+        tasks = [{"path": self._image("a.png"), "borda_pos": (0, 0)}]
+
+        self.assertEqual(list(iter_fit_results(tasks, max_workers=1, cancel_event=cancel)), [])
+
+    def test_resolve_fit_workers_caps_by_task_count(self):
+        with mock.patch("src.core.bulk_fit.os.cpu_count", return_value=16):
+            self.assertEqual(resolve_fit_workers(task_count=100), 15)
+            self.assertEqual(resolve_fit_workers(8, task_count=2), 2)
+            self.assertEqual(resolve_fit_workers("bad", task_count=1), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 
 from src.core.editor_state import EditorState, UiPreferences
+from src.core.face_index import FaceRecord
 
 
 class DummyConfig:
@@ -46,6 +47,15 @@ class TestEditorState(unittest.TestCase):
         self.assertEqual(state.current_image_index, 1)
         self.assertEqual(state.current_image_path, "c.png")
 
+    def test_remove_image_drops_face_geometry(self):
+        state = EditorState(image_list=["a.png", "b.png"])
+        state.face_geometry["a.png"] = FaceRecord(source_size=(10, 10), best=(1, 1, 4, 4))
+        state.face_geometry["b.png"] = FaceRecord(source_size=(10, 10), best=None)
+
+        state.remove_image("a.png")
+
+        self.assertEqual(list(state.face_geometry), ["b.png"])
+
     def test_ui_preferences_round_trip_app_config(self):
         cfg = DummyConfig()
         prefs = UiPreferences.from_app_config(cfg)
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from src.core.face_index import FaceIndex, FaceRecord
+
+
+class TestFaceIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cascade = self._path("cascade.xml")
+        with open(self.cascade, "w", encoding="utf-8") as f:
+            f.write("<cascade/>")
+        self.index = FaceIndex(db_path=self._path("idx", "faces.sqlite3"), cascade_path=self.cascade, working_size=800)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def _path(self, *parts):
+        return os.path.join(self.tmp.name, *parts)
+
+    def _image(self, name, size=(400, 300)):
+        path = self._path(name)
+        Image.new("RGB", size, "white").save(path)
+        return path
+
+    def test_round_trip_keeps_best_and_candidates(self):
+        path = self._image("a.png")
+        record = FaceRecord(source_size=(400, 300), best=(10, 20, 60, 60), candidates=[(10, 20, 60, 60), (200, 30, 40, 40)])
+
+        self.index.store(path, record)
+
+        self.assertEqual(self.index.lookup(path), record)
+
+    def test_caches_no_face_result(self):
+        path = self._image("empty.png")
+        self.index.store(path, FaceRecord(source_size=(400, 300), best=None, candidates=[]))
+
+        found = self.index.lookup(path)
+
+        self.assertIsNotNone(found)
+        self.assertIsNone(found.best)
+        self.assertEqual(found.candidates, [])
+
+    def test_lookup_many_answers_large_folders(self):
+        paths = [self._image(f"img_{i}.png", size=(20, 20)) for i in range(620)]
+        self.index.store_many((p, FaceRecord(source_size=(20, 20), best=(1, 2, 3, 4))) for p in paths[::2])
+
+        found = self.index.lookup_many(paths + [self._path("missing.png")])
+
+        self.assertEqual(set(found), set(paths[::2]))
+
+    def test_modified_file_misses(self):
+        path = self._image("a.png")
+        self.index.store(path, FaceRecord(source_size=(400, 300), best=(1, 1, 5, 5)))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        self.assertIsNone(self.index.lookup(path))
+
+    def test_detector_params_change_key(self):
+        path = self._image("a.png")
+        self.index.store(path, FaceRecord(source_size=(400, 300), best=(1, 1, 5, 5)))
+        db_path = self.index.db_path
+
+        other_size = FaceIndex(db_path=db_path, cascade_path=self.cascade, working_size=600)
+        refined = FaceIndex(db_path=db_path, cascade_path=self.cascade, working_size=800, refine=True)
+        same = FaceIndex(db_path=db_path, cascade_path=self.cascade, working_size=800)
+        with open(self.cascade, "a", encoding="utf-8") as f:
+            f.write("<!-- retrained -->")
+        new_cascade = FaceIndex(db_path=db_path, cascade_path=self.cascade, working_size=800)
+        try:
+            self.assertIsNone(other_size.lookup(path))
+            self.assertIsNone(refined.lookup(path))
+            self.assertIsNone(new_cascade.lookup(path))
+            self.assertIsNotNone(same.lookup(path))
+        finally:
+            for index in (other_size, refined, same, new_cascade):
+                index.close()
+
+    def test_scaled_to_maps_rects(self):
+        record = FaceRecord(source_size=(400, 300), best=(40, 30, 80, 60), candidates=[(40, 30, 80, 60)])
+
+        scaled = record.scaled_to((800, 600))
+
+        self.assertEqual(scaled.source_size, (800, 600))
+        self.assertEqual(scaled.best, (80, 60, 160, 120))
+        self.assertEqual(scaled.candidates, [(80, 60, 160, 120)])
+
+    def test_transposed_matches_pixel_transform(self):
+        image = Image.new("L", (400, 300), 0)
+        image.paste(255, (40, 30, 120, 90))
+        record = FaceRecord(source_size=(400, 300), best=(40, 30, 80, 60), candidates=[(40, 30, 80, 60)])
+
+        for method in Image.Transpose:
+            with self.subTest(method=method):
+                moved = record.transposed(method)
+                transformed = image.transpose(method)
+                x, y, w, h = moved.best
+                self.assertEqual(moved.source_size, transformed.size)
+                self.assertEqual(transformed.getbbox(), (x, y, x + w, y + h))
+                self.assertEqual(moved.candidates, [moved.best])
+
+    def test_transposed_round_trip_is_identity(self):
+        record = FaceRecord(source_size=(400, 300), best=(40, 30, 80, 60))
+
+        back = record.transposed(Image.Transpose.ROTATE_90).transposed(Image.Transpose.ROTATE_270)
+
+        self.assertEqual(back, record)
+
+    def test_unwritable_location_degrades_to_no_cache(self):
+        blocker = self._path("blocker")
+        with open(blocker, "w", encoding="utf-8") as f:
+            f.write("x")
+        index = FaceIndex(db_path=os.path.join(blocker, "faces.sqlite3"), cascade_path=self.cascade)
+        path = self._image("a.png")
+
+        index.store(path, FaceRecord(source_size=(400, 300), best=(1, 1, 5, 5)))
+
+        self.assertFalse(index.available)
+        self.assertEqual(index.lookup_many([path]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+
+import numpy as np
+
+from src.core.frame_cache import ArrayLRUCache
+
+
+def _stack(frames, fill=0):
+    return np.full((frames, 4, 4, 4), fill, dtype=np.uint8)
+
+
+class TestArrayLRUCache(unittest.TestCase):
+    def test_hit_returns_same_read_only_stack(self):
+        cache = ArrayLRUCache(max_bytes=10_000)
+        calls = []
+
+        first = cache.get_or_create("a", lambda: calls.append(1) or _stack(2))
+        second = cache.get_or_create("a", lambda: calls.append(1) or _stack(2))
+
+        self.assertIs(first, second)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertFalse(first.flags.writeable)
+
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = ArrayLRUCache(max_bytes=3 * 64)
+        for key in ("a", "b", "c"):
+            cache.get_or_create(key, lambda: _stack(1))
+        cache.get_or_create("a", lambda: _stack(1))
+
+        cache.get_or_create("d", lambda: _stack(1))
+
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.current_bytes, 3 * 64)
+        misses = cache.misses
+        cache.get_or_create("a", lambda: _stack(1))
+        self.assertEqual(cache.misses, misses)
+        cache.get_or_create("b", lambda: _stack(1))
+        self.assertEqual(cache.misses, misses + 1)
+
+    def test_oversized_stack_is_returned_but_not_kept(self):
+        cache = ArrayLRUCache(max_bytes=100)
+
+        frames = cache.get_or_create("big", lambda: _stack(4))
+
+        self.assertEqual(frames.shape[0], 4)
+        self.assertEqual(len(cache), 0)
+
+    def test_entry_bound_evicts_least_recently_used(self):
+        cache = ArrayLRUCache(max_entries=2)
+        for key in ("a", "b"):
+            cache.get_or_create(key, lambda: _stack(1))
+        cache.get_or_create("a", lambda: _stack(1))
+
+        cache.get_or_create("c", lambda: _stack(8))
+
+        self.assertEqual(len(cache), 2)
+        misses = cache.misses
+        cache.get_or_create("a", lambda: _stack(1))
+        self.assertEqual(cache.misses, misses)
+        cache.get_or_create("b", lambda: _stack(1))
+        self.assertEqual(cache.misses, misses + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from src.core.frame_runs import FrameRuns, frame_digest, loop_period
+
+
+def _frames(colors, size=(8, 6)):
+    width, height = size
+    frames = np.zeros((len(colors), height, width, 4), dtype=np.uint8)
+    for frame, color in zip(frames, colors):
+        frame[:] = (color, 255 - color, 0, 255)
+    return frames
+
+
+def _run(colors, duration=50):
+    frames = _frames(colors)
+    runs = FrameRuns(iter(frames), duration)
+    kept = [int(frame[0, 0, 0]) for frame in runs]
+    return kept[: len(runs.durations)], runs.durations, runs
+
+
+class TestFrameRuns(unittest.TestCase):
+    def test_consecutive_duplicates_merge_into_one_frame(self):
+        kept, durations, runs = _run([1, 1, 2, 3, 3, 3, 4])
+
+        self.assertEqual(kept, [1, 2, 3, 4])
+        self.assertEqual(durations, [100, 50, 150, 50])
+        self.assertEqual(runs.source_count, 7)
+
+    def test_repeated_period_is_kept_once(self):
+        kept, durations, _runs = _run([1, 1, 2, 2, 1, 1, 2, 2])
+
+        self.assertEqual(kept, [1, 2])
+        self.assertEqual(durations, [100, 100])
+
+    def test_last_frame_equal_to_first_is_folded_into_it(self):
+        kept, durations, _runs = _run([1, 2, 3, 1])
+
+        self.assertEqual(kept, [1, 2, 3])
+        self.assertEqual(durations, [100, 50, 50])
+
+    def test_identical_frames_become_one(self):
+        kept, durations, _runs = _run([7] * 10)
+
+        self.assertEqual((kept, durations), ([7], [500]))
+
+    def test_loop_period(self):
+        self.assertEqual(loop_period([1, 2, 1, 2, 1, 2]), 2)
+        self.assertEqual(loop_period([1, 2, 1, 3]), 4)
+        self.assertEqual(loop_period([]), 0)
+
+    def test_digest_depends_on_shape(self):
+        frame = np.zeros((4, 6, 4), dtype=np.uint8)
+
+        self.assertNotEqual(frame_digest(frame), frame_digest(frame.reshape(6, 4, 4)))
+        self.assertEqual(frame_digest(frame), frame_digest(frame.copy()))
+
+
+if __name__ == "__main__":
+    unittest.main()
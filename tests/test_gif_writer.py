@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image, ImageSequence
+
+from src.core.gif_writer import GIF_TRANSPARENT_INDEX, save_delta_gif
+
+
+def _frames(count=4, size=(40, 60), border=3):
+    width, height = size
+    frames = np.empty((count, height, width, 4), dtype=np.uint8)
+    yy, xx = np.mgrid[0:height, 0:width]
+    interior = np.stack([xx * 6 % 256, yy * 4 % 256, (xx + yy) % 256, np.full_like(xx, 255)], axis=-1)
+    for i in range(count):
+        frames[i] = (255 * (i % 2), 40 * i % 256, (255 - 40 * i) % 256, 255)
+        frames[i, border:-border, border:-border] = interior[border:-border, border:-border]
+    return frames
+
+
+class TestGifWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "out.gif")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_decoded_frames_match_source(self):
+        frames = _frames()
+
+        save_delta_gif(frames, self.path, 50)
+
+        with Image.open(self.path) as gif:
+            self.assertEqual(gif.n_frames, len(frames))
+            for index, frame in enumerate(ImageSequence.Iterator(gif)):
+                decoded = np.asarray(frame.convert("RGB")).astype(int)
+                error = np.abs(decoded - frames[index, ..., :3])
+                self.assertLess(error.mean(), 4, f"frame {index}")
+                # The solid ring survives quantization exactly.
+                self.assertEqual(error[0].max(), 0, f"frame {index}")
+
+    def test_later_frames_only_carry_the_ring(self):
+        frames = _frames()
+
+        save_delta_gif([Image.fromarray(frame) for frame in frames], self.path, 50)
+
+        with open(self.path, "rb") as f:
+            data = f.read()
+        # Graphic control extension: disposal 1 + transparent flag, transparent index 255.
+        control = b"\x21\xf9\x04\x05" + (50 // 10).to_bytes(2, "little") + bytes([GIF_TRANSPARENT_INDEX])
+        self.assertEqual(data.count(control), len(frames))
+        with Image.open(self.path) as gif:
+            first = np.asarray(gif.convert("RGB"))
+            gif.seek(1)
+            second = np.asarray(gif.convert("RGB"))
+        self.assertTrue((first[3:-3, 3:-3] == second[3:-3, 3:-3]).all())
+
+    def test_smaller_than_full_frame_gif(self):
+        frames = _frames(count=8, size=(120, 180))
+        full_path = os.path.join(self.tmp.name, "full.gif")
+        full = [Image.fromarray(frame).convert("P", palette=Image.ADAPTIVE) for frame in frames]
+        full[0].save(full_path, save_all=True, append_images=full[1:], duration=50, disposal=2, loop=0)
+
+        save_delta_gif(frames, self.path, 50)
+
+        self.assertLess(os.path.getsize(self.path) * 3, os.path.getsize(full_path))
+
+    def test_repeated_frames_are_written_once_with_summed_duration(self):
+        frames = _frames()
+        save_delta_gif([frames[0], frames[1], frames[1], frames[1], frames[2]], self.path, 50)
+
+        with Image.open(self.path) as image:
+            durations = [frame.info["duration"] for frame in ImageSequence.Iterator(image)]
+        self.assertEqual(durations, [50, 150, 50])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+
+from PIL import Image
+
+from src.core.image_loader import (
+    DEFAULT_FRAME_DURATION_MS,
+    animation_durations,
+    iter_frames_at_scale,
+    open_image_at_scale,
+    reduction_factor,
+)
+
+
+class TestImageLoader(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.jpeg_path = f"{self.tmp.name}/source.jpg"
+        self.png_path = f"{self.tmp.name}/source.png"
+        self.palette_path = f"{self.tmp.name}/source.gif"
+        base = Image.radial_gradient("L").resize((1600, 1200)).convert("RGB")
+        base.save(self.jpeg_path, quality=90)
+        base.convert("RGBA").save(self.png_path)
+        base.convert("P").save(self.palette_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_reduction_factor_covers_target(self):
+        self.assertEqual(reduction_factor((1600, 1200), min_size=(225, 350)), 2)
+        self.assertEqual(reduction_factor((1600, 1200), min_side=400), 4)
+        self.assertEqual(reduction_factor((1600, 1200), min_side=400, reducing_gap=2.0), 2)
+        self.assertEqual(reduction_factor((1600, 1200)), 1)
+        self.assertEqual(reduction_factor((300, 300), min_size=(225, 350)), 1)
+
+    def test_jpeg_decodes_at_reduced_scale(self):
+        image = open_image_at_scale(self.jpeg_path, min_side=300)
+        self.assertEqual(image.mode, "RGBA")
+        self.assertEqual(image.size, (400, 300))
+        image.close()
+
+    def test_jpeg_beyond_draft_range_is_reduced(self):
+        image = open_image_at_scale(self.jpeg_path, min_side=90)
+        self.assertEqual(image.size, (100, 75))
+        image.close()
+
+    def test_png_is_reduced_and_covers_min_size(self):
+        image = open_image_at_scale(self.png_path, min_size=(225, 350))
+        self.assertGreaterEqual(image.width, 225)
+        self.assertGreaterEqual(image.height, 350)
+        self.assertEqual(image.size, (800, 600))
+        image.close()
+
+    def test_palette_source_is_converted_before_reduce(self):
+        image = open_image_at_scale(self.palette_path, min_side=400)
+        self.assertEqual(image.mode, "RGBA")
+        self.assertEqual(image.size, (400, 300))
+        image.close()
+
+    def test_without_target_returns_full_image(self):
+        image = open_image_at_scale(self.jpeg_path)
+        self.assertEqual(image.size, (1600, 1200))
+        self.assertEqual(image.mode, "RGBA")
+        image.close()
+
+    def _save_animation(self, path, durations):
+        frames = [Image.new("RGB", (800, 600), (index * 40, 0, 0)) for index in range(len(durations))]
+        frames[0].save(path, save_all=True, append_images=frames[1:], duration=durations, loop=0)
+
+    def test_animation_durations_of_gif_and_webp(self):
+        gif_path = f"{self.tmp.name}/anim.gif"
+        webp_path = f"{self.tmp.name}/anim.webp"
+        self._save_animation(gif_path, [70, 120, 0])
+        self._save_animation(webp_path, [70, 120, 50])
+        self.assertEqual(animation_durations(gif_path), [70, 120, DEFAULT_FRAME_DURATION_MS])
+        self.assertEqual(animation_durations(webp_path), [70, 120, 50])
+
+    def test_animation_durations_of_still_image_is_none(self):
+        self.assertIsNone(animation_durations(self.png_path))
+
+    def test_iter_frames_reduces_every_frame(self):
+        gif_path = f"{self.tmp.name}/anim.gif"
+        self._save_animation(gif_path, [70, 120, 80])
+        frames = list(iter_frames_at_scale(gif_path, min_side=300))
+        self.assertEqual([duration for _frame, duration in frames], [70, 120, 80])
+        for index, (frame, _duration) in enumerate(frames):
+            self.assertEqual(frame.mode, "RGBA")
+            self.assertEqual(frame.size, (400, 300))
+            self.assertEqual(frame.getpixel((200, 150))[0], index * 40)
+            frame.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
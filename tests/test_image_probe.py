@@ -0,0 +1,94 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from src.core import image_probe
+from src.core.image_probe import clear_probe_cache, probe_image, probe_images
+from src.core.image_processor import ImageProcessor
+
+
+class TestImageProbe(unittest.TestCase):
+    def setUp(self):
+        clear_probe_cache()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        clear_probe_cache()
+        self.tmp.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def test_reads_header_fields(self):
+        path = self._path("photo.jpg")
+        exif = Image.Exif()
+        exif[image_probe.EXIF_ORIENTATION_TAG] = 6
+        Image.new("RGB", (640, 480), "red").save(path, exif=exif.tobytes())
+
+        info = probe_image(path)
+
+        self.assertEqual(info.size, (640, 480))
+        self.assertEqual((info.width, info.height), (640, 480))
+        self.assertEqual(info.mode, "RGB")
+        self.assertEqual(info.format, "JPEG")
+        self.assertEqual(info.orientation, 6)
+        self.assertFalse(info.is_animated)
+
+    def test_counts_animated_frames(self):
+        path = self._path("anim.gif")
+        frames = [Image.new("RGB", (32, 32), (i * 40, 0, 0)) for i in range(4)]
+        frames[0].save(path, save_all=True, append_images=frames[1:])
+
+        info = probe_image(path)
+
+        self.assertEqual(info.frame_count, 4)
+        self.assertTrue(info.is_animated)
+
+    def test_png_probe_does_not_decode_pixels(self):
+        path = self._path("big.png")
+        Image.new("RGBA", (300, 200), "blue").save(path)
+        with patch.object(Image.Image, "load", side_effect=AssertionError("decoded")):
+            info = probe_image(path)
+        self.assertEqual(info.size, (300, 200))
+
+    def test_cached_until_file_changes(self):
+        path = self._path("a.png")
+        Image.new("RGB", (100, 50)).save(path)
+        with patch.object(image_probe, "_read_header", wraps=image_probe._read_header) as reader:
+            probe_image(path)
+            probe_image(path)
+            self.assertEqual(reader.call_count, 1)
+
+            Image.new("RGB", (70, 90)).save(path)
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            self.assertEqual(probe_image(path).size, (70, 90))
+            self.assertEqual(reader.call_count, 2)
+
+    def test_probe_images_skips_unreadable_files(self):
+        good = self._path("good.png")
+        bad = self._path("bad.png")
+        Image.new("RGB", (10, 10)).save(good)
+        with open(bad, "wb") as f:
+            f.write(b"not an image")
+
+        result = probe_images([good, bad, self._path("missing.png")])
+
+        self.assertEqual(list(result), [good])
+
+    def test_auto_fit_accepts_probe_result(self):
+        path = self._path("fit.png")
+        image = Image.new("RGB", (800, 600))
+        image.save(path)
+
+        from_probe = ImageProcessor.calculate_auto_fit_pos(probe_image(path), (15, 15))
+        from_image = ImageProcessor.calculate_auto_fit_pos(image, (15, 15))
+
+        self.assertEqual(from_probe, from_image)
+
+
+if __name__ == "__main__":
+    unittest.main()
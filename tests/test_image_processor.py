@@ -1,9 +1,27 @@
 
 import unittest
+
+import numpy as np
 from PIL import Image, ImageDraw
 from src.core.image_processor import ImageProcessor
 from src.config.settings import BORDA_WIDTH, BORDA_HEIGHT, BORDER_THICKNESS
 
+class FakeCascade:
+    """Returns scripted detections and records what the detector was given."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    def empty(self):
+        return False
+
+    def detectMultiScale(self, image, scaleFactor, minNeighbors, minSize):
+        self.calls.append({"shape": image.shape, "scaleFactor": scaleFactor, "minSize": minSize})
+        faces = self.responses.pop(0) if self.responses else []
+        return np.array(faces, dtype=np.int32).reshape(-1, 4)
+
+
 class TestImageProcessor(unittest.TestCase):
     def setUp(self):
         # Patterned image so positional crop regressions are detectable.
@@ -61,5 +79,108 @@ class TestImageProcessor(unittest.TestCase):
 
         self.assertEqual(list(cropped.getdata()), list(rendered.getdata()))
 
+    def test_render_region_mode_matches_full_mode(self):
+        cases = [
+            ((-50, -30), (500, 375), self.borda_pos),
+            ((102, 84), (317, 476), (170, 120)),
+            ((-2400, -1900), (6400, 4800), (15, 15)),
+            ((-300, 10), (1600, 1200), (0, 0)),
+            ((15, 15), (800, 600), (15, 15)),
+            ((200, 300), (120, 90), (15, 15)),
+        ]
+        for pos, size, borda_pos in cases:
+            with self.subTest(pos=pos, size=size):
+                full = ImageProcessor.render_image_to_borda(self.img, pos, size, borda_pos, mode="full")
+                region = ImageProcessor.render_image_to_borda(self.img, pos, size, borda_pos, mode="region")
+                self.assertEqual(full.tobytes(), region.tobytes())
+
+    def test_render_region_mode_matches_full_mode_with_soft_alpha(self):
+        soft = self.img.copy()
+        soft.putalpha(Image.linear_gradient("L").resize(soft.size))
+        pos, size = (-700, -400), (2400, 1800)
+        full = ImageProcessor.render_image_to_borda(soft, pos, size, self.borda_pos, mode="full")
+        region = ImageProcessor.render_image_to_borda(soft, pos, size, self.borda_pos, mode="region")
+        self.assertEqual(full.tobytes(), region.tobytes())
+
+    def test_render_region_mode_outside_border_is_transparent(self):
+        rendered = ImageProcessor.render_image_to_borda(self.img, (1000, 1000), (400, 300), self.borda_pos, mode="region")
+        self.assertEqual(rendered.getbbox(), None)
+
+    def test_render_content_window_resamples_once_into_interior(self):
+        inner = (BORDA_WIDTH - 2 * BORDER_THICKNESS, BORDA_HEIGHT - 2 * BORDER_THICKNESS)
+        content = ImageProcessor.render_content_window(
+            self.img, (15, 15), (BORDA_WIDTH, BORDA_HEIGHT), self.borda_pos, BORDER_THICKNESS
+        )
+        self.assertEqual(content.size, inner)
+        self.assertEqual(content.tobytes(), self.img.resize(inner, Image.LANCZOS).tobytes())
+
+    def test_render_content_window_region_mode_matches_full_mode(self):
+        pos, size = (-300, -250), (1600, 1200)
+        full = ImageProcessor.render_content_window(self.img, pos, size, self.borda_pos, BORDER_THICKNESS, mode="full")
+        region = ImageProcessor.render_content_window(self.img, pos, size, self.borda_pos, BORDER_THICKNESS, mode="region")
+        self.assertEqual(full.tobytes(), region.tobytes())
+
+    def test_render_content_window_without_interior_is_none(self):
+        self.assertIsNone(
+            ImageProcessor.render_content_window(self.img, (0, 0), (800, 600), (0, 0), border_width=BORDA_WIDTH)
+        )
+
+    def test_detect_anime_face_runs_on_working_image_and_maps_back(self):
+        source = Image.new("RGB", (3200, 2400), "gray")
+        cascade = FakeCascade([(100, 50, 80, 80), (10, 10, 40, 40)])
+
+        face = ImageProcessor.detect_anime_face(source, cascade, working_size=800)
+
+        self.assertEqual(cascade.calls[0]["shape"], (600, 800))
+        # Strict min size is 15% of the source short side, expressed at working scale.
+        self.assertEqual(cascade.calls[0]["minSize"], (90, 90))
+        self.assertEqual(face, (400, 200, 320, 320))
+        self.assertIsInstance(face[0], int)
+
+    def test_detect_anime_face_min_sizes_follow_full_resolution_source(self):
+        # A 1600x1200 source decoded at 1/4: the strict minimum is 15% of the
+        # source short side (180 source px), not the 60 px floor of the reduced copy.
+        reduced = Image.new("RGB", (400, 300), "gray")
+        cascade = FakeCascade([], [(10, 10, 40, 40)])
+
+        face = ImageProcessor.detect_anime_face(reduced, cascade, working_size=800, source_size=(1600, 1200))
+
+        self.assertEqual(cascade.calls[0]["minSize"], (45, 45))
+        self.assertEqual(cascade.calls[1]["minSize"], (24, 24))
+        self.assertEqual(face, (10, 10, 40, 40))
+
+    def test_detect_anime_face_relaxed_pass_when_strict_finds_nothing(self):
+        source = Image.new("RGB", (1600, 1200), "gray")
+        cascade = FakeCascade([], [(20, 30, 40, 50)])
+
+        face = ImageProcessor.detect_anime_face(source, cascade, working_size=800)
+
+        self.assertEqual([call["scaleFactor"] for call in cascade.calls], [1.1, 1.05])
+        self.assertEqual(face, (40, 60, 80, 100))
+
+    def test_detect_anime_face_full_resolution_when_working_size_is_none(self):
+        source = Image.new("RGB", (1600, 1200), "gray")
+        cascade = FakeCascade([(10, 20, 300, 300)])
+
+        face = ImageProcessor.detect_anime_face(source, cascade, working_size=None)
+
+        self.assertEqual(cascade.calls[0]["shape"], (1200, 1600))
+        self.assertEqual(cascade.calls[0]["minSize"], (180, 180))
+        self.assertEqual(face, (10, 20, 300, 300))
+
+    def test_detect_anime_face_returns_none_without_hits(self):
+        source = Image.new("RGB", (400, 300), "gray")
+        self.assertIsNone(ImageProcessor.detect_anime_face(source, FakeCascade([], [])))
+
+    def test_detect_anime_face_refine_uses_crop_around_hit(self):
+        source = Image.new("RGB", (4000, 3000), "gray")
+        cascade = FakeCascade([(100, 100, 50, 50)], [(40, 40, 100, 100)])
+
+        face = ImageProcessor.detect_anime_face(source, cascade, working_size=800, refine=True)
+
+        # Coarse hit is (500, 500, 250, 250); the refine crop spans 375..875 at full resolution.
+        self.assertEqual(cascade.calls[1]["shape"], (500, 500))
+        self.assertEqual(face, (415, 415, 100, 100))
+
 if __name__ == "__main__":
     unittest.main()
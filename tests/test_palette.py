@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from src.config.settings import PALETTE_BORDER_COLORS
+from src.core import palette as palette_module
+from src.core.frame_cache import ArrayLRUCache
+from src.core.palette import PALETTE_MAX_COLORS, build_global_palette, map_to_palette, quantize_colors
+
+
+def _stack(border_colors, size=(30, 40), border=2, seed=0):
+    width, height = size
+    rng = np.random.default_rng(seed)
+    content = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    content[..., 3] = 255
+    frames = np.empty((len(border_colors), height, width, 4), dtype=np.uint8)
+    for i, color in enumerate(border_colors):
+        frames[i] = color
+        frames[i, border:-border, border:-border] = content[border:-border, border:-border]
+    changing = np.ones((height, width), dtype=bool)
+    changing[border:-border, border:-border] = False
+    return frames, changing
+
+
+class TestPalette(unittest.TestCase):
+    def test_border_colors_are_kept_exactly(self):
+        colors = [(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255)]
+        frames, changing = _stack(colors)
+
+        palette = build_global_palette(frames[:, changing], frames[0][~changing])
+
+        self.assertLessEqual(len(palette), PALETTE_MAX_COLORS)
+        self.assertEqual({tuple(c) for c in palette[:3]}, {c[:3] for c in colors})
+        indexes = map_to_palette(frames[:, changing], palette)
+        self.assertTrue((palette[indexes] == frames[:, changing].reshape(-1, 4)[:, :3]).all())
+
+    def test_many_border_colors_are_quantized_to_the_budget(self):
+        colors = [(i, 255 - i, (i * 7) % 256, 255) for i in range(PALETTE_BORDER_COLORS * 2)]
+        frames, changing = _stack(colors)
+
+        border = quantize_colors(frames[:, changing], PALETTE_BORDER_COLORS)
+
+        self.assertEqual(len(border), PALETTE_BORDER_COLORS)
+
+    def test_palette_entries_are_unique(self):
+        frames, changing = _stack([(0, 0, 0, 255), (255, 255, 255, 255)])
+        frames[:, 5:10, 5:10] = (0, 0, 0, 255)
+
+        palette = build_global_palette(frames[:, changing], frames[0][~changing])
+        words = [tuple(c) for c in palette]
+
+        self.assertEqual(len(words), len(set(words)))
+
+    def test_map_to_palette_picks_nearest_color(self):
+        palette = np.array([[0, 0, 0], [200, 0, 0], [0, 0, 200]], dtype=np.uint8)
+        pixels = np.array([[190, 10, 5, 255], [5, 5, 5, 255], [0, 0, 200, 255]], dtype=np.uint8)
+
+        self.assertEqual(map_to_palette(pixels, palette).tolist(), [1, 0, 2])
+
+    def test_content_palette_is_cached_per_key(self):
+        frames, changing = _stack([(255, 0, 0, 255), (0, 255, 0, 255)])
+        cache = ArrayLRUCache(max_entries=4)
+
+        with mock.patch.object(palette_module, "_content_palettes", cache):
+            build_global_palette(frames[:, changing], frames[0][~changing], key="image")
+            build_global_palette(frames[::-1, changing], frames[-1][~changing], key="image")
+
+        self.assertEqual((cache.misses, len(cache)), (1, 1))
+        self.assertEqual(cache.hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
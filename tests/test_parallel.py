@@ -0,0 +1,54 @@
+import threading
+import time
+import unittest
+
+from src.core.parallel import ordered_thread_map
+
+
+class TestOrderedThreadMap(unittest.TestCase):
+    def test_results_keep_input_order(self):
+        def slow_square(value):
+            time.sleep(0.001 * (5 - value % 5))
+            return value * value
+
+        self.assertEqual(list(ordered_thread_map(slow_square, range(20), 4)), [v * v for v in range(20)])
+
+    def test_single_thread_runs_in_caller(self):
+        threads = list(ordered_thread_map(lambda _v: threading.get_ident(), range(3), 1))
+
+        self.assertEqual(set(threads), {threading.get_ident()})
+
+    def test_in_flight_calls_are_bounded_by_window(self):
+        lock = threading.Lock()
+        started = []
+
+        def track(value):
+            with lock:
+                started.append(value)
+            return value
+
+        consumed = 0
+        ahead = []
+        for _value in ordered_thread_map(track, range(30), 2, window=3):
+            consumed += 1
+            # A slow consumer: the workers finish everything submitted meanwhile.
+            time.sleep(0.01)
+            with lock:
+                ahead.append(len(started) - consumed)
+        self.assertEqual(consumed, 30)
+        self.assertLessEqual(max(ahead), 3)
+        # The pool does work ahead of the consumer, just not past the window.
+        self.assertGreaterEqual(max(ahead), 1)
+
+    def test_closing_stops_submitting(self):
+        calls = []
+        results = ordered_thread_map(calls.append, range(100), 2)
+
+        next(results)
+        results.close()
+
+        self.assertLess(len(calls), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
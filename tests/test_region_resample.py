@@ -0,0 +1,52 @@
+import random
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from src.core.region_resample import resample_region
+
+
+class TestRegionResample(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.rgba = Image.fromarray(rng.integers(0, 256, (240, 320, 4), dtype=np.uint8), "RGBA")
+
+    def tearDown(self):
+        self.rgba.close()
+
+    def _assert_parity(self, image, size, window):
+        expected = image.resize(size, Image.LANCZOS).crop(window)
+        actual = resample_region(image, size, window)
+        self.assertEqual(actual.mode, expected.mode)
+        self.assertEqual(actual.size, expected.size)
+        self.assertEqual(actual.tobytes(), expected.tobytes())
+
+    def test_matches_pillow_resize_then_crop(self):
+        rand = random.Random(3)
+        for _ in range(40):
+            size = (rand.randint(20, 1400), rand.randint(20, 1400))
+            x1 = rand.randint(0, size[0] - 1)
+            y1 = rand.randint(0, size[1] - 1)
+            window = (x1, y1, rand.randint(x1 + 1, min(size[0], x1 + 225)), rand.randint(y1 + 1, min(size[1], y1 + 350)))
+            with self.subTest(size=size, window=window):
+                self._assert_parity(self.rgba, size, window)
+
+    def test_one_axis_unchanged(self):
+        self._assert_parity(self.rgba, (320, 700), (10, 100, 200, 400))
+        self._assert_parity(self.rgba, (900, 240), (300, 0, 525, 240))
+
+    def test_same_size_is_plain_crop(self):
+        self._assert_parity(self.rgba, self.rgba.size, (5, 5, 100, 120))
+
+    def test_rgb_source(self):
+        rgb = self.rgba.convert("RGB")
+        self._assert_parity(rgb, (1000, 750), (400, 200, 625, 550))
+
+    def test_rejects_unsupported_mode(self):
+        with self.assertRaises(ValueError):
+            resample_region(self.rgba.convert("L"), (100, 100), (0, 0, 10, 10))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+from src.core.render_cache import RenderCache, image_digest
+
+
+class TestRenderCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = RenderCache(os.path.join(self.tmp.name, "cache"), max_bytes=1 << 20)
+        self.source = os.path.join(self.tmp.name, "source.png")
+        Image.new("RGB", (64, 64), "red").save(self.source)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _task(self, **changes):
+        task = {
+            "path": self.source,
+            "state": {"pos": (0, 0), "size": (225, 350)},
+            "borda_pos": (0, 0),
+            "anim_type": "Rainbow",
+            "border_color": "#FFFFFF",
+            "output_path": os.path.join(self.tmp.name, "out.gif"),
+            "export_format": "gif",
+            "export_preset": "equilibrado",
+            "max_bytes": None,
+        }
+        task.update(changes)
+        return task
+
+    def _output(self, name, data):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_key_follows_render_inputs(self):
+        key = self.cache.key(self._task())
+        self.assertEqual(key, self.cache.key(self._task(output_path="elsewhere.gif")))
+        self.assertNotEqual(key, self.cache.key(self._task(state={"pos": (1, 0), "size": (225, 350)})))
+        self.assertNotEqual(key, self.cache.key(self._task(border_color="#000000")))
+        self.assertNotEqual(key, self.cache.key(self._task(export_format="webp")))
+
+    def test_key_follows_source_content(self):
+        key = self.cache.key(self._task())
+        Image.new("RGB", (64, 64), "blue").save(self.source)
+        os.utime(self.source, ns=(1, 1))
+        self.assertNotEqual(key, self.cache.key(self._task()))
+
+    def test_glitch_key_follows_seed(self):
+        glitch = self.cache.key(self._task(anim_type="Glitch"))
+        self.assertNotEqual(glitch, self.cache.key(self._task(anim_type="Glitch", seed=7)))
+        self.assertEqual(
+            self.cache.key(self._task(seed=7)),
+            self.cache.key(self._task(seed=8)),
+        )
+
+    def test_edited_image_uses_pixel_digest(self):
+        image = Image.new("RGBA", (8, 8), "green")
+        digest = image_digest(image)
+        self.assertEqual(digest, image_digest(image.copy()))
+        edited = image.copy()
+        edited.putpixel((3, 4), (0, 0, 255, 255))
+        self.assertNotEqual(digest, image_digest(edited))
+        self.assertIsNotNone(self.cache.key(self._task(path="missing.png"), digest))
+
+    def test_unreadable_source_has_no_key(self):
+        self.assertIsNone(self.cache.key(self._task(path=os.path.join(self.tmp.name, "missing.png"))))
+
+    def test_store_then_fetch(self):
+        self.assertFalse(self.cache.fetch("abc", os.path.join(self.tmp.name, "copy.gif")))
+        self.cache.store("abc", self._output("rendered.gif", b"GIF89a-data"))
+        target = self._output("copy.gif", b"stale")
+        self.assertTrue(self.cache.fetch("abc", target))
+        with open(target, "rb") as f:
+            self.assertEqual(f.read(), b"GIF89a-data")
+
+    def test_eviction_keeps_recent_entries_within_budget(self):
+        cache = RenderCache(os.path.join(self.tmp.name, "small"), max_bytes=250)
+        for index, key in enumerate(("a", "b", "c")):
+            cache.store(key, self._output(f"{key}.gif", bytes(100)))
+            os.utime(os.path.join(cache.cache_dir, key), (index, index))
+        cache.store("d", self._output("d.gif", bytes(100)))
+        self.assertEqual(sorted(os.listdir(cache.cache_dir)), ["c", "d"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import unittest
+
+from src.core.render_pool import RenderPool
+
+
+def _worker_pid():
+    return os.getpid()
+
+
+class TestRenderPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = RenderPool()
+
+    def tearDown(self):
+        self.pool.shutdown(wait=True)
+
+    def test_workers_stay_up_between_batches(self):
+        first = self.pool.submit(1, _worker_pid).result(timeout=60)
+        second = self.pool.submit(1, _worker_pid).result(timeout=60)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, os.getpid())
+        self.assertEqual(self.pool.max_workers, 1)
+
+    def test_new_worker_count_replaces_pool(self):
+        first = self.pool.submit(1, _worker_pid).result(timeout=60)
+        self.pool.submit(2, _worker_pid).result(timeout=60)
+        self.assertEqual(self.pool.max_workers, 2)
+        self.pool.shutdown(wait=True)
+        self.assertIsNone(self.pool.max_workers)
+        self.assertNotEqual(self.pool.submit(1, _worker_pid).result(timeout=60), first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from multiprocessing import shared_memory
+
+from PIL import Image
+
+from src.config.settings import BORDA_HEIGHT, BORDA_WIDTH
+from src.core.batch_worker import process_image_task
+from src.core.shared_images import SharedImages, open_shared_image
+
+
+class TestSharedImages(unittest.TestCase):
+    def test_round_trip_keeps_pixels(self):
+        image = Image.effect_noise((64, 48), 80).convert("RGB")
+        with SharedImages() as shared:
+            handle = shared.share(image)
+            self.assertEqual(handle["mode"], "RGB")
+            restored = open_shared_image(handle, mode="RGB")
+        self.assertEqual(restored.tobytes(), image.tobytes())
+        restored.close()
+
+    def test_other_modes_are_shared_as_rgba(self):
+        image = Image.new("P", (8, 8))
+        with SharedImages() as shared:
+            handle = shared.share(image)
+            restored = open_shared_image(handle)
+        self.assertEqual(handle["mode"], "RGBA")
+        self.assertEqual(restored.mode, "RGBA")
+        restored.close()
+
+    def test_open_reduces_like_open_image_at_scale(self):
+        image = Image.new("RGBA", (1600, 1200), "green")
+        with SharedImages() as shared:
+            restored = open_shared_image(shared.share(image), min_side=300)
+        self.assertEqual(restored.size, (400, 300))
+        restored.close()
+
+    def test_release_frees_the_buffers(self):
+        shared = SharedImages()
+        handle = shared.share(Image.new("RGBA", (16, 16), "red"))
+        shared.release()
+        self.assertEqual(len(shared), 0)
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=handle["name"])
+
+    def test_worker_renders_shared_source(self):
+        with SharedImages() as shared:
+            result = process_image_task(
+                {
+                    "path": "missing-on-disk.png",
+                    "source_image": shared.share(Image.new("RGBA", (512, 512), "blue")),
+                    "state": {"pos": (0, 0), "size": (BORDA_WIDTH, BORDA_HEIGHT)},
+                    "borda_pos": (0, 0),
+                    "anim_type": "Nenhuma",
+                    "border_color": "#FFFFFF",
+                }
+            )
+        self.assertEqual(result["status"], "success", result.get("error"))
+        self.assertEqual(result["image"].getpixel((BORDA_WIDTH // 2, BORDA_HEIGHT // 2)), (0, 0, 255, 255))
+        result["image"].close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from src.core.size_tuner import (
+    GIF_PALETTE_SIZES,
+    estimate_size,
+    frame_count_steps,
+    save_within_budget,
+    tuning_candidates,
+)
+
+
+def _render_factory(size=(60, 90), border=4):
+    width, height = size
+    rng = np.random.default_rng(1)
+    content = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    content[..., 3] = 255
+    calls = []
+
+    def render(total_frames):
+        calls.append(total_frames)
+        for i in range(total_frames):
+            frame = content.copy()
+            hue = int(255 * i / total_frames)
+            frame[:border] = frame[-border:] = (hue, 255 - hue, 90, 255)
+            frame[:, :border] = frame[:, -border:] = (hue, 255 - hue, 90, 255)
+            yield frame
+
+    return render, calls
+
+
+class TestSizeTuner(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_frame_count_steps_are_distinct_and_bounded(self):
+        self.assertEqual(frame_count_steps(40), [40, 30, 20, 14])
+        self.assertEqual(frame_count_steps(6), [6, 4])
+        self.assertEqual(frame_count_steps(3), [3])
+
+    def test_candidates_lower_frames_and_colors_together(self):
+        candidates = tuning_candidates(40, "gif", "equilibrado")
+
+        self.assertEqual(candidates[0], (40, {"colors": GIF_PALETTE_SIZES[0]}))
+        self.assertEqual(candidates[1], (40, {"colors": GIF_PALETTE_SIZES[1]}))
+        self.assertEqual(candidates[2], (30, {"colors": GIF_PALETTE_SIZES[0]}))
+        self.assertEqual(candidates[-1], (14, {"colors": GIF_PALETTE_SIZES[-1]}))
+        self.assertEqual(tuning_candidates(40, "apng", "equilibrado")[-1], (14, {}))
+
+    def test_sample_estimate_is_close_to_the_full_encode(self):
+        render, _calls = _render_factory()
+        sample = list(render(20))[:5]
+        path = os.path.join(self.tmp.name, "full.gif")
+
+        estimate = estimate_size(sample, 20, 50, "gif", "equilibrado")
+        save_within_budget(render, 20, 50, path, 10 ** 9, "gif")
+
+        self.assertLess(abs(estimate - os.path.getsize(path)) / os.path.getsize(path), 0.1)
+
+    def test_fits_budget_by_lowering_settings(self):
+        render, _calls = _render_factory()
+        roomy = os.path.join(self.tmp.name, "roomy.gif")
+        tight = os.path.join(self.tmp.name, "tight.gif")
+        full = save_within_budget(render, 20, 50, roomy, 10 ** 9, "gif")
+
+        tuned = save_within_budget(render, 20, 50, tight, full["bytes"] * 2 // 3, "gif")
+
+        self.assertEqual((full["frames"], full["colors"]), (20, GIF_PALETTE_SIZES[0]))
+        self.assertTrue(tuned["fits"])
+        self.assertEqual(os.path.getsize(tight), tuned["bytes"])
+        self.assertLess((tuned["frames"], tuned["colors"]), (full["frames"], full["colors"]))
+        self.assertLessEqual(abs(tuned["duration"] * tuned["frames"] - 1000), tuned["frames"])
+        with Image.open(tight) as image:
+            self.assertEqual(image.n_frames, tuned["frames"])
+
+    def test_impossible_budget_writes_smallest_candidate(self):
+        render, _calls = _render_factory()
+        path = os.path.join(self.tmp.name, "small.webp")
+
+        tuned = save_within_budget(render, 20, 50, path, 100, "webp")
+
+        self.assertFalse(tuned["fits"])
+        self.assertEqual(tuned["trials"], 1)
+        self.assertEqual((tuned["frames"], tuned["quality"]), (7, 20))
+        self.assertTrue(os.path.exists(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
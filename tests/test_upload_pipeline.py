@@ -0,0 +1,133 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from src.core.upload_pipeline import UploadPipeline
+
+
+class RecordingUploader:
+    def __init__(self, gate=None):
+        self.posts = []
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def upload_batch(self, items, title, batch_num=1, privacy="hidden", retries=2, cancel_event=None):
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.posts.append((title, batch_num, [item["filename"] for item in items]))
+        return [f"link/{item['filename']}" for item in items], []
+
+
+class TestUploadPipeline(unittest.TestCase):
+    def setUp(self):
+        patcher = patch("src.core.uploader.UPLOAD_BATCH_SIZE", 2)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_posts_follow_index_order_whatever_the_arrival_order(self):
+        uploader = RecordingUploader()
+        pipeline = UploadPipeline(uploader, "Album", 5).start()
+        for index in (3, 1, 4, 0, 2):
+            pipeline.put(index, f"/tmp/{index}.png", f"{index}.png")
+        links, errors = pipeline.close()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(links, [f"link/{index}.png" for index in range(5)])
+        self.assertEqual(
+            uploader.posts,
+            [
+                ("Album (Part 1)", 1, ["0.png", "1.png"]),
+                ("Album (Part 2)", 2, ["2.png", "3.png"]),
+                ("Album (Part 3)", 3, ["4.png"]),
+            ],
+        )
+
+    def test_first_post_goes_up_before_the_rest_arrives(self):
+        uploader = RecordingUploader()
+        pipeline = UploadPipeline(uploader, "Album", 4).start()
+        pipeline.put(0, "/tmp/0.png", "0.png")
+        pipeline.put(1, "/tmp/1.png", "1.png")
+        # One file of the next post tells the first it is part of several.
+        pipeline.put(2, "/tmp/2.png", "2.png")
+        self.assertTrue(uploader.entered.wait(5))
+        pipeline.put(3, "/tmp/3.png", "3.png")
+        pipeline.close()
+        self.assertEqual([post[2] for post in uploader.posts], [["0.png", "1.png"], ["2.png", "3.png"]])
+
+    def test_failed_renders_are_left_out_of_the_posts(self):
+        uploader = RecordingUploader()
+        progress = []
+        pipeline = UploadPipeline(uploader, "Album", 3, progress_callback=lambda *args: progress.append(args)).start()
+        pipeline.put(0, "/tmp/0.png", "0.png")
+        pipeline.skip(1)
+        pipeline.put(2, "/tmp/2.png", "2.png")
+        for completed in range(1, 4):
+            pipeline.render_progress(completed, 3)
+        links, _errors = pipeline.close()
+
+        self.assertEqual(links, ["link/0.png", "link/2.png"])
+        self.assertEqual(pipeline.uploaded, 2)
+        self.assertEqual(progress[-1][:2], (6, 6))
+
+    def test_parts_count_only_files_that_rendered(self):
+        cases = [
+            # (queued indexes, skipped indexes, expected titles, expected "Enviando lote" messages)
+            ([0, 1], [2, 3], ["Album"], ["Enviando lote 1/1"]),
+            ([0, 1, 2], [3], ["Album (Part 1)", "Album (Part 2)"], ["Enviando lote 1/2", "Enviando lote 2/2"]),
+            ([0, 3], [1, 2], ["Album"], ["Enviando lote 1/1"]),
+        ]
+        for queued, skipped, titles, messages in cases:
+            with self.subTest(queued=queued, skipped=skipped):
+                uploader = RecordingUploader()
+                progress = []
+                pipeline = UploadPipeline(uploader, "Album", 4, progress_callback=lambda *args: progress.append(args))
+                pipeline.start()
+                for index in range(4):
+                    if index in skipped:
+                        pipeline.skip(index)
+                    else:
+                        pipeline.put(index, f"/tmp/{index}.png", f"{index}.png")
+                links, _errors = pipeline.close()
+
+                self.assertEqual([post[0] for post in uploader.posts], titles)
+                self.assertEqual(links, [f"link/{index}.png" for index in queued])
+                sending = [args[2].split(" - ")[0] for args in progress if args[2].startswith("Enviando")]
+                self.assertEqual(sending, messages)
+
+    def test_abort_drops_files_not_sent_yet(self):
+        gate = threading.Event()
+        uploader = RecordingUploader(gate)
+        pipeline = UploadPipeline(uploader, "Album", 4).start()
+        for index in range(4):
+            pipeline.put(index, f"/tmp/{index}.png", f"{index}.png")
+        # Aborted while the first post is in flight.
+        self.assertTrue(uploader.entered.wait(5))
+        threading.Timer(0.2, gate.set).start()
+        links, _errors = pipeline.abort()
+
+        self.assertEqual(uploader.posts, [("Album (Part 1)", 1, ["0.png", "1.png"])])
+        self.assertEqual(links, ["link/0.png", "link/1.png"])
+
+    def test_cancel_stops_sending_and_is_reported(self):
+        cancel_event = threading.Event()
+        cancel_event.set()
+        uploader = RecordingUploader()
+        pipeline = UploadPipeline(uploader, "Album", 2, cancel_event=cancel_event).start()
+        pipeline.put(0, "/tmp/0.png", "0.png")
+        pipeline.put(1, "/tmp/1.png", "1.png")
+        links, errors = pipeline.close()
+
+        self.assertEqual((links, uploader.posts), ([], []))
+        self.assertEqual(errors, ["Upload cancelado pelo usuario."])
+
+    def test_single_post_uses_album_title(self):
+        uploader = RecordingUploader()
+        pipeline = UploadPipeline(uploader, "Album", 1).start()
+        pipeline.put(0, "/tmp/0.png", "0.png")
+        pipeline.close()
+        self.assertEqual(uploader.posts, [("Album", 1, ["0.png"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
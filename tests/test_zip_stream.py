@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+import zipfile
+
+from src.core.zip_stream import ZipStreamWriter, zip_compression
+
+
+class TestZipStream(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.target = os.path.join(self.tmp.name, "out.zip")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_entries_are_written_in_index_order(self):
+        writer = ZipStreamWriter(self.target).start()
+        writer.put(2, "c.gif", b"c")
+        writer.skip(1)
+        writer.put(0, "a.gif", b"a")
+        writer.put(3, "d.txt", b"d" * 100)
+        self.assertEqual(writer.close(), 3)
+        with zipfile.ZipFile(self.target) as archive:
+            self.assertEqual(archive.namelist(), ["a.gif", "c.gif", "d.txt"])
+            self.assertEqual(archive.read("d.txt"), b"d" * 100)
+            self.assertEqual(archive.getinfo("d.txt").compress_type, zipfile.ZIP_DEFLATED)
+
+    def test_entries_after_a_missing_one_are_still_written(self):
+        writer = ZipStreamWriter(self.target).start()
+        writer.put(1, "b.png", b"b")
+        self.assertEqual(writer.close(), 1)
+        with zipfile.ZipFile(self.target) as archive:
+            self.assertEqual(archive.namelist(), ["b.png"])
+
+    def test_abort_removes_archive(self):
+        writer = ZipStreamWriter(self.target).start()
+        writer.put(0, "a.png", b"a")
+        writer.abort()
+        self.assertFalse(os.path.exists(self.target))
+
+    def test_write_failure_removes_archive_on_close(self):
+        writer = ZipStreamWriter(self.target).start()
+        writer.put(0, "a.gif", b"a")
+        # Not bytes: writestr fails on the writer thread, like a full disk would.
+        writer.put(1, "b.gif", object())
+        with self.assertRaises(TypeError):
+            writer.close()
+        self.assertFalse(os.path.exists(self.target))
+
+    def test_compressed_formats_are_stored(self):
+        self.assertEqual(zip_compression("x.PNG"), zipfile.ZIP_STORED)
+        self.assertEqual(zip_compression("x.webp"), zipfile.ZIP_STORED)
+        self.assertEqual(zip_compression("x.json"), zipfile.ZIP_DEFLATED)
+
+
+if __name__ == "__main__":
+    unittest.main()